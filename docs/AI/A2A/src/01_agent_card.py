@@ -7,9 +7,10 @@ This example shows:
 1. AgentCard structure
 2. Capability declaration
 3. Skill definition
-4. JSON serialization
+4. JSON serialization (encoded once per card version)
 """
 
+import hashlib
 import json
 from dataclasses import dataclass, field, asdict
 from typing import Optional
@@ -52,7 +53,13 @@ class Authentication:
 
 @dataclass
 class AgentCard:
-    """An A2A Agent Card describing agent capabilities."""
+    """
+    An A2A Agent Card describing agent capabilities.
+    
+    Encodings are cached: to_json() serializes once and returns the same
+    string until a field is assigned (e.g. a version bump). Changes made
+    in place, such as appending a skill, need an explicit invalidate().
+    """
     name: str
     description: str
     url: str
@@ -63,12 +70,32 @@ class AgentCard:
     skills: list[Skill] = field(default_factory=list)
     authentication: Optional[Authentication] = None
     
-    def to_json(self, indent: int = 2) -> str:
+    def __setattr__(self, name, value):
+        object.__setattr__(self, name, value)
+        if name != "_encoded":
+            object.__setattr__(self, "_encoded", {})
+    
+    def invalidate(self):
+        """Drop cached encodings after changing the card in place."""
+        self._encoded = {}
+    
+    def to_json(self, indent: Optional[int] = 2) -> str:
         """Serialize to JSON."""
-        data = asdict(self)
-        # Remove None values
-        data = {k: v for k, v in data.items() if v is not None}
-        return json.dumps(data, indent=indent)
+        encoded = self._encoded.get(indent)
+        if encoded is None:
+            data = asdict(self)
+            # Remove None values
+            data = {k: v for k, v in data.items() if v is not None}
+            encoded = self._encoded[indent] = json.dumps(data, indent=indent)
+        return encoded
+    
+    def etag(self) -> str:
+        """Strong HTTP validator for the compact encoding."""
+        etag = self._encoded.get("etag")
+        if etag is None:
+            digest = hashlib.sha256(self.to_json(indent=None).encode()).hexdigest()
+            etag = self._encoded["etag"] = f'"{self.version}-{digest[:16]}"'
+        return etag
     
     def to_dict(self) -> dict:
         """Convert to dictionary."""
@@ -272,6 +299,19 @@ def run_demo():
     research = create_research_agent()
     print(research.to_json())
     
+    # 4. Cached encoding
+    print("\n" + "=" * 70)
+    print("\n🗃️  Encoded once per version")
+    print("-" * 50)
+    first = research.to_json()
+    print(f"Repeat to_json() returns the cached string: {research.to_json() is first}")
+    print(f"ETag: {research.etag()}")
+    research.version = "1.1.0"
+    print(f"After a version bump: re-encoded={research.to_json() is not first}, ETag {research.etag()}")
+    research.skills.append(Skill(id="translate", name="Translate", description="Translate an abstract"))
+    research.invalidate()
+    print(f"After adding a skill in place + invalidate(): ETag {research.etag()}")
+    
     print("\n" + "=" * 70)
     print("Agent Cards should be served at: /.well-known/agent.json")
     print("=" * 70)
@@ -8,12 +8,26 @@ This example shows:
 2. Sending messages
 3. Handling responses
 4. Task lifecycle
+5. Streaming updates (server-sent events)
+6. Async HTTP transport: pooled keep-alive connections, batching, retries
+7. File attachments by content-addressed reference
+8. Agent Card discovery cache honouring ETag/Cache-Control
+9. Routing across agent replicas by skill, load, health and session
 """
 
+import asyncio
+import hashlib
 import json
+import random
+import re
+import tempfile
+import threading
+import time
 import uuid
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit
 from dataclasses import dataclass, field, asdict
-from typing import Optional, Any
+from typing import Optional, Any, Callable, Iterable, Iterator
 from enum import Enum
 
 
@@ -34,6 +48,7 @@ class Part:
     text: Optional[str] = None
     data: Optional[Any] = None
     mimeType: Optional[str] = None
+    file: Optional[dict] = None  # {"uri", "mimeType", "name", "size"}
 
 
 @dataclass
@@ -72,6 +87,473 @@ class Task:
         return json.dumps(asdict(self), indent=2, default=str)
 
 
+def format_sse(payload: dict) -> str:
+    """Encode one JSON-RPC response as a server-sent event."""
+    return f"data: {json.dumps(payload)}\n\n"
+
+
+def parse_sse(lines: Iterable[str]) -> Iterator[dict]:
+    """
+    Decode a text/event-stream into JSON payloads.
+    
+    Multi-line `data:` fields are joined; comments and other fields are
+    ignored. Accepts any iterable of lines, e.g. a socket file.
+    """
+    data: list[str] = []
+    for line in lines:
+        if isinstance(line, bytes):
+            line = line.decode()
+        line = line.rstrip("\r\n")
+        if not line:
+            if data:
+                yield json.loads("\n".join(data))
+                data = []
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+    if data:
+        yield json.loads("\n".join(data))
+
+
+# =============================================================================
+# File references
+# =============================================================================
+
+BLOB_URI_PREFIX = "blob:sha256:"
+BLOB_CHUNK_SIZE = 64 * 1024
+
+
+def iter_file(path: str, chunk_size: int = BLOB_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read a file in fixed-size chunks."""
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def hash_file(path: str, chunk_size: int = BLOB_CHUNK_SIZE) -> tuple[str, int]:
+    """SHA-256 hex digest and size of a file, read in chunks."""
+    hasher = hashlib.sha256()
+    size = 0
+    for chunk in iter_file(path, chunk_size):
+        hasher.update(chunk)
+        size += len(chunk)
+    return hasher.hexdigest(), size
+
+
+def file_reference(path: str, mime_type: str, name: Optional[str] = None) -> dict:
+    """The `file` object of a file part that refers to `path` by content hash."""
+    digest, size = hash_file(path)
+    return {"uri": BLOB_URI_PREFIX + digest, "mimeType": mime_type,
+            "name": name or path.rsplit("/", 1)[-1], "size": size}
+
+
+# =============================================================================
+# Async HTTP transport
+# =============================================================================
+
+# JSON-RPC error code for a server whose task queue is full
+SERVER_BUSY = -32010
+
+# Methods that may be resent after a failure without side effects
+IDEMPOTENT_METHODS = {"agent/info", "tasks/get", "tasks/cancel"}
+
+
+class TransportError(Exception):
+    """An HTTP exchange with an agent failed after all retries."""
+
+
+class AgentStats:
+    """Request counts and a window of recent latencies for one agent."""
+    
+    def __init__(self, window: int = 2048):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.connections_opened = 0
+        self.latencies: deque = deque(maxlen=window)
+    
+    def record(self, seconds: float, ok: bool):
+        self.requests += 1
+        self.errors += not ok
+        self.latencies.append(seconds)
+    
+    def snapshot(self) -> dict:
+        ordered = sorted(self.latencies)
+        
+        def percentile(q: float) -> float:
+            if not ordered:
+                return 0.0
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000, 3)
+        
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "retries": self.retries,
+            "connections_opened": self.connections_opened,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+        }
+
+
+class _AgentPool:
+    """Idle keep-alive connections and a concurrency limit for one origin."""
+    
+    def __init__(self, host: str, port: int, max_connections: int):
+        self.host = host
+        self.port = port
+        self.idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self.slots = asyncio.Semaphore(max_connections)
+        self.stats = AgentStats()
+
+
+class DiscoveryCache:
+    """
+    Agent Cards by card URL, honouring the agent's HTTP caching headers.
+    
+    A card is reused without any request while its `max-age` lasts.
+    After that it is revalidated with If-None-Match, and a 304 renews it
+    without transferring the card again. `no-cache` revalidates every
+    time; `no-store` keeps nothing.
+    """
+    
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.entries: dict[str, dict] = {}  # card URL -> card, etag, expires
+        self.counters = {"hits": 0, "revalidated": 0, "fetched": 0}
+    
+    def lookup(self, card_url: str) -> tuple[Optional[dict], dict]:
+        """A fresh cached card, else None and the headers for a conditional GET."""
+        entry = self.entries.get(card_url)
+        if entry is None:
+            return None, {}
+        if self.clock() < entry["expires"]:
+            self.counters["hits"] += 1
+            return entry["card"], {}
+        return None, {"If-None-Match": entry["etag"]} if entry["etag"] else {}
+    
+    def store(self, card_url: str, status: int, headers: dict, body: bytes) -> dict:
+        """Record a 200 or 304 reply and return the card it stands for."""
+        if status == 304:
+            entry = self.entries[card_url]
+            self.counters["revalidated"] += 1
+        else:
+            entry = {"card": json.loads(body), "etag": headers.get("etag")}
+            self.counters["fetched"] += 1
+        
+        cache_control = headers.get("cache-control", "").lower()
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        if "no-store" in cache_control:
+            self.entries.pop(card_url, None)
+            return entry["card"]
+        ttl = 0 if "no-cache" in cache_control or max_age is None else int(max_age.group(1))
+        entry["expires"] = self.clock() + ttl
+        self.entries[card_url] = entry
+        return entry["card"]
+    
+    def invalidate(self, card_url: Optional[str] = None):
+        """Forget one card, or all of them."""
+        if card_url is None:
+            self.entries.clear()
+        else:
+            self.entries.pop(card_url, None)
+
+
+async def _read_head(reader: asyncio.StreamReader) -> tuple[int, dict]:
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionResetError("connection closed by agent")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            return status, headers
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+
+async def _iter_chunks(reader: asyncio.StreamReader):
+    """Yield the chunks of a chunked transfer-encoded body."""
+    while True:
+        size = int((await reader.readline()).split(b";")[0], 16)
+        if size == 0:
+            await reader.readline()
+            return
+        chunk = await reader.readexactly(size)
+        await reader.readline()
+        yield chunk
+
+
+async def _read_body(reader: asyncio.StreamReader, headers: dict) -> bytes:
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        return b"".join([chunk async for chunk in _iter_chunks(reader)])
+    return await reader.readexactly(int(headers.get("content-length", 0)))
+
+
+class AsyncA2ATransport:
+    """
+    asyncio HTTP/1.1 client for A2A agents.
+    
+    Each agent origin gets a pool of keep-alive connections, at most
+    `max_connections` of them busy at once; further requests wait for a
+    free one instead of opening more sockets. A batch of JSON-RPC calls
+    (e.g. many tasks/get) goes out as one POST, one round trip.
+    
+    Failures are retried with full-jitter exponential backoff: HTTP
+    429/5xx and connection errors for idempotent methods, SERVER_BUSY
+    replies for any method (the agent did not accept the task). A
+    pooled connection the agent has closed in the meantime is replaced
+    transparently. Per-agent latency stats are kept in `stats(url)`.
+    
+    Agent Cards fetched with get_card() are kept in a DiscoveryCache,
+    which can be shared so that hopping between agents does not refetch
+    their cards.
+    
+    `timeout` bounds each connect and reply; a stream() may wait up to
+    `stream_timeout` for its next event, since tasks can be slow.
+    """
+    
+    def __init__(self, max_connections: int = 8, timeout: float = 10.0,
+                 retries: int = 3, backoff: float = 0.05,
+                 discovery: Optional[DiscoveryCache] = None,
+                 stream_timeout: float = 300.0):
+        self.discovery = discovery if discovery is not None else DiscoveryCache()
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.stream_timeout = stream_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._pools: dict[tuple[str, int], _AgentPool] = {}
+    
+    def _pool(self, url: str) -> tuple[_AgentPool, str]:
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"Only http:// agent URLs are supported: {url}")
+        key = (parts.hostname, parts.port or 80)
+        pool = self._pools.get(key)
+        if pool is None:
+            pool = self._pools[key] = _AgentPool(key[0], key[1], self.max_connections)
+        return pool, parts.path or "/"
+    
+    def stats(self, url: str) -> dict:
+        """Latency percentiles and counters for the agent at `url`."""
+        return self._pool(url)[0].stats.snapshot()
+    
+    async def close(self):
+        """Close every pooled connection."""
+        for pool in self._pools.values():
+            while pool.idle:
+                _, writer = pool.idle.pop()
+                writer.close()
+    
+    async def call(self, url: str, request) -> Any:
+        """POST one JSON-RPC request (or a batch list) and return the decoded reply."""
+        pool, path = self._pool(url)
+        batch = request if isinstance(request, list) else [request]
+        idempotent = all(r.get("method") in IDEMPOTENT_METHODS for r in batch)
+        body = json.dumps(request).encode()
+        
+        started = time.perf_counter()
+        attempt = 0
+        while True:
+            try:
+                status, _, payload = await self._exchange(pool, path, body)
+                if status == 429 or status >= 500:
+                    raise TransportError(f"HTTP {status} from {url}")
+                response = json.loads(payload)
+                busy = isinstance(response, dict) and (response.get("error") or {}).get("code") == SERVER_BUSY
+                if not busy or attempt >= self.retries:
+                    pool.stats.record(time.perf_counter() - started, "error" not in response)
+                    return response
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, TransportError) as e:
+                if not idempotent or attempt >= self.retries:
+                    pool.stats.record(time.perf_counter() - started, False)
+                    raise TransportError(f"{url}: {e}") from e
+            pool.stats.retries += 1
+            await asyncio.sleep(random.uniform(0, self.backoff * 2 ** attempt))
+            attempt += 1
+    
+    async def get_card(self, url: str) -> dict:
+        """The Agent Card of the agent at `url`, from the discovery cache when fresh."""
+        pool, _ = self._pool(url)
+        card_url = f"http://{pool.host}:{pool.port}/.well-known/agent.json"
+        card, conditional = self.discovery.lookup(card_url)
+        if card is not None:
+            return card
+        
+        started = time.perf_counter()
+        status, headers, body = await self._exchange(
+            pool, "/.well-known/agent.json", b"", method="GET", headers=conditional)
+        pool.stats.record(time.perf_counter() - started, status in (200, 304))
+        if status not in (200, 304):
+            raise TransportError(f"{card_url}: HTTP {status}")
+        return self.discovery.store(card_url, status, headers, body)
+    
+    async def get_tasks(self, url: str, task_ids: list[str]) -> list[dict]:
+        """Fetch many tasks in one batched round trip; results follow `task_ids`."""
+        if not task_ids:
+            return []
+        batch = [{"jsonrpc": "2.0", "method": "tasks/get", "params": {"id": task_id}, "id": i}
+                 for i, task_id in enumerate(task_ids)]
+        replies = await self.call(url, batch)
+        if not isinstance(replies, list):
+            raise TransportError(f"{url}: batch rejected: {replies.get('error')}")
+        by_id = {reply.get("id"): reply for reply in replies}
+        return [by_id.get(i, {"error": {"code": -32603, "message": "missing reply"}}) for i in range(len(task_ids))]
+    
+    async def stream(self, url: str, request: dict):
+        """POST a tasks/sendSubscribe request and yield each event payload as it arrives."""
+        pool, path = self._pool(url)
+        body = json.dumps(request).encode()
+        async with pool.slots:
+            reader, writer = await self._checkout(pool)
+            headers: dict = {}
+            done = False
+            try:
+                writer.write(self._encode(pool, path, body, "text/event-stream"))
+                await writer.drain()
+                status, headers = await asyncio.wait_for(_read_head(reader), self.timeout)
+                if not headers.get("content-type", "").startswith("text/event-stream"):
+                    yield json.loads(await _read_body(reader, headers))
+                    done = True
+                    return
+                buffer = b""
+                chunks = _iter_chunks(reader)
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), self.stream_timeout)
+                    except StopAsyncIteration:
+                        break
+                    except asyncio.TimeoutError:
+                        raise TransportError(f"{url}: no event within {self.stream_timeout}s")
+                    # Events end at a blank line; servers may use CRLF line endings
+                    buffer = (buffer + chunk).replace(b"\r\n", b"\n")
+                    *events, buffer = buffer.split(b"\n\n")
+                    for event in events:
+                        for payload in parse_sse(event.decode().split("\n")):
+                            yield payload
+                # A final event need not be followed by a blank line
+                for payload in parse_sse(buffer.decode().split("\n")):
+                    yield payload
+                done = True
+            finally:
+                # A stream abandoned midway leaves unread bytes: drop the connection
+                if done and headers.get("connection", "").lower() != "close":
+                    pool.idle.append((reader, writer))
+                else:
+                    writer.close()
+    
+    async def _checkout(self, pool: _AgentPool):
+        if pool.idle:
+            return pool.idle.pop()
+        pool.stats.connections_opened += 1
+        return await asyncio.wait_for(asyncio.open_connection(pool.host, pool.port), self.timeout)
+    
+    async def upload_blob(self, url: str, path: str, mime_type: str,
+                          name: Optional[str] = None) -> dict:
+        """
+        Make the file at `path` available to the agent; returns its file reference.
+        
+        The file is hashed first and a HEAD /blobs/<sha256> skips the
+        upload if the agent already has it. Otherwise it is streamed in
+        chunks (POST /blobs, chunked encoding), never held in memory whole.
+        """
+        pool, _ = self._pool(url)
+        loop = asyncio.get_running_loop()
+        reference = await loop.run_in_executor(None, file_reference, path, mime_type, name)
+        digest = reference["uri"][len(BLOB_URI_PREFIX):]
+        started = time.perf_counter()
+        
+        status, _, _ = await self._exchange(pool, f"/blobs/{digest}", b"", method="HEAD")
+        if status == 200:
+            pool.stats.record(time.perf_counter() - started, True)
+            return {**reference, "uploaded": False}
+        
+        async with pool.slots:
+            reader, writer = await self._checkout(pool)
+            try:
+                writer.write((f"POST /blobs HTTP/1.1\r\nHost: {pool.host}:{pool.port}\r\n"
+                              f"Content-Type: application/octet-stream\r\nX-Content-SHA256: {digest}\r\n"
+                              f"Transfer-Encoding: chunked\r\n\r\n").encode())
+                for chunk in iter_file(path):
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+                status, headers = await asyncio.wait_for(_read_head(reader), self.timeout)
+                payload = await asyncio.wait_for(_read_body(reader, headers), self.timeout)
+            finally:
+                writer.close()  # an upload rejected midway leaves the stream out of step
+        pool.stats.record(time.perf_counter() - started, status == 201)
+        if status != 201:
+            raise TransportError(f"{url}: upload failed with HTTP {status}: {payload[:200]!r}")
+        return {**reference, "uploaded": True}
+    
+    async def iter_blob(self, url: str, uri: str):
+        """Stream the bytes of a `blob:sha256:` reference from the agent."""
+        pool, _ = self._pool(url)
+        async with pool.slots:
+            reader, writer = await self._checkout(pool)
+            headers: dict = {}
+            done = False
+            try:
+                writer.write((f"GET /blobs/{uri[len(BLOB_URI_PREFIX):]} HTTP/1.1\r\n"
+                              f"Host: {pool.host}:{pool.port}\r\n\r\n").encode())
+                await writer.drain()
+                status, headers = await asyncio.wait_for(_read_head(reader), self.timeout)
+                remaining = int(headers.get("content-length", 0))
+                if status != 200:
+                    await reader.readexactly(remaining)
+                    done = True
+                    raise TransportError(f"{url}: {uri} not found (HTTP {status})")
+                while remaining:
+                    chunk = await reader.read(min(remaining, BLOB_CHUNK_SIZE))
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", remaining)
+                    remaining -= len(chunk)
+                    yield chunk
+                done = True
+            finally:
+                if done and headers.get("connection", "").lower() != "close":
+                    pool.idle.append((reader, writer))
+                else:
+                    writer.close()
+    
+    def _encode(self, pool: _AgentPool, path: str, body: bytes, accept: str,
+                method: str = "POST", headers: Optional[dict] = None) -> bytes:
+        extra = "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {pool.host}:{pool.port}\r\n"
+                f"Content-Type: application/json\r\nAccept: {accept}\r\n{extra}"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        return head.encode() + body
+    
+    async def _exchange(self, pool: _AgentPool, path: str, body: bytes, method: str = "POST",
+                        headers: Optional[dict] = None) -> tuple[int, dict, bytes]:
+        async with pool.slots:
+            while True:
+                reused = bool(pool.idle)
+                reader, writer = await self._checkout(pool)
+                try:
+                    writer.write(self._encode(pool, path, body, "application/json", method, headers))
+                    await writer.drain()
+                    status, reply_headers = await asyncio.wait_for(_read_head(reader), self.timeout)
+                    payload = b"" if method == "HEAD" else await asyncio.wait_for(
+                        _read_body(reader, reply_headers), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if reused:
+                        continue  # the agent closed an idle connection; open a fresh one
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if reply_headers.get("connection", "").lower() == "close":
+                    writer.close()
+                else:
+                    pool.idle.append((reader, writer))
+                return status, reply_headers, payload
+
+
 class A2AClient:
     """
     A2A client for sending tasks to agents.
@@ -80,13 +562,51 @@ class A2AClient:
     - Task creation
     - Message sending
     - Response handling
+    
+    The request builders return JSON-RPC dicts. With a transport the
+    client can also send them: call(), poll() and stream().
     """
     
-    def __init__(self, agent_url: str):
+    def __init__(self, agent_url: str, transport: Optional[AsyncA2ATransport] = None):
         self.agent_url = agent_url
+        self.transport = transport
         self.tasks: dict[str, Task] = {}
         self._request_id = 0
     
+    def _session_id(self, task_id: str) -> Optional[str]:
+        task = self.tasks.get(task_id)
+        return task.sessionId if task is not None else None
+    
+    def _require_transport(self) -> AsyncA2ATransport:
+        if self.transport is None:
+            raise ValueError("A2AClient was created without a transport")
+        return self.transport
+    
+    async def discover(self) -> dict:
+        """Fetch the agent's card, reusing the transport's discovery cache."""
+        return await self._require_transport().get_card(self.agent_url)
+    
+    async def call(self, request: dict) -> dict:
+        """Send a request built by this client and return the response."""
+        return await self._require_transport().call(self.agent_url, request)
+    
+    async def poll(self, task_ids: Optional[list[str]] = None) -> list[dict]:
+        """Refresh the status of many tasks (default: all known) in one round trip."""
+        task_ids = list(self.tasks) if task_ids is None else task_ids
+        replies = await self._require_transport().get_tasks(self.agent_url, task_ids)
+        for reply in replies:
+            result = reply.get("result")
+            if result is not None:
+                self.apply_event({"id": result["id"], "status": result["status"]})
+        return replies
+    
+    async def stream(self, request: dict):
+        """Send a tasks/sendSubscribe request, folding and yielding each event."""
+        async for response in self._require_transport().stream(self.agent_url, request):
+            if "result" in response:
+                self.apply_event(response["result"])
+            yield response
+    
     def create_task(self, session_id: Optional[str] = None) -> Task:
         """Create a new task."""
         task_id = f"task_{uuid.uuid4().hex[:12]}"
@@ -110,6 +630,7 @@ class A2AClient:
             "method": "tasks/send",
             "params": {
                 "id": task_id,
+                "sessionId": self._session_id(task_id),
                 "message": {
                     "role": "user",
                     "parts": [{"type": "text", "text": text}]
@@ -118,21 +639,31 @@ class A2AClient:
             "id": self._request_id
         }
     
-    def send_with_file(self, task_id: str, text: str, 
-                       file_data: str, mime_type: str) -> dict:
-        """Send a message with a file attachment."""
+    async def upload_file(self, path: str, mime_type: str, name: Optional[str] = None) -> dict:
+        """Upload a file (unless the agent already has it) and return its reference."""
+        return await self._require_transport().upload_blob(self.agent_url, path, mime_type, name)
+    
+    def send_with_file(self, task_id: str, text: str, file: dict) -> dict:
+        """
+        Send a message with a file attachment.
+        
+        `file` is a reference from file_reference() or upload_file(): the
+        message carries the content hash, not the bytes.
+        """
         self._request_id += 1
+        reference = {key: file[key] for key in ("uri", "mimeType", "name", "size") if key in file}
         
         return {
             "jsonrpc": "2.0",
             "method": "tasks/send",
             "params": {
                 "id": task_id,
+                "sessionId": self._session_id(task_id),
                 "message": {
                     "role": "user",
                     "parts": [
                         {"type": "text", "text": text},
-                        {"type": "file", "mimeType": mime_type, "data": file_data}
+                        {"type": "file", "file": reference}
                     ]
                 }
             },
@@ -170,6 +701,7 @@ class A2AClient:
             "method": "tasks/sendSubscribe",
             "params": {
                 "id": task_id,
+                "sessionId": self._session_id(task_id),
                 "message": {
                     "role": "user",
                     "parts": [{"type": "text", "text": text}]
@@ -177,20 +709,291 @@ class A2AClient:
             },
             "id": self._request_id
         }
+    
+    def apply_event(self, event: dict) -> Task:
+        """
+        Fold a TaskStatusUpdateEvent or TaskArtifactUpdateEvent into the
+        local Task. Appended text chunks are joined onto the artifact's
+        last text part, so the artifact always reads as one text.
+        """
+        task = self.tasks.get(event["id"])
+        if task is None:
+            task = self.tasks[event["id"]] = Task(id=event["id"])
+        
+        if "status" in event:
+            task.status = Status(**event["status"])
+            return task
+        
+        update = event["artifact"]
+        parts = [Part(**part) for part in update.get("parts", [])]
+        index = update.get("index", len(task.artifacts))
+        existing = next((a for a in task.artifacts if a.index == index), None)
+        if existing is None or not update.get("append"):
+            artifact = Artifact(name=update.get("name", ""), parts=parts, index=index)
+            if existing is None:
+                task.artifacts.append(artifact)
+            else:
+                task.artifacts[task.artifacts.index(existing)] = artifact
+            return task
+        for part in parts:
+            last = existing.parts[-1] if existing.parts else None
+            if last is not None and last.type == part.type == "text":
+                last.text = (last.text or "") + (part.text or "")
+            else:
+                existing.parts.append(part)
+        return task
+
+
+# =============================================================================
+# Client-side routing
+# =============================================================================
+
+SEND_METHODS = {"tasks/send", "tasks/sendSubscribe"}
+
+
+def _is_busy(response) -> bool:
+    """Whether a reply (or any reply in a batch) is a SERVER_BUSY refusal."""
+    replies = response if isinstance(response, list) else [response]
+    return any(isinstance(reply, dict) and (reply.get("error") or {}).get("code") == SERVER_BUSY
+               for reply in replies)
+
+
+class _Replica:
+    """Routing state for one agent URL."""
+    
+    def __init__(self, url: str, card: dict):
+        self.url = url
+        self.card = card
+        self.outstanding = 0
+        self.failures = 0  # consecutive
+        self.ejected_until = 0.0
+        self.routed = 0
+
+
+class AgentRouter:
+    """
+    Picks an agent replica per request.
+    
+    Discovered Agent Cards are indexed by skill id and by tag. A request
+    for a skill goes to a replica that advertises it; among those, the
+    one with the fewest outstanding requests wins, ties going to the one
+    that has been routed the fewest requests so far. A replica that
+    fails `eject_after` times in a row is ejected for `eject_seconds`;
+    if every candidate is ejected the router uses them anyway rather
+    than fail outright.
+    
+    Routing is sticky: a sessionId stays on the replica that served it
+    while that replica is healthy, keeping conversational state warm,
+    and tasks/get or tasks/cancel for a task goes to the replica that
+    received it.
+    """
+    
+    def __init__(self, transport: Optional[AsyncA2ATransport] = None, eject_after: int = 3,
+                 eject_seconds: float = 30.0, failover: int = 1, max_sessions: int = 10_000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.transport = transport
+        self.eject_after = eject_after
+        self.eject_seconds = eject_seconds
+        self.failover = failover
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.replicas: dict[str, _Replica] = {}
+        self._by_skill: dict[str, set[str]] = {}
+        self._by_tag: dict[str, set[str]] = {}
+        self._sessions: OrderedDict[str, str] = OrderedDict()  # sessionId -> url
+        self._tasks: OrderedDict[str, str] = OrderedDict()  # task id -> url
+    
+    def add(self, url: str, card) -> None:
+        """Index an agent's card (a dict, or an object with to_dict())."""
+        card = card.to_dict() if hasattr(card, "to_dict") else card
+        self.remove(url)
+        self.replicas[url] = _Replica(url, card)
+        for skill in card.get("skills", []):
+            self._by_skill.setdefault(skill["id"], set()).add(url)
+            for tag in skill.get("tags", []):
+                self._by_tag.setdefault(tag, set()).add(url)
+    
+    def remove(self, url: str) -> None:
+        if self.replicas.pop(url, None) is None:
+            return
+        for index in (self._by_skill, self._by_tag):
+            for key in [key for key, urls in index.items() if url in urls]:
+                index[key].discard(url)
+                if not index[key]:
+                    del index[key]
+    
+    async def discover(self, urls: list[str]) -> None:
+        """Fetch and index the cards of `urls` (through the discovery cache)."""
+        cards = await asyncio.gather(*(self.transport.get_card(url) for url in urls))
+        for url, card in zip(urls, cards):
+            self.add(url, card)
+    
+    def candidates(self, skill: Optional[str] = None, tags: Iterable[str] = ()) -> list[str]:
+        """URLs advertising `skill`, or else every tag in `tags`, or all agents."""
+        if skill is not None and skill in self._by_skill:
+            return sorted(self._by_skill[skill])
+        tags = list(tags)
+        if tags:
+            urls = set.intersection(*(self._by_tag.get(tag, set()) for tag in tags))
+            return sorted(urls)
+        if skill is not None:
+            return []
+        return sorted(self.replicas)
+    
+    def healthy(self, url: str) -> bool:
+        return self.replicas[url].ejected_until <= self.clock()
+    
+    def pick(self, skill: Optional[str] = None, tags: Iterable[str] = (),
+             session_id: Optional[str] = None, exclude: Iterable[str] = ()) -> str:
+        """Choose the replica for one request, never one in `exclude`."""
+        tags = list(tags)
+        exclude = set(exclude)
+        urls = [url for url in self.candidates(skill, tags) if url not in exclude]
+        if not urls:
+            raise ValueError(f"No agent offers skill={skill!r} tags={tags!r}")
+        
+        sticky = self._sessions.get(session_id) if session_id is not None else None
+        if sticky in urls and self.healthy(sticky):
+            self._sessions.move_to_end(session_id)
+            return sticky
+        
+        pool = [url for url in urls if self.healthy(url)] or urls
+        url = min(pool, key=lambda url: (self.replicas[url].outstanding, self.replicas[url].routed))
+        if session_id is not None:
+            self._remember(self._sessions, session_id, url)
+        return url
+    
+    def _remember(self, mapping: OrderedDict, key: str, url: str):
+        mapping[key] = url
+        mapping.move_to_end(key)
+        while len(mapping) > self.max_sessions:
+            mapping.popitem(last=False)
+    
+    def _finish(self, url: str, ok: Optional[bool]):
+        """Release one outstanding slot; `ok` None (a cancelled call) leaves health alone."""
+        replica = self.replicas.get(url)
+        if replica is None:
+            return
+        replica.outstanding -= 1
+        if ok is None:
+            return
+        if ok:
+            replica.failures = 0
+            return
+        replica.failures += 1
+        if replica.failures >= self.eject_after:
+            replica.ejected_until = self.clock() + self.eject_seconds
+            replica.failures = 0
+    
+    async def call(self, request, skill: Optional[str] = None,
+                   tags: Iterable[str] = ()) -> tuple[str, Any]:
+        """
+        Route and send one request (or a batch list); returns (agent URL, response).
+        
+        A batch is routed by its first request. When the replica fails or
+        answers busy, and the request isn't bound to the replica holding
+        its task, it is sent on to up to `failover` other healthy
+        replicas. A tasks/send whose reply was lost can then exist on two
+        replicas; the router follows the one that answered.
+        """
+        tags = list(tags)
+        batch = request if isinstance(request, list) else [request]
+        head = batch[0] if batch else {}
+        params = head.get("params") or {}
+        owner = self._tasks.get(params.get("id")) if head.get("method") not in SEND_METHODS else None
+        tried: list[str] = []
+        while True:
+            if owner in self.replicas:
+                url = owner
+            else:
+                url = self.pick(skill, tags, params.get("sessionId"), exclude=tried)
+            tried.append(url)
+            try:
+                response = await self._send(url, request)
+            except TransportError:
+                if not self._can_fail_over(owner, tried, skill, tags):
+                    raise
+                continue
+            if not _is_busy(response) or not self._can_fail_over(owner, tried, skill, tags):
+                break
+        
+        for sent in batch:
+            task_id = (sent.get("params") or {}).get("id")
+            if sent.get("method") in SEND_METHODS and task_id:
+                self._remember(self._tasks, task_id, url)
+        return url, response
+    
+    async def _send(self, url: str, request) -> Any:
+        """One exchange with `url`, keeping its outstanding count and health."""
+        replica = self.replicas[url]
+        replica.outstanding += 1
+        replica.routed += 1
+        ok = None
+        try:
+            response = await self.transport.call(url, request)
+            ok = not _is_busy(response)
+            return response
+        except (TransportError, ValueError):
+            ok = False
+            raise
+        finally:
+            self._finish(url, ok)
+    
+    def _can_fail_over(self, owner: Optional[str], tried: list[str], skill: Optional[str],
+                       tags: Iterable[str]) -> bool:
+        if owner in self.replicas or len(tried) > self.failover:
+            return False
+        return any(url not in tried and self.healthy(url) for url in self.candidates(skill, tags))
+    
+    def stats(self) -> dict:
+        now = self.clock()
+        return {url: {"routed": r.routed, "outstanding": r.outstanding,
+                      "ejected": r.ejected_until > now} for url, r in self.replicas.items()}
 
 
 class MockA2AServer:
     """
     Mock A2A server for testing.
     
-    Simulates server responses.
+    Simulates server responses. Tasks are remembered in LRU order, up to
+    `max_tasks`, so tasks/get and tasks/cancel see what tasks/send did.
     """
     
-    def __init__(self):
-        self.tasks: dict[str, dict] = {}
+    def __init__(self, max_tasks: int = 1000):
+        self.max_tasks = max_tasks
+        self.tasks: OrderedDict[str, dict] = OrderedDict()
+        self.evicted = 0
+        self.blobs: dict[str, bytes] = {}  # sha256 hex -> content
+        self.card = {
+            "name": "Mock Agent",
+            "description": "Echoes messages back",
+            "url": "http://127.0.0.1/a2a",
+            "version": "1.0.0",
+            "capabilities": {"streaming": True},
+            "skills": [{"id": "echo", "name": "Echo", "description": "Echo the message"}]
+        }
     
-    def handle_request(self, request: dict) -> dict:
-        """Process a JSON-RPC request."""
+    def _store(self, task: dict):
+        self.tasks[task["id"]] = task
+        self.tasks.move_to_end(task["id"])
+        while len(self.tasks) > self.max_tasks:
+            self.tasks.popitem(last=False)
+            self.evicted += 1
+    
+    def _not_found(self, task_id: str, request_id: int) -> dict:
+        return {
+            "jsonrpc": "2.0",
+            "error": {"code": -32001, "message": f"Task not found: {task_id}"},
+            "id": request_id
+        }
+    
+    def handle_request(self, request):
+        """Process a JSON-RPC request, or a batch (list) of them."""
+        if isinstance(request, list):
+            if not request:
+                return {"jsonrpc": "2.0", "error": {"code": -32600, "message": "Empty batch"}, "id": None}
+            return [self.handle_request(r) for r in request]
+        
         method = request.get("method")
         params = request.get("params", {})
         request_id = request.get("id")
@@ -201,6 +1004,12 @@ class MockA2AServer:
             return self._handle_get(params, request_id)
         elif method == "tasks/cancel":
             return self._handle_cancel(params, request_id)
+        elif method == "tasks/sendSubscribe":
+            return {
+                "jsonrpc": "2.0",
+                "error": {"code": -32004, "message": "tasks/sendSubscribe streams events; use handle_stream()"},
+                "id": request_id
+            }
         else:
             return {
                 "jsonrpc": "2.0",
@@ -208,6 +1017,40 @@ class MockA2AServer:
                 "id": request_id
             }
     
+    def handle_stream(self, request: dict) -> Iterator[dict]:
+        """
+        Process a tasks/sendSubscribe request as a stream of responses:
+        status updates plus the reply echoed back one word per chunk.
+        """
+        if request.get("method") != "tasks/sendSubscribe":
+            yield self.handle_request(request)
+            return
+        
+        params = request.get("params", {})
+        request_id = request.get("id")
+        task_id = params["id"]
+        user_text = params.get("message", {}).get("parts", [{}])[0].get("text", "")
+        
+        def event(result: dict) -> dict:
+            return {"jsonrpc": "2.0", "result": result, "id": request_id}
+        
+        yield event({"id": task_id, "status": {"state": "working"}, "final": False})
+        words = f"Received: {user_text}".split(" ")
+        for i, word in enumerate(words):
+            chunk = word if i == 0 else " " + word
+            yield event({"id": task_id, "artifact": {
+                "name": "response", "index": 0, "append": i > 0, "lastChunk": i == len(words) - 1,
+                "parts": [{"type": "text", "text": chunk}]
+            }})
+        
+        status = {"state": "completed", "message": "Task completed"}
+        self._store({
+            "id": task_id,
+            "status": status,
+            "artifacts": [{"name": "response", "parts": [{"type": "text", "text": " ".join(words)}]}]
+        })
+        yield event({"id": task_id, "status": status, "final": True})
+    
     def _handle_send(self, params: dict, request_id: int) -> dict:
         """Handle task send."""
         task_id = params["id"]
@@ -219,18 +1062,21 @@ class MockA2AServer:
         # Create response
         response_text = f"Received: {user_text}"
         
+        task = {
+            "id": task_id,
+            "status": {"state": "completed", "message": "Task completed"},
+            "artifacts": [
+                {
+                    "name": "response",
+                    "parts": [{"type": "text", "text": response_text}]
+                }
+            ]
+        }
+        self._store(task)
+        
         return {
             "jsonrpc": "2.0",
-            "result": {
-                "id": task_id,
-                "status": {"state": "completed", "message": "Task completed"},
-                "artifacts": [
-                    {
-                        "name": "response",
-                        "parts": [{"type": "text", "text": response_text}]
-                    }
-                ]
-            },
+            "result": task,
             "id": request_id
         }
     
@@ -238,12 +1084,14 @@ class MockA2AServer:
         """Handle task get."""
         task_id = params["id"]
         
+        task = self.tasks.get(task_id)
+        if task is None:
+            return self._not_found(task_id, request_id)
+        self.tasks.move_to_end(task_id)
+        
         return {
             "jsonrpc": "2.0",
-            "result": {
-                "id": task_id,
-                "status": {"state": "completed"}
-            },
+            "result": task,
             "id": request_id
         }
     
@@ -251,6 +1099,11 @@ class MockA2AServer:
         """Handle task cancel."""
         task_id = params["id"]
         
+        task = self.tasks.get(task_id)
+        if task is None:
+            return self._not_found(task_id, request_id)
+        task["status"] = {"state": "canceled"}
+        
         return {
             "jsonrpc": "2.0",
             "result": {
@@ -261,10 +1114,233 @@ class MockA2AServer:
         }
 
 
+def serve_mock_http(server: MockA2AServer, host: str = "127.0.0.1", port: int = 0,
+                    card_max_age: int = 60):
+    """
+    Serve a MockA2AServer over HTTP/1.1 with keep-alive on a background
+    thread; returns the HTTP server.
+    
+    Set `fail_next` on the returned server to answer that many requests
+    with 503, and read `requests_served` to count round trips. Blobs are
+    kept in `server.blobs` behind HEAD/GET /blobs/<sha256> and POST /blobs.
+    The card is served at /.well-known/agent.json with an ETag.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MockHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are separate writes
+        
+        def do_HEAD(self):
+            digest = self.path[len("/blobs/"):]
+            if digest not in server.blobs:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(server.blobs[digest])))
+            self.end_headers()
+        
+        def do_GET(self):
+            if self.path == "/.well-known/agent.json":
+                with lock:
+                    httpd.requests_served += 1
+                card = json.dumps(server.card).encode()
+                etag = f'"{hashlib.sha256(card).hexdigest()[:16]}"'
+                self.send_response(304 if self.headers.get("If-None-Match") == etag else 200)
+                self.send_header("ETag", etag)
+                self.send_header("Cache-Control", f"max-age={card_max_age}")
+                if self.headers.get("If-None-Match") == etag:
+                    self.end_headers()
+                    return
+                self.send_header("Content-Length", str(len(card)))
+                self.end_headers()
+                self.wfile.write(card)
+                return
+            blob = server.blobs.get(self.path[len("/blobs/"):])
+            if blob is None:
+                self.send_error(404)
+                return
+            self._send(200, "application/octet-stream", blob)
+        
+        def do_POST(self):
+            if self.path == "/blobs":
+                self._receive_blob()
+                return
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            with lock:
+                httpd.requests_served += 1
+                failing = httpd.fail_next > 0
+                httpd.fail_next -= failing
+            if failing:
+                self._send(503, "application/json", b"{}")
+            elif isinstance(request, dict) and request.get("method") == "tasks/sendSubscribe":
+                self._send(200, "text/event-stream", "".join(
+                    format_sse(response) for response in server.handle_stream(request)).encode())
+            else:
+                self._send(200, "application/json", json.dumps(server.handle_request(request)).encode())
+        
+        def _receive_blob(self):
+            chunks = []
+            while size := int(self.rfile.readline().split(b";")[0], 16):
+                chunks.append(self.rfile.read(size))
+                self.rfile.readline()
+            self.rfile.readline()
+            blob = b"".join(chunks)
+            digest = hashlib.sha256(blob).hexdigest()
+            if digest != self.headers.get("X-Content-SHA256", digest):
+                self._send(400, "application/json", b'{"error": "hash mismatch"}')
+                return
+            server.blobs[digest] = blob
+            self._send(201, "application/json", json.dumps(
+                {"uri": BLOB_URI_PREFIX + digest, "sha256": digest, "size": len(blob)}).encode())
+        
+        def _send(self, status: int, content_type: str, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            if content_type == "text/event-stream":
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                self.wfile.write(b"%x\r\n%s\r\n0\r\n\r\n" % (len(body), body))
+                return
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    lock = threading.Lock()
+    httpd = ThreadingHTTPServer((host, port), MockHandler)
+    httpd.requests_served = 0
+    httpd.fail_next = 0
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
 # =============================================================================
 # Demo
 # =============================================================================
 
+async def run_transport_demo(url: str, httpd, tasks: int = 50):
+    """Send tasks, poll them one by one and batched, and stream one."""
+    now = [0.0]
+    transport = AsyncA2ATransport(max_connections=4, discovery=DiscoveryCache(clock=lambda: now[0]))
+    client = A2AClient(url, transport)
+    
+    for label, advance in (("first lookup", 0), ("again", 1), ("after max-age", 61)):
+        now[0] += advance
+        before = httpd.requests_served
+        card = await client.discover()
+        print(f"  discover() {label:<14}: {card['name']}, {httpd.requests_served - before} request(s)")
+    print(f"  Discovery cache: {transport.discovery.counters}")
+    
+    ids = [client.create_task().id for _ in range(tasks)]
+    await asyncio.gather(*(client.call(client.send_message(task_id, f"job {i}"))
+                           for i, task_id in enumerate(ids)))
+    print(f"  Sent {tasks} tasks concurrently over "
+          f"{transport.stats(url)['connections_opened']} connections")
+    
+    before, started = httpd.requests_served, time.perf_counter()
+    for task_id in ids:
+        await client.call(client.get_task(task_id))
+    one_by_one = time.perf_counter() - started
+    print(f"  tasks/get × {tasks}: {httpd.requests_served - before} round trips, {one_by_one * 1000:.1f} ms")
+    
+    before, started = httpd.requests_served, time.perf_counter()
+    replies = await client.poll(ids)
+    batched = time.perf_counter() - started
+    states = {client.tasks[task_id].status.state for task_id in ids}
+    print(f"  batched poll:  {httpd.requests_served - before} round trip, {batched * 1000:.1f} ms "
+          f"({len(replies)} replies, states {sorted(states)})")
+    
+    httpd.fail_next = 2
+    reply = await client.call(client.get_task(ids[0]))
+    print(f"  After two 503s: {reply['result']['status']['state']} "
+          f"(retries so far: {transport.stats(url)['retries']})")
+    
+    task = client.create_task()
+    chunks = [response["result"]["artifact"]["parts"][0]["text"]
+              async for response in client.stream(client.subscribe_task(task.id, "streamed over HTTP"))
+              if "artifact" in response["result"]]
+    print(f"  Streamed chunks: {chunks} → {client.tasks[task.id].status.state}")
+    
+    with tempfile.TemporaryDirectory() as root:
+        path = f"{root}/readings.csv"
+        with open(path, "w") as f:
+            f.writelines(f"{hour},{60 + hour % 12}\n" for hour in range(100_000))
+        first = await client.upload_file(path, "text/csv")
+        second = await client.upload_file(path, "text/csv")
+        print(f"  Upload {first['size']} bytes: uploaded={first['uploaded']}; "
+              f"again: uploaded={second['uploaded']} (HEAD only)")
+        reply = await client.call(client.send_with_file(client.create_task().id, "Chart this", first))
+        print(f"  Sent with reference → {reply['result']['status']['state']}, "
+              f"request body {len(json.dumps(client.send_with_file('t', 'Chart this', first)))} bytes")
+        hasher = hashlib.sha256()
+        async for chunk in transport.iter_blob(url, first["uri"]):
+            hasher.update(chunk)
+        print(f"  Streamed back, hash matches: {BLOB_URI_PREFIX + hasher.hexdigest() == first['uri']}")
+    
+    print(f"  Agent stats: {transport.stats(url)}")
+    await transport.close()
+
+
+async def run_router_demo():
+    """Route across two echo replicas and a translator by skill, load, health and session."""
+    specs = [("echo-a", "echo", ["text"]), ("echo-b", "echo", ["text"]),
+             ("translator", "translate", ["text", "language"])]
+    servers, urls, names = [], [], {}
+    for name, skill, tags in specs:
+        mock = MockA2AServer()
+        mock.card = {**mock.card, "name": name, "skills": [{"id": skill, "name": skill.title(),
+                                                            "description": "", "tags": tags}]}
+        httpd = serve_mock_http(mock)
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/a2a"
+        servers.append(httpd)
+        urls.append(url)
+        names[url] = name
+    
+    now = [0.0]
+    transport = AsyncA2ATransport(retries=1, backoff=0.001)
+    router = AgentRouter(transport, eject_after=3, eject_seconds=30, clock=lambda: now[0])
+    await router.discover(urls)
+    client = A2AClient("router", transport)
+    
+    def routed() -> dict:
+        return {names[url]: stats["routed"] for url, stats in router.stats().items()}
+    
+    print(f"  Skill index: echo → {[names[u] for u in router.candidates('echo')]}, "
+          f"tag 'language' → {[names[u] for u in router.candidates(tags=['language'])]}")
+    
+    sends = [client.send_message(client.create_task().id, f"job {i}") for i in range(30)]
+    await asyncio.gather(*(router.call(request, skill="echo") for request in sends))
+    print(f"  30 concurrent echo tasks (least outstanding): {routed()}")
+    
+    conversation = client.create_task(session_id="session-7")
+    hops = {names[(await router.call(client.send_message(conversation.id, f"turn {turn}"), skill="echo"))[0]]
+            for turn in range(5)}
+    url, reply = await router.call(client.get_task(conversation.id))
+    print(f"  5 turns of session-7 went to {hops}; tasks/get followed the task to {names[url]}")
+    
+    servers[0].fail_next = 100  # echo-a starts failing
+    answered = set()
+    for i in range(50):  # until echo-a has been picked, and failed, eject_after times
+        url, _ = await router.call(client.send_message(client.create_task().id, f"retry {i}"), skill="echo")
+        answered.add(names[url])
+        if not router.healthy(urls[0]):
+            break
+    ejected = [names[url] for url, stats in router.stats().items() if stats["ejected"]]
+    print(f"  Sends while echo-a returned 503s were answered by {sorted(answered)} (failover); "
+          f"ejected {ejected}")
+    servers[0].fail_next = 0
+    print(f"  echo-a in rotation: {router.healthy(urls[0])}; 31 s later: ", end="")
+    now[0] += 31
+    print(router.healthy(urls[0]))
+    
+    await transport.close()
+    for httpd in servers:
+        httpd.shutdown()
+
+
 def run_demo():
     """Demonstrate A2A client operations."""
     
@@ -296,13 +1372,15 @@ def run_demo():
     print("\n" + "=" * 70)
     print("\n📎 Sending message with file...")
     print("-" * 50)
-    request = client.send_with_file(
-        task.id, 
-        "Analyze this document",
-        "base64encodedcontent...",
-        "application/pdf"
-    )
-    print("Request:")
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as document:
+        document.write(b"%PDF-1.4 quarterly report " * 40000)
+        document.flush()
+        request = client.send_with_file(
+            task.id,
+            "Analyze this document",
+            file_reference(document.name, "application/pdf", "report.pdf")
+        )
+    print("Request (the file travels by hash, not inline):")
     print(json.dumps(request, indent=2))
     
     # 4. Get task status
@@ -325,6 +1403,31 @@ def run_demo():
     print("Request:")
     print(json.dumps(request, indent=2))
     
+    print("\n📥 Event stream:")
+    wire = "".join(format_sse(response) for response in server.handle_stream(request))
+    print(wire.split("\n\n")[2] + "\n  ...")
+    for response in parse_sse(wire.splitlines(keepends=True)):
+        result = response["result"]
+        local = client.apply_event(result)
+        if "status" in result:
+            print(f"  status   → {local.status.state}")
+        else:
+            print(f"  artifact → {local.artifacts[0].parts[0].text!r}")
+    
+    # 6. Async HTTP transport
+    print("\n" + "=" * 70)
+    print("\n🌐 Async HTTP transport (keep-alive pool, batching, retries)...")
+    print("-" * 50)
+    httpd = serve_mock_http(server)
+    asyncio.run(run_transport_demo(f"http://127.0.0.1:{httpd.server_address[1]}/a2a", httpd))
+    httpd.shutdown()
+    
+    # 7. Routing across replicas
+    print("\n" + "=" * 70)
+    print("\n🔀 Agent router (skill index, least outstanding, ejection, stickiness)...")
+    print("-" * 50)
+    asyncio.run(run_router_demo())
+    
     print("\n" + "=" * 70)
     print("✅ A2A client demo complete!")
 
@@ -8,13 +8,40 @@ This example shows:
 2. Task handling
 3. Multi-skill agent
 4. Response generation
+5. Bounded, indexed task stores (in-memory LRU/TTL or SQLite)
+6. Skill detection through one compiled Aho-Corasick automaton
+7. Asynchronous task execution on a bounded worker pool
+8. Streaming task updates (tasks/sendSubscribe) as server-sent events
+9. File attachments as references into a content-addressed blob store
+10. Agent Card encoded once per version, served with ETag/Cache-Control
+11. Compact, append-only state transition history per task
 """
 
+import asyncio
+import base64
+import hashlib
+import inspect
 import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import struct
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
 import uuid
+import zlib
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
 from dataclasses import dataclass, field, asdict
-from typing import Optional, Any, Callable
-from datetime import datetime
+from typing import Optional, Any, Callable, Iterator
+from datetime import datetime, timezone
 
 
 @dataclass
@@ -23,6 +50,7 @@ class Skill:
     id: str
     name: str
     description: str
+    tags: list[str] = field(default_factory=list)
 
 
 @dataclass
@@ -36,6 +64,771 @@ class AgentCard:
     skills: list[Skill] = field(default_factory=list)
 
 
+# =============================================================================
+# Skill Detection
+# =============================================================================
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class SkillMatcher:
+    """
+    Finds the skill a message asks for in one pass over the text.
+    
+    Every skill contributes patterns: its id (also with underscores read
+    as spaces) and name, then any extra keywords, then its tags. All of
+    them are compiled into a single Aho-Corasick automaton, so matching
+    costs O(len(text) + matches) however many skills the card has.
+    Matches must start and end on word boundaries. The best match is the
+    one with the highest-priority pattern kind (id/name, keyword, tag),
+    then the skill listed first on the card.
+    """
+    
+    ID_OR_NAME, KEYWORD, TAG = range(3)
+    
+    def __init__(self, skills: list[Skill], keywords: Optional[dict[str, list[str]]] = None):
+        self.skill_ids = [skill.id for skill in skills]
+        # Trie as parallel lists: transitions, failure links, outputs
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, tuple[int, int]]]] = [[]]  # (length, (kind, skill index))
+        
+        keywords = keywords or {}
+        for index, skill in enumerate(skills):
+            for pattern in (skill.id, skill.id.replace("_", " "), skill.name):
+                self._add(pattern, (self.ID_OR_NAME, index))
+            for pattern in keywords.get(skill.id, ()):
+                self._add(pattern, (self.KEYWORD, index))
+            for pattern in skill.tags:
+                self._add(pattern, (self.TAG, index))
+        self._link()
+    
+    def _add(self, pattern: str, rank: tuple[int, int]):
+        pattern = pattern.lower().strip()
+        if not pattern:
+            return
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append((len(pattern), rank))
+    
+    def _link(self):
+        """Breadth-first pass setting failure links and merging outputs."""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        for outputs in self._out:
+            outputs.sort(key=lambda output: output[1])
+    
+    def match(self, text: str) -> Optional[str]:
+        """The id of the best-matching skill, or None."""
+        text = text.lower()
+        goto, fail, out = self._goto, self._fail, self._out
+        best: Optional[tuple[int, int]] = None
+        node = 0
+        last = len(text) - 1
+        for end, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if not out[node]:
+                continue
+            if end < last and _is_word_char(text[end + 1]) and _is_word_char(ch):
+                continue  # every pattern here would end mid-word
+            for length, rank in out[node]:
+                if best is not None and rank >= best:
+                    break  # outputs are sorted, nothing better follows
+                start = end - length + 1
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                best = rank
+                break
+            if best == (self.ID_OR_NAME, 0):
+                break
+        return None if best is None else self.skill_ids[best[1]]
+
+
+# =============================================================================
+# Task Stores
+# =============================================================================
+
+TERMINAL_STATES = frozenset({"completed", "failed", "canceled"})
+
+
+def _pack(task: dict) -> bytes:
+    """Compact encoding for finished tasks: minified JSON, zlib-compressed."""
+    return zlib.compress(json.dumps(task, separators=(",", ":")).encode("utf-8"), 1)
+
+
+def _unpack(body: bytes) -> dict:
+    return json.loads(zlib.decompress(body))
+
+
+class InMemoryTaskStore:
+    """
+    Bounded in-memory task store.
+    
+    Tasks are kept in LRU order and dropped once `max_tasks` is exceeded
+    or when untouched for `ttl_seconds`. Only finished tasks are dropped:
+    an unfinished one is kept (and counted in `spared_unfinished`) even if
+    that leaves the store over `max_tasks`. Tasks in a terminal state are
+    stored packed (see _pack) since they are read rarely. Indexes by
+    sessionId and state answer by_session/by_state without a scan.
+    
+    get() returns the stored dict for live tasks: put() it back after
+    changing it.
+    """
+    
+    def __init__(self, max_tasks: int = 10_000, ttl_seconds: float = 3600.0,
+                 compact_terminal: bool = True):
+        self.max_tasks = max_tasks
+        self.ttl_seconds = ttl_seconds
+        self.compact_terminal = compact_terminal
+        # id -> (last touched, task dict or packed bytes)
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._keys: dict[str, tuple[Optional[str], str]] = {}  # id -> (sessionId, state)
+        self._by_session: dict[str, set[str]] = {}
+        self._by_state: dict[str, set[str]] = {}
+        self._lock = threading.RLock()
+        self.metrics = {"puts": 0, "hits": 0, "misses": 0, "evicted_lru": 0,
+                        "evicted_ttl": 0, "spared_unfinished": 0, "compacted": 0}
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+    
+    def __contains__(self, task_id: str) -> bool:
+        # Unlike get(), neither touches the task nor counts a lookup
+        with self._lock:
+            entry = self._entries.get(task_id)
+            return entry is not None and not self._expired(task_id, entry[0], time.monotonic())
+    
+    def put(self, task: dict):
+        """Insert or replace a task."""
+        task_id = task["id"]
+        state = task.get("status", {}).get("state", "submitted")
+        now = time.monotonic()
+        with self._lock:
+            self.metrics["puts"] += 1
+            self._unindex(task_id)
+            if self.compact_terminal and state in TERMINAL_STATES:
+                body = _pack(task)
+                self.metrics["compacted"] += 1
+            else:
+                body = task
+            self._entries[task_id] = (now, body)
+            self._entries.move_to_end(task_id)
+            session_id = task.get("sessionId")
+            self._keys[task_id] = (session_id, state)
+            if session_id is not None:
+                self._by_session.setdefault(session_id, set()).add(task_id)
+            self._by_state.setdefault(state, set()).add(task_id)
+            self._evict(now)
+    
+    def get(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            task = self._load(task_id, touch=True)
+            self.metrics["hits" if task is not None else "misses"] += 1
+            return task
+    
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            if task_id not in self._entries:
+                return False
+            self._remove(task_id)
+            return True
+    
+    def by_session(self, session_id: str) -> list[dict]:
+        """Every stored task in a session."""
+        with self._lock:
+            return self._load_all(self._by_session.get(session_id, ()))
+    
+    def by_state(self, state: str) -> list[dict]:
+        """Every stored task currently in `state`."""
+        with self._lock:
+            return self._load_all(self._by_state.get(state, ()))
+    
+    def stats(self) -> dict:
+        with self._lock:
+            packed = [body for _, body in self._entries.values() if isinstance(body, bytes)]
+            return {
+                **self.metrics,
+                "tasks": len(self._entries),
+                "packed_tasks": len(packed),
+                "packed_bytes": sum(map(len, packed)),
+                "sessions": len(self._by_session),
+                "by_state": {state: len(ids) for state, ids in self._by_state.items()},
+            }
+    
+    def close(self):
+        pass
+    
+    def _load(self, task_id: str, touch: bool) -> Optional[dict]:
+        entry = self._entries.get(task_id)
+        if entry is None:
+            return None
+        touched, body = entry
+        now = time.monotonic()
+        if self._expired(task_id, touched, now):
+            self._remove(task_id)
+            self.metrics["evicted_ttl"] += 1
+            return None
+        if touch:
+            self._entries[task_id] = (now, body)
+            self._entries.move_to_end(task_id)
+        return _unpack(body) if isinstance(body, bytes) else body
+    
+    def _load_all(self, task_ids) -> list[dict]:
+        tasks = [self._load(task_id, touch=False) for task_id in list(task_ids)]
+        return [task for task in tasks if task is not None]
+    
+    def _expired(self, task_id: str, touched: float, now: float) -> bool:
+        return now - touched > self.ttl_seconds and self._keys[task_id][1] in TERMINAL_STATES
+    
+    def _evict(self, now: float):
+        # Least recently touched first, so expired entries sit at the front.
+        # Each entry is looked at once at most, in case none can be dropped.
+        for _ in range(len(self._entries)):
+            task_id, (touched, body) = next(iter(self._entries.items()))
+            over_capacity = len(self._entries) > self.max_tasks
+            if not over_capacity and now - touched <= self.ttl_seconds:
+                break
+            if self._keys[task_id][1] not in TERMINAL_STATES:
+                # Still running: keep it, as if just touched
+                self.metrics["spared_unfinished"] += 1
+                self._entries[task_id] = (now, body)
+                self._entries.move_to_end(task_id)
+                continue
+            self.metrics["evicted_lru" if over_capacity else "evicted_ttl"] += 1
+            self._remove(task_id)
+    
+    def _remove(self, task_id: str):
+        del self._entries[task_id]
+        self._unindex(task_id)
+    
+    def _unindex(self, task_id: str):
+        keys = self._keys.pop(task_id, None)
+        if keys is None:
+            return
+        session_id, state = keys
+        for index, key in ((self._by_session, session_id), (self._by_state, state)):
+            ids = index.get(key)
+            if ids is not None:
+                ids.discard(task_id)
+                if not ids:
+                    del index[key]
+
+
+class SQLiteTaskStore:
+    """
+    Task store persisted in SQLite (WAL mode), indexed by sessionId and state.
+    
+    Rows older than `ttl_seconds` since their last update, and the least
+    recently updated rows beyond `max_tasks`, are deleted by a sweep that
+    runs every `sweep_every` writes. Terminal tasks are stored packed.
+    """
+    
+    def __init__(self, path: str, max_tasks: int = 100_000, ttl_seconds: float = 86_400.0,
+                 sweep_every: int = 256):
+        self.path = path
+        self.max_tasks = max_tasks
+        self.ttl_seconds = ttl_seconds
+        self.sweep_every = sweep_every
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.metrics = {"puts": 0, "hits": 0, "misses": 0, "evicted_lru": 0,
+                        "evicted_ttl": 0, "compacted": 0}
+        
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id TEXT PRIMARY KEY,
+                session_id TEXT,
+                state TEXT NOT NULL,
+                updated REAL NOT NULL,
+                packed INTEGER NOT NULL,
+                body BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS tasks_session ON tasks(session_id);
+            CREATE INDEX IF NOT EXISTS tasks_state ON tasks(state);
+            CREATE INDEX IF NOT EXISTS tasks_updated ON tasks(updated);
+        """)
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+    
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+    
+    def put(self, task: dict):
+        state = task.get("status", {}).get("state", "submitted")
+        packed = state in TERMINAL_STATES
+        body = _pack(task) if packed else json.dumps(task, separators=(",", ":"))
+        with self._lock:
+            self.metrics["puts"] += 1
+            self.metrics["compacted"] += packed
+            self._db.execute(
+                "INSERT INTO tasks (id, session_id, state, updated, packed, body) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET session_id=excluded.session_id, state=excluded.state, "
+                "updated=excluded.updated, packed=excluded.packed, body=excluded.body",
+                (task["id"], task.get("sessionId"), state, time.time(), packed, body)
+            )
+            self._writes += 1
+            if self._writes % self.sweep_every == 0:
+                self._sweep()
+    
+    def get(self, task_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT packed, body FROM tasks WHERE id = ? AND updated >= ?",
+                (task_id, time.time() - self.ttl_seconds)
+            ).fetchone()
+            self.metrics["hits" if row is not None else "misses"] += 1
+        return self._decode(row) if row is not None else None
+    
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            return self._db.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount > 0
+    
+    def by_session(self, session_id: str) -> list[dict]:
+        return self._select("session_id = ?", session_id)
+    
+    def by_state(self, state: str) -> list[dict]:
+        return self._select("state = ?", state)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            by_state = dict(self._db.execute("SELECT state, COUNT(*) FROM tasks GROUP BY state"))
+            page_size = self._db.execute("PRAGMA page_size").fetchone()[0]
+            pages = self._db.execute("PRAGMA page_count").fetchone()[0]
+        return {**self.metrics, "tasks": sum(by_state.values()), "by_state": by_state,
+                "db_bytes": page_size * pages}
+    
+    def sweep(self):
+        """Apply TTL and size limits now."""
+        with self._lock:
+            self._sweep()
+    
+    def close(self):
+        with self._lock:
+            self._db.close()
+    
+    def _sweep(self):
+        expired = self._db.execute("DELETE FROM tasks WHERE updated < ?",
+                                   (time.time() - self.ttl_seconds,)).rowcount
+        self.metrics["evicted_ttl"] += expired
+        excess = self._db.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] - self.max_tasks
+        if excess > 0:
+            self.metrics["evicted_lru"] += self._db.execute(
+                "DELETE FROM tasks WHERE id IN (SELECT id FROM tasks ORDER BY updated LIMIT ?)",
+                (excess,)
+            ).rowcount
+    
+    def _select(self, where: str, value: str) -> list[dict]:
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT packed, body FROM tasks WHERE {where} AND updated >= ? ORDER BY updated",
+                (value, time.time() - self.ttl_seconds)
+            ).fetchall()
+        return [self._decode(row) for row in rows]
+    
+    @staticmethod
+    def _decode(row) -> dict:
+        packed, body = row
+        return _unpack(body) if packed else json.loads(body)
+
+
+# =============================================================================
+# Transition Log
+# =============================================================================
+
+TASK_STATES = ("submitted", "working", "input_required", "completed", "failed", "canceled")
+STATE_CODES = {state: code for code, state in enumerate(TASK_STATES)}
+# state code, ms since the task's first transition, message offset, artifact offset
+_ENTRY = struct.Struct("<BQII")
+
+
+class _TaskLog:
+    __slots__ = ("started", "message_count", "states", "deltas", "messages", "artifacts",
+                 "spilled", "dropped")
+    
+    def __init__(self, started: float):
+        self.started = started
+        self.message_count = 0
+        self.states = array("B")
+        self.deltas = array("Q")  # 32-bit milliseconds would wrap after 49 days
+        self.messages = array("I")
+        self.artifacts = array("I")
+        self.spilled: list[tuple[int, int]] = []  # (file offset, entries), oldest first
+        self.dropped = 0
+    
+    def columns(self) -> tuple[array, array, array, array]:
+        return self.states, self.deltas, self.messages, self.artifacts
+
+
+class TransitionLog:
+    """
+    Append-only state transition history for every task.
+    
+    A transition is one row of four parallel arrays: a state code, the
+    milliseconds since the task's first transition, the running count
+    of messages added to the task, and the number of artifacts it had
+    at that point: 17 bytes instead of a status dict.
+    
+    At most `max_entries` rows per task stay in memory. When a task
+    exceeds that, its older half is appended to `spill_path` (and read
+    back by history()) or, without a spill file, dropped and counted.
+    Logs of the least recently used tasks beyond `max_tasks` are
+    forgotten. Once rows of forgotten logs make up more than half of the
+    spill file (and at least COMPACT_MIN_BYTES), the file is rewritten
+    with only the rows still referenced.
+    """
+    
+    COMPACT_MIN_BYTES = 64 * 1024
+    
+    def __init__(self, max_entries: int = 256, spill_path: Optional[str] = None,
+                 max_tasks: int = 10_000):
+        if max_entries < 2:
+            raise ValueError("max_entries must be at least 2")
+        self.max_entries = max_entries
+        self.max_tasks = max_tasks
+        self.spill_path = spill_path
+        self.counters = {"entries": 0, "spilled": 0, "dropped": 0, "forgotten_tasks": 0, "compactions": 0}
+        self._logs: OrderedDict[str, _TaskLog] = OrderedDict()
+        self._spill = open(spill_path, "a+b") if spill_path else None
+        # Whatever an earlier run left in the file is unreferenced
+        self._spill_size = self._spill.seek(0, os.SEEK_END) if self._spill else 0
+        self._dead_bytes = self._spill_size
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._logs)
+    
+    def record(self, task_id: str, state: str, messages_added: int = 0,
+               artifacts: int = 0, at: Optional[float] = None):
+        """Append a transition; `at` defaults to now (epoch seconds)."""
+        at = time.time() if at is None else at
+        with self._lock:
+            log = self._logs.get(task_id)
+            if log is None:
+                log = self._logs[task_id] = _TaskLog(at)
+                while len(self._logs) > self.max_tasks:
+                    self._release(self._logs.popitem(last=False)[1])
+                    self.counters["forgotten_tasks"] += 1
+            else:
+                self._logs.move_to_end(task_id)
+            log.message_count += messages_added
+            log.states.append(STATE_CODES[state])
+            log.deltas.append(max(0, int((at - log.started) * 1000)))
+            log.messages.append(log.message_count)
+            log.artifacts.append(artifacts)
+            self.counters["entries"] += 1
+            if len(log.states) > self.max_entries:
+                self._evict(log, len(log.states) - self.max_entries // 2)
+    
+    def history(self, task_id: str, limit: Optional[int] = None,
+                retained_messages: Optional[int] = None) -> list[dict]:
+        """
+        The task's transitions, oldest first; only the last `limit` if given.
+        
+        Each entry's messageOffset indexes the task's newest message at
+        that point within the last `retained_messages` messages (all of
+        them by default), or is None once that message has been trimmed.
+        """
+        with self._lock:
+            log = self._logs.get(task_id)
+            if log is None:
+                return []
+            if retained_messages is None:
+                retained_messages = log.message_count
+            first_retained = log.message_count - retained_messages
+            rows = list(zip(*log.columns()))
+            if limit is None or limit > len(rows):
+                spilled = []
+                for offset, count in log.spilled:
+                    self._spill.seek(offset)
+                    spilled.extend(_ENTRY.iter_unpack(self._spill.read(count * _ENTRY.size)))
+                rows = spilled + rows
+        if limit is not None:
+            rows = rows[-limit:] if limit > 0 else []
+        return [{
+            "state": TASK_STATES[state],
+            "timestamp": datetime.fromtimestamp(log.started + delta / 1000, timezone.utc).isoformat(),
+            "messageOffset": message - 1 - first_retained if message > first_retained else None,
+            "artifactCount": artifact
+        } for state, delta, message, artifact in rows]
+    
+    def count(self, task_id: str) -> int:
+        """Transitions recorded for the task, including spilled and dropped ones."""
+        with self._lock:
+            log = self._logs.get(task_id)
+            if log is None:
+                return 0
+            return len(log.states) + sum(n for _, n in log.spilled) + log.dropped
+    
+    def forget(self, task_id: str) -> bool:
+        with self._lock:
+            log = self._logs.pop(task_id, None)
+            if log is None:
+                return False
+            self._release(log)
+            return True
+    
+    def stats(self) -> dict:
+        with self._lock:
+            in_memory = sum(len(column) * column.itemsize
+                            for log in self._logs.values() for column in log.columns())
+            return {**self.counters, "tasks": len(self._logs), "bytes_in_memory": in_memory,
+                    "bytes_spilled": self._spill_size}
+    
+    def close(self):
+        with self._lock:
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+    
+    def _evict(self, log: _TaskLog, n: int):
+        if self._spill is not None:
+            data = b"".join(_ENTRY.pack(*row) for row in zip(*(c[:n] for c in log.columns())))
+            self._spill.seek(0, os.SEEK_END)
+            self._spill.write(data)
+            log.spilled.append((self._spill_size, n))
+            self._spill_size += len(data)
+            self.counters["spilled"] += n
+        else:
+            log.dropped += n
+            self.counters["dropped"] += n
+        for column in log.columns():
+            del column[:n]
+    
+    def _release(self, log: _TaskLog):
+        """Account for a forgotten log's spilled rows, compacting once they dominate the file."""
+        if not log.spilled or self._spill is None:
+            return
+        self._dead_bytes += sum(n for _, n in log.spilled) * _ENTRY.size
+        if self._dead_bytes >= self.COMPACT_MIN_BYTES and self._dead_bytes * 2 > self._spill_size:
+            self._compact()
+    
+    def _compact(self):
+        """Rewrite the spill file with only the rows of logs still kept."""
+        temp = self.spill_path + ".compact"
+        moved = []
+        with open(temp, "wb") as out:
+            for log in self._logs.values():
+                if not log.spilled:
+                    continue
+                offset = out.tell()
+                for start, count in log.spilled:
+                    self._spill.seek(start)
+                    out.write(self._spill.read(count * _ENTRY.size))
+                moved.append((log, [(offset, sum(n for _, n in log.spilled))]))
+        self._spill.close()
+        os.replace(temp, self.spill_path)
+        self._spill = open(self.spill_path, "a+b")
+        for log, spilled in moved:
+            log.spilled = spilled
+        self._spill_size = self._spill.seek(0, os.SEEK_END)
+        self._dead_bytes = 0
+        self.counters["compactions"] += 1
+
+
+# =============================================================================
+# Blob Store
+# =============================================================================
+
+BLOB_URI_PREFIX = "blob:sha256:"
+_DIGEST = re.compile(r"[0-9a-f]{64}")
+
+
+def blob_digest(uri: str) -> Optional[str]:
+    """The SHA-256 hex digest in a `blob:sha256:<hex>` URI, else None."""
+    if not uri.startswith(BLOB_URI_PREFIX):
+        return None
+    digest = uri[len(BLOB_URI_PREFIX):]
+    return digest if _DIGEST.fullmatch(digest) else None
+
+
+class BlobStore:
+    """
+    Content-addressed store for file attachments.
+    
+    A blob is named by the SHA-256 of its bytes, so a file attached to
+    many messages is stored once and the messages carry only its
+    `blob:sha256:<hex>` URI. Writes stream through a temporary file while
+    hashing and reads stream back in `chunk_size` pieces; no blob is ever
+    held in memory whole. Without a `root` a temporary directory is
+    created on first write.
+    """
+    
+    def __init__(self, root: Optional[str] = None, chunk_size: int = 64 * 1024):
+        self._root = root
+        self.chunk_size = chunk_size
+        self.counters = {"uploads": 0, "deduplicated": 0, "bytes_stored": 0}
+        self._lock = threading.Lock()
+    
+    @property
+    def root(self) -> str:
+        if self._root is None:
+            self._root = tempfile.mkdtemp(prefix="a2a-blobs-")
+        return self._root
+    
+    def path(self, digest: str) -> str:
+        if not _DIGEST.fullmatch(digest):
+            raise ValueError(f"Not a SHA-256 hex digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:])
+    
+    def size(self, digest: str) -> Optional[int]:
+        """Size in bytes, or None if the blob is not stored."""
+        try:
+            return os.path.getsize(self.path(digest))
+        except OSError:
+            return None
+    
+    def exists(self, digest: str) -> bool:
+        return self.size(digest) is not None
+    
+    def put_stream(self, chunks, expected: Optional[str] = None) -> tuple[str, int]:
+        """
+        Store the bytes of an iterable of chunks; returns (digest, size).
+        
+        Raises ValueError if `expected` is given and the content does not
+        hash to it.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        hasher = hashlib.sha256()
+        size = 0
+        fd, temp = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                for chunk in chunks:
+                    hasher.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            digest = hasher.hexdigest()
+            if expected is not None and expected != digest:
+                raise ValueError(f"Content hashes to {digest}, expected {expected}")
+            target = self.path(digest)
+            with self._lock:
+                self.counters["uploads"] += 1
+                if os.path.exists(target):
+                    self.counters["deduplicated"] += 1
+                else:
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(temp, target)
+                    temp = None
+                    self.counters["bytes_stored"] += size
+        finally:
+            if temp is not None:
+                os.unlink(temp)
+        return digest, size
+    
+    def put(self, data: bytes) -> tuple[str, int]:
+        return self.put_stream([data])
+    
+    def iter_chunks(self, digest: str) -> Iterator[bytes]:
+        """Stream a blob's bytes; raises FileNotFoundError if it is not stored."""
+        with open(self.path(digest), "rb") as f:
+            while chunk := f.read(self.chunk_size):
+                yield chunk
+    
+    def stats(self) -> dict:
+        blobs = sum(len(files) for _, _, files in os.walk(self.root)) if self._root else 0
+        return {**self.counters, "blobs": blobs}
+
+
+# JSON-RPC error codes
+INVALID_PARAMS = -32602
+TASK_NOT_FOUND = -32001
+TASK_NOT_CANCELABLE = -32002
+UNSUPPORTED_OPERATION = -32004
+SERVER_BUSY = -32010
+
+
+class A2AError(Exception):
+    """An error reported to the client with a specific JSON-RPC code."""
+    
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class _ArtifactAssembler:
+    """
+    Folds handler output into a task's artifacts.
+    
+    Text goes to the "response" artifact (index 0), one
+    TaskArtifactUpdateEvent per chunk with `append` set after the first;
+    data goes to a "data" artifact (index 1). `emit` is only called while
+    someone is subscribed to the task.
+    """
+    
+    def __init__(self, emit: Optional[Callable[[dict], None]]):
+        self.emit = emit
+        self.chunks: list[str] = []
+        self.data: Any = None
+        self.has_data = False
+        self.closed = False
+    
+    def feed(self, item, final: bool = False):
+        """Take a yielded str chunk or a {"text", "data"} result dict."""
+        if isinstance(item, str):
+            self._text(item, final)
+            return
+        if "text" in item or final:
+            self._text(item.get("text", ""), final)
+        if "data" in item:
+            self.data, self.has_data = item["data"], True
+            self._emit({"name": "data", "index": 1, "append": False, "lastChunk": True,
+                        "parts": [{"type": "data", "data": item["data"]}]})
+    
+    def finish(self) -> list[dict]:
+        """Close the response artifact and return the task's artifacts."""
+        if not self.closed:
+            # The last chunk is only known once the generator is exhausted
+            self._text("", True)
+        artifacts = [{
+            "name": "response",
+            "parts": [{"type": "text", "text": "".join(self.chunks)}]
+        }]
+        # Add data artifact if present
+        if self.has_data:
+            artifacts.append({
+                "name": "data",
+                "parts": [{"type": "data", "data": self.data}]
+            })
+        return artifacts
+    
+    def _text(self, chunk: str, last: bool):
+        parts = [{"type": "text", "text": chunk}] if chunk or not self.chunks else []
+        self._emit({"name": "response", "index": 0, "append": bool(self.chunks),
+                    "lastChunk": last, "parts": parts})
+        self.chunks.append(chunk)
+        self.closed = last
+    
+    def _emit(self, artifact: dict):
+        if self.emit is not None:
+            self.emit(artifact)
+
+
 class A2AAgentServer:
     """
     A simple A2A agent server implementation.
@@ -44,12 +837,66 @@ class A2AAgentServer:
     - Agent Card requests
     - Task sending
     - Task status queries
+    
+    Tasks live in a pluggable store (InMemoryTaskStore by default).
+    
+    tasks/send returns as soon as the task is accepted (state "submitted").
+    Skill handlers run on a background asyncio loop: coroutine handlers
+    directly, plain functions on a thread pool, at most `workers` at a
+    time. Once `max_queue` tasks are waiting, new sends are rejected with
+    SERVER_BUSY. tasks/cancel drops queued tasks and cancels running
+    coroutine handlers; a running thread handler is left to finish but
+    its result is discarded.
+    
+    Handlers that are (async) generators yield text chunks as they
+    produce them. tasks/sendSubscribe, served by handle_stream(), pushes
+    those chunks as TaskArtifactUpdateEvents together with every
+    TaskStatusUpdateEvent, so a client sees the first tokens long before
+    the task completes. A stream that sees no update for
+    `stream_idle_timeout` seconds ends with an error; the task keeps
+    running and can be polled with tasks/get.
+    
+    File parts are kept as references into `blobs`: a file sent inline
+    (base64 `bytes`) is moved into the store on arrival, and a
+    `blob:sha256:` URI must name a blob that was uploaded beforehand
+    (POST /blobs), so stored tasks stay small.
+    
+    Sending to a finished task continues it: the message is appended,
+    keeping the last `max_messages`. Every state change is recorded in
+    `history` (a TransitionLog); tasks/get returns it with
+    `includeStateHistory` (the last `stateHistoryLength` entries), and
+    `historyLength` limits the messages.
     """
     
-    def __init__(self, card: AgentCard):
+    def __init__(self, card: AgentCard, store=None,
+                 skill_keywords: Optional[dict[str, list[str]]] = None,
+                 workers: int = 4, max_queue: int = 64,
+                 blobs: Optional[BlobStore] = None,
+                 history: Optional[TransitionLog] = None, max_messages: int = 64,
+                 stream_idle_timeout: float = 300.0):
         self.card = card
-        self.tasks: dict[str, dict] = {}
+        self.tasks = store if store is not None else InMemoryTaskStore()
+        self.blobs = blobs if blobs is not None else BlobStore()
+        self.history = history if history is not None else TransitionLog()
+        self.max_messages = max_messages
+        self.stream_idle_timeout = stream_idle_timeout
+        self.skill_keywords = skill_keywords
+        self.skill_matcher = SkillMatcher(card.skills, skill_keywords)
         self.skill_handlers: dict[str, Callable] = {}
+        self._card_cache: Optional[tuple] = None  # (version, dict, JSON bytes, ETag)
+        
+        self.workers = workers
+        self.max_queue = max_queue
+        self.metrics = {"accepted": 0, "rejected_busy": 0, "completed": 0, "failed": 0, "canceled": 0}
+        self._inflight: dict[str, Future] = {}  # queued or running
+        self._subscribers: dict[str, list[queue.Queue]] = {}
+        self._state_lock = threading.RLock()
+        self._idle = threading.Condition(self._state_lock)  # notified when _inflight empties
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="skill")
+        self._slots = asyncio.Semaphore(workers)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="a2a-tasks", daemon=True).start()
         
         # Register default handlers
         self._register_default_handlers()
@@ -61,9 +908,44 @@ class A2AAgentServer:
             self.skill_handlers[skill.id] = self._default_handler
     
     def register_handler(self, skill_id: str, handler: Callable):
-        """Register a custom skill handler."""
+        """
+        Register a custom skill handler: handler(message, skill) -> dict.
+        
+        Handlers may be coroutine functions; blocking ones run on threads.
+        Generator handlers (sync or async) instead yield text chunks and,
+        optionally, a final {"data": ...} dict.
+        """
         self.skill_handlers[skill_id] = handler
     
+    def close(self):
+        """
+        Cancel outstanding tasks and stop the worker loop.
+        
+        Unfinished tasks move to canceled, which sends their streams the
+        final event; any other open stream gets its task's last status
+        marked final. New tasks are refused from here on.
+        """
+        with self._state_lock:
+            if self._closed:
+                return
+            self._closed = True
+            for task_id in list(self._inflight):
+                self._transition(task_id, "canceled", message="Agent server shut down")
+            for task_id in list(self._subscribers):
+                task = self.tasks.get(task_id)
+                status = task["status"] if task is not None else {"state": "canceled"}
+                self._publish(task_id, {"id": task_id, "status": status, "final": True})
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop)
+        self._executor.shutdown(wait=False)
+    
+    async def _shutdown(self):
+        """Cancel every task on the worker loop, let them unwind, then stop it."""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._loop.stop()
+    
     def _default_handler(self, message: str, skill: str) -> dict:
         """Default skill handler."""
         return {
@@ -71,14 +953,38 @@ class A2AAgentServer:
         }
     
     def get_agent_card(self) -> dict:
-        """Return the Agent Card."""
-        data = asdict(self.card)
-        return data
+        """Return the Agent Card (shared and cached: do not modify)."""
+        return self.encoded_card()[1]
+    
+    def encoded_card(self) -> tuple[str, dict, bytes, str]:
+        """
+        The card as (version, dict, JSON bytes, ETag), built once per
+        card version. Call invalidate_card() after changing the card in
+        place without bumping its version.
+        """
+        cached = self._card_cache
+        if cached is None or cached[0] != self.card.version:
+            data = asdict(self.card)
+            body = json.dumps(data).encode()
+            etag = f'"{self.card.version}-{hashlib.sha256(body).hexdigest()[:16]}"'
+            cached = self._card_cache = (self.card.version, data, body, etag)
+        return cached
     
-    def handle_request(self, request: dict) -> dict:
-        """Process incoming JSON-RPC request."""
+    def invalidate_card(self):
+        self._card_cache = None
+    
+    def handle_request(self, request):
+        """Process incoming JSON-RPC request, or a batch (list) of them."""
+        if isinstance(request, list):
+            if not request:
+                return self._error(None, -32600, "Empty batch")
+            return [self.handle_request(r) if isinstance(r, dict) else self._error(None, -32600, "Invalid request")
+                    for r in request]
+        if not isinstance(request, dict):
+            return self._error(None, -32600, "Invalid request")
+        
         method = request.get("method")
-        params = request.get("params", {})
+        params = request.get("params") or {}
         request_id = request.get("id")
         
         try:
@@ -90,6 +996,9 @@ class A2AAgentServer:
                 result = self._handle_task_get(params)
             elif method == "tasks/cancel":
                 result = self._handle_task_cancel(params)
+            elif method == "tasks/sendSubscribe":
+                return self._error(request_id, UNSUPPORTED_OPERATION,
+                                   "tasks/sendSubscribe streams events; use handle_stream()")
             else:
                 return self._error(request_id, -32601, f"Unknown method: {method}")
             
@@ -99,9 +1008,69 @@ class A2AAgentServer:
                 "id": request_id
             }
         
+        except A2AError as e:
+            return self._error(request_id, e.code, str(e))
         except Exception as e:
             return self._error(request_id, -32000, str(e))
     
+    def handle_stream(self, request: dict) -> Iterator[dict]:
+        """
+        Process a tasks/sendSubscribe request.
+        
+        Yields one JSON-RPC response per TaskStatusUpdateEvent or
+        TaskArtifactUpdateEvent, ending with the event marked `final`.
+        Other methods yield their single handle_request() response.
+        """
+        request_id = request.get("id")
+        if request.get("method") != "tasks/sendSubscribe":
+            yield self.handle_request(request)
+            return
+        
+        params = dict(request.get("params") or {})
+        params["id"] = task_id = params.get("id") or f"task_{uuid.uuid4().hex[:12]}"
+        events: queue.Queue = queue.Queue()
+        # Subscribe before submitting so no update can be missed
+        with self._state_lock:
+            self._subscribers.setdefault(task_id, []).append(events)
+        try:
+            try:
+                task = self._handle_task_send(params)
+            except A2AError as e:
+                yield self._error(request_id, e.code, str(e))
+                return
+            except Exception as e:
+                yield self._error(request_id, -32000, str(e))
+                return
+            
+            event = {"id": task_id, "status": task["status"],
+                     "final": task["status"]["state"] in TERMINAL_STATES}
+            while True:
+                yield {"jsonrpc": "2.0", "result": event, "id": request_id}
+                if event.get("final"):
+                    return
+                try:
+                    event = events.get(timeout=self.stream_idle_timeout)
+                except queue.Empty:
+                    yield self._error(request_id, -32000,
+                                      f"No update for {self.stream_idle_timeout}s; poll tasks/get for {task_id}")
+                    return
+        finally:
+            with self._state_lock:
+                subscribers = self._subscribers.get(task_id, [])
+                if events in subscribers:
+                    subscribers.remove(events)
+                if not subscribers:
+                    self._subscribers.pop(task_id, None)
+    
+    def _publish(self, task_id: str, event: dict):
+        for subscriber in tuple(self._subscribers.get(task_id, ())):
+            subscriber.put(event)
+    
+    def _assembler(self, task_id: str) -> _ArtifactAssembler:
+        if task_id not in self._subscribers:
+            return _ArtifactAssembler(None)
+        return _ArtifactAssembler(lambda artifact: self._publish(task_id, {"id": task_id, "artifact": artifact}))
+    
     def _handle_task_send(self, params: dict) -> dict:
         """Handle task send request."""
         task_id = params.get("id") or f"task_{uuid.uuid4().hex[:12]}"
@@ -117,60 +1086,188 @@ class A2AAgentServer:
         # Detect skill from message (simple keyword matching)
         detected_skill = self._detect_skill(user_text)
         
-        # Process with handler
         handler = self.skill_handlers.get(detected_skill, self._default_handler)
-        result = handler(user_text, detected_skill)
-        
-        # Store task
-        task = {
-            "id": task_id,
-            "sessionId": params.get("sessionId"),
-            "status": {"state": "completed"},
-            "messages": [message],
-            "artifacts": [
-                {
-                    "name": "response",
-                    "parts": [{"type": "text", "text": result.get("text", "")}]
-                }
-            ]
-        }
+        message = self._store_files(message)
         
-        # Add data artifact if present
-        if "data" in result:
-            task["artifacts"].append({
-                "name": "data",
-                "parts": [{"type": "data", "data": result["data"]}]
-            })
+        with self._state_lock:
+            existing = self.tasks.get(task_id)
+            if existing is not None and existing["status"]["state"] not in TERMINAL_STATES:
+                raise ValueError(f"Task is still {existing['status']['state']}: {task_id}")
+            if self._closed:
+                raise A2AError(SERVER_BUSY, "Server is shutting down")
+            if len(self._inflight) >= self.workers + self.max_queue:
+                self.metrics["rejected_busy"] += 1
+                raise A2AError(SERVER_BUSY, "Server busy: task queue is full, retry later")
+            
+            messages = [message]
+            session_id = params.get("sessionId")
+            if existing is not None:
+                # A finished task is continued, not replaced
+                messages = (existing.get("messages", []) + messages)[-self.max_messages:]
+                session_id = session_id or existing.get("sessionId")
+            task = {
+                "id": task_id,
+                "sessionId": session_id,
+                "status": {"state": "submitted"},
+                "messages": messages,
+                "artifacts": []
+            }
+            self.tasks.put(task)
+            self.history.record(task_id, "submitted", messages_added=1)
+            self.metrics["accepted"] += 1
+            future = asyncio.run_coroutine_threadsafe(
+                self._run(task_id, handler, user_text, detected_skill), self._loop)
+            self._inflight[task_id] = future
+        future.add_done_callback(lambda done: self._forget(task_id, done))
         
-        self.tasks[task_id] = task
+        if params.get("configuration", {}).get("blocking"):
+            try:
+                future.result()
+            except CancelledError:
+                pass
+            return self.tasks.get(task_id)
         return task
     
+    def _forget(self, task_id: str, future: Future):
+        """Drop a finished run from _inflight, unless the task has been resent since."""
+        with self._state_lock:
+            if self._inflight.get(task_id) is future:
+                del self._inflight[task_id]
+                if not self._inflight:
+                    self._idle.notify_all()
+    
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Block until no task is queued or running; False if `timeout` ran out first."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._inflight, timeout)
+    
+    def _store_files(self, message: dict) -> dict:
+        """Replace inline file bytes with blob references and check references exist."""
+        parts = message.get("parts", [])
+        if not any(part.get("type") == "file" for part in parts):
+            return message
+        
+        stored = []
+        for part in parts:
+            if part.get("type") != "file":
+                stored.append(part)
+                continue
+            file = dict(part.get("file") or {})
+            if "mimeType" in part:
+                file.setdefault("mimeType", part["mimeType"])
+            inline = file.pop("bytes", None) or part.get("data")
+            if inline is not None:
+                digest, size = self.blobs.put(base64.b64decode(inline))
+                file.update(uri=BLOB_URI_PREFIX + digest, size=size)
+            elif file.get("uri", "").startswith(BLOB_URI_PREFIX):
+                digest = blob_digest(file["uri"])
+                size = self.blobs.size(digest) if digest else None
+                if size is None:
+                    raise A2AError(INVALID_PARAMS, f"Unknown blob: {file['uri']}")
+                file["size"] = size
+            stored.append({"type": "file", "file": file})
+        return {**message, "parts": stored}
+    
+    async def _run(self, task_id: str, handler: Callable, text: str, skill: str):
+        """Run one task's handler once a worker slot is free."""
+        async with self._slots:
+            if not self._transition(task_id, "working"):
+                return  # canceled while queued
+            assembler = self._assembler(task_id)
+            try:
+                if inspect.isasyncgenfunction(handler):
+                    async for item in handler(text, skill):
+                        assembler.feed(item)
+                elif inspect.iscoroutinefunction(handler):
+                    assembler.feed(await handler(text, skill), final=True)
+                else:
+                    await self._loop.run_in_executor(
+                        self._executor, self._call_sync, task_id, handler, text, skill, assembler)
+            except Exception as e:
+                self._transition(task_id, "failed", message=str(e))
+            else:
+                self._transition(task_id, "completed", artifacts=assembler.finish())
+    
+    def _call_sync(self, task_id: str, handler: Callable, text: str, skill: str,
+                   assembler: _ArtifactAssembler):
+        """Run a plain or generator handler on a worker thread."""
+        result = handler(text, skill)
+        if not inspect.isgenerator(result):
+            assembler.feed(result, final=True)
+            return
+        for item in result:
+            if task_id not in self._inflight:
+                result.close()  # canceled: stop producing chunks
+                return
+            assembler.feed(item)
+    
+    def _transition(self, task_id: str, state: str, message: Optional[str] = None,
+                    artifacts: Optional[list] = None) -> bool:
+        """
+        Move a task to `state` unless it has already finished.
+        
+        Stored task dicts are replaced, never mutated, so a dict already
+        handed to a caller does not change under it.
+        """
+        with self._state_lock:
+            task = self.tasks.get(task_id)
+            if task is None or task["status"]["state"] in TERMINAL_STATES:
+                return False
+            status = {"state": state}
+            if message is not None:
+                status["message"] = message
+            updated = {**task, "status": status}
+            if artifacts is not None:
+                updated["artifacts"] = artifacts
+            self.tasks.put(updated)
+            self.history.record(task_id, state, artifacts=len(updated.get("artifacts", ())))
+            if state in self.metrics:
+                self.metrics[state] += 1
+            self._publish(task_id, {"id": task_id, "status": status, "final": state in TERMINAL_STATES})
+            return True
+    
     def _handle_task_get(self, params: dict) -> dict:
         """Handle task get request."""
         task_id = params.get("id")
         
-        if task_id not in self.tasks:
-            raise ValueError(f"Task not found: {task_id}")
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise A2AError(TASK_NOT_FOUND, f"Task not found: {task_id}")
         
-        return self.tasks[task_id]
+        history_length = params.get("historyLength")
+        if history_length is not None:
+            task = {**task, "messages": task.get("messages", [])[-history_length:] if history_length > 0 else []}
+        if params.get("includeStateHistory"):
+            task = {**task, "stateHistory": self.history.history(
+                task_id, params.get("stateHistoryLength"), retained_messages=len(task.get("messages", [])))}
+        return task
     
     def _handle_task_cancel(self, params: dict) -> dict:
         """Handle task cancel request."""
         task_id = params.get("id")
         
-        if task_id in self.tasks:
-            self.tasks[task_id]["status"] = {"state": "canceled"}
+        with self._state_lock:
+            task = self.tasks.get(task_id)
+            if task is None:
+                raise A2AError(TASK_NOT_FOUND, f"Task not found: {task_id}")
+            if not self._transition(task_id, "canceled"):
+                raise A2AError(TASK_NOT_CANCELABLE, f"Task is already {task['status']['state']}: {task_id}")
+            future = self._inflight.get(task_id)
+        if future is not None:
+            future.cancel()
         
         return {"id": task_id, "status": {"state": "canceled"}}
     
+    def rebuild_skill_matcher(self):
+        """Recompile skill detection after changing the card's skills."""
+        self.skill_matcher = SkillMatcher(self.card.skills, self.skill_keywords)
+        self.invalidate_card()
+    
     def _detect_skill(self, text: str) -> str:
-        """Simple skill detection based on keywords."""
-        text_lower = text.lower()
-        
-        for skill in self.card.skills:
-            # Check if skill name is mentioned
-            if skill.id in text_lower or skill.name.lower() in text_lower:
-                return skill.id
+        """Skill named (by id, name, keyword or tag) in the message."""
+        detected = self.skill_matcher.match(text)
+        if detected is not None:
+            return detected
         
         # Return first skill as default
         return self.card.skills[0].id if self.card.skills else "default"
@@ -184,26 +1281,173 @@ class A2AAgentServer:
         }
 
 
+# =============================================================================
+# HTTP transport
+# =============================================================================
+
+def serve_http(server: A2AAgentServer, host: str = "127.0.0.1", port: int = 8000,
+               card_max_age: int = 300):
+    """
+    Serve the agent over HTTP/1.1 on a background thread; returns the HTTP server.
+    
+    GET /.well-known/agent.json returns the card with an ETag and
+    `Cache-Control: max-age=card_max_age`; a matching If-None-Match gets
+    304 Not Modified. POST takes JSON-RPC.
+    tasks/sendSubscribe is answered with a text/event-stream, one `data:`
+    event per update, in chunked transfer encoding so the connection can
+    be reused once the final event has been sent.
+    
+    Blobs: HEAD /blobs/<sha256> tells a client whether an upload can be
+    skipped, POST /blobs streams a (chunked) upload into the store, and
+    GET /blobs/<sha256> streams it back. An `X-Content-SHA256` header on
+    the upload is checked against the content.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class A2AHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body are separate writes
+        
+        def do_GET(self):
+            if self.path.startswith("/blobs/"):
+                self._send_blob(self.path[len("/blobs/"):], with_body=True)
+                return
+            if self.path != "/.well-known/agent.json":
+                self.send_error(404)
+                return
+            _, _, body, etag = server.encoded_card()
+            not_modified = self.headers.get("If-None-Match") == etag
+            self.send_response(304 if not_modified else 200)
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", f"public, max-age={card_max_age}")
+            if not_modified:
+                self.end_headers()
+                return
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def do_HEAD(self):
+            if not self.path.startswith("/blobs/"):
+                self.send_error(404)
+                return
+            self._send_blob(self.path[len("/blobs/"):], with_body=False)
+        
+        def do_POST(self):
+            if self.path == "/blobs":
+                self._receive_blob()
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                request = json.loads(body)
+            except ValueError:
+                self._send_json(server._error(None, -32700, "Parse error"))
+                return
+            if isinstance(request, dict) and request.get("method") == "tasks/sendSubscribe":
+                self._send_events(server.handle_stream(request))
+            else:
+                self._send_json(server.handle_request(request))
+        
+        def _send_blob(self, digest: str, with_body: bool):
+            size = server.blobs.size(digest) if _DIGEST.fullmatch(digest) else None
+            if size is None:
+                self.send_error(404)
+                return
+            etag = f'"{digest}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(size))
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+            self.end_headers()
+            if with_body:
+                for chunk in server.blobs.iter_chunks(digest):
+                    self.wfile.write(chunk)
+        
+        def _receive_blob(self):
+            try:
+                digest, size = server.blobs.put_stream(self._body_chunks(), self.headers.get("X-Content-SHA256"))
+            except ValueError as e:
+                self.close_connection = True  # the rest of the body was not read
+                self._send_json({"error": str(e)}, status=400)
+                return
+            self._send_json({"uri": BLOB_URI_PREFIX + digest, "sha256": digest, "size": size}, status=201)
+        
+        def _body_chunks(self) -> Iterator[bytes]:
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                while size := int(self.rfile.readline().split(b";")[0], 16):
+                    yield self.rfile.read(size)
+                    self.rfile.readline()
+                self.rfile.readline()
+                return
+            remaining = int(self.headers.get("Content-Length", 0))
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, server.blobs.chunk_size))
+                if not chunk:
+                    raise ValueError("Upload ended early")
+                remaining -= len(chunk)
+                yield chunk
+        
+        def _send_json(self, payload: dict, status: int = 200):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def _send_events(self, responses: Iterator[dict]):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for response in responses:
+                    event = f"data: {json.dumps(response)}\n\n".encode()
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                responses.close()  # client went away: drop the subscription
+                self.close_connection = True
+        
+        def log_message(self, *args):
+            pass
+    
+    httpd = ThreadingHTTPServer((host, port), A2AHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
 # =============================================================================
 # Example: Weather Agent
 # =============================================================================
 
-def create_weather_agent() -> A2AAgentServer:
-    """Create a weather information agent."""
+def create_weather_agent(**options) -> A2AAgentServer:
+    """Create a weather information agent; `options` go to A2AAgentServer."""
     
     card = AgentCard(
         name="Weather Agent",
         description="Provides weather information and forecasts",
         url="https://weather.example.com/a2a",
-        capabilities={"streaming": False, "pushNotifications": False},
+        capabilities={"streaming": True, "pushNotifications": False, "stateTransitionHistory": True},
         skills=[
-            Skill("current_weather", "Current Weather", "Get current weather for a city"),
-            Skill("forecast", "Weather Forecast", "Get weather forecast for upcoming days"),
-            Skill("alerts", "Weather Alerts", "Get active weather alerts")
+            Skill("current_weather", "Current Weather", "Get current weather for a city",
+                  tags=["temperature", "humidity"]),
+            Skill("forecast", "Weather Forecast", "Get weather forecast for upcoming days",
+                  tags=["tomorrow", "weekend"]),
+            Skill("alerts", "Weather Alerts", "Get active weather alerts",
+                  tags=["storm", "warning"])
         ]
     )
     
-    server = A2AAgentServer(card)
+    server = A2AAgentServer(card, **options)
     
     # Custom handlers
     def handle_current_weather(message: str, skill: str) -> dict:
@@ -219,18 +1463,17 @@ def create_weather_agent() -> A2AAgentServer:
             }
         }
     
-    def handle_forecast(message: str, skill: str) -> dict:
-        return {
-            "text": "3-day forecast for San Francisco:\n- Today: 72°F, Partly Cloudy\n- Tomorrow: 68°F, Sunny\n- Day 3: 70°F, Sunny",
-            "data": {
-                "city": "San Francisco",
-                "forecast": [
-                    {"day": "Today", "high": 72, "condition": "Partly Cloudy"},
-                    {"day": "Tomorrow", "high": 68, "condition": "Sunny"},
-                    {"day": "Day 3", "high": 70, "condition": "Sunny"}
-                ]
-            }
-        }
+    def handle_forecast(message: str, skill: str):
+        # Streams one line per day as it is "looked up"
+        forecast = [
+            {"day": "Today", "high": 72, "condition": "Partly Cloudy"},
+            {"day": "Tomorrow", "high": 68, "condition": "Sunny"},
+            {"day": "Day 3", "high": 70, "condition": "Sunny"}
+        ]
+        yield "3-day forecast for San Francisco:"
+        for day in forecast:
+            yield f"\n- {day['day']}: {day['high']}°F, {day['condition']}"
+        yield {"data": {"city": "San Francisco", "forecast": forecast}}
     
     def handle_alerts(message: str, skill: str) -> dict:
         return {
@@ -249,6 +1492,29 @@ def create_weather_agent() -> A2AAgentServer:
 # Demo
 # =============================================================================
 
+def wait_for_task(server: A2AAgentServer, task_id: str, timeout: float = 5.0,
+                  interval: float = 0.01) -> dict:
+    """Poll tasks/get until the task reaches a terminal state."""
+    deadline = time.monotonic() + timeout
+    while True:
+        task = server.handle_request({
+            "jsonrpc": "2.0", "method": "tasks/get", "params": {"id": task_id}, "id": "poll"
+        })["result"]
+        if task["status"]["state"] in TERMINAL_STATES or time.monotonic() >= deadline:
+            return task
+        time.sleep(interval)
+
+
+def describe_event(event: dict) -> str:
+    """One-line summary of a TaskStatusUpdateEvent or TaskArtifactUpdateEvent."""
+    if "status" in event:
+        return f"status   {event['status']['state']}{' (final)' if event.get('final') else ''}"
+    artifact = event["artifact"]
+    parts = [part.get("text", part.get("data")) for part in artifact["parts"]]
+    flags = ("append " if artifact["append"] else "") + ("lastChunk" if artifact["lastChunk"] else "")
+    return f"artifact {artifact['name']:<8} {json.dumps(parts, ensure_ascii=False)[:60]}  {flags}".rstrip()
+
+
 def run_demo():
     """Demonstrate A2A agent server."""
     
@@ -284,8 +1550,10 @@ def run_demo():
     print(json.dumps(request, indent=2))
     
     response = server.handle_request(request)
-    print("\nResponse:")
+    print("\nResponse (accepted, runs in the background):")
     print(json.dumps(response, indent=2))
+    print("\nAfter polling tasks/get:")
+    print(json.dumps(wait_for_task(server, response["result"]["id"]), indent=2))
     
     # 3. Forecast request
     print("\n" + "=" * 70)
@@ -304,8 +1572,9 @@ def run_demo():
         "id": 2
     }
     response = server.handle_request(request)
-    print("Response:")
-    print(json.dumps(response, indent=2))
+    print(f"Accepted: {response['result']['status']['state']}")
+    print("Result:")
+    print(json.dumps(wait_for_task(server, response["result"]["id"]), indent=2))
     
     # 4. Get task status
     print("\n" + "=" * 70)
@@ -322,9 +1591,297 @@ def run_demo():
     response = server.handle_request(request)
     print(f"Task {task_id} status: {response['result']['status']['state']}")
     
+    # 5. Skill detection
+    print("\n" + "=" * 70)
+    print("🧭 Skill Detection")
+    print("-" * 50)
+    for text in ["Any storm warning tonight?", "Will it rain this weekend?",
+                 "Show the weather forecast", "forecasters say hello"]:
+        print(f"  {text!r:<32} → {server._detect_skill(text)}")
+    
+    # 6. Task store: bounded, indexed by session and state
+    print("\n" + "=" * 70)
+    print("🗄️  Task Store")
+    print("-" * 50)
+    for i in range(5):
+        server.handle_request({
+            "jsonrpc": "2.0",
+            "method": "tasks/send",
+            "params": {
+                "sessionId": "session-42",
+                "configuration": {"blocking": True},
+                "message": {"role": "user", "parts": [{"type": "text", "text": f"Any alerts? ({i})"}]}
+            },
+            "id": 10 + i
+        })
+    print(f"Tasks in session-42: {len(server.tasks.by_session('session-42'))}")
+    print(f"Completed tasks: {len(server.tasks.by_state('completed'))}")
+    print(f"In-memory stats: {server.tasks.stats()}")
+    
+    with tempfile.TemporaryDirectory() as root:
+        store = SQLiteTaskStore(f"{root}/tasks.db", max_tasks=3, sweep_every=1)
+        durable = A2AAgentServer(server.card, store=store)
+        for i in range(5):
+            durable.handle_request({
+                "jsonrpc": "2.0",
+                "method": "tasks/send",
+                "params": {"sessionId": "s1", "configuration": {"blocking": True}, "message": {"role": "user", "parts": [
+                    {"type": "text", "text": f"forecast {i}"}]}},
+                "id": 20 + i
+            })
+        print(f"SQLite stats (max_tasks=3): {store.stats()}")
+        durable.close()
+        store.close()
+    
+    # 7. Worker pool: queueing, admission control and cancellation
+    print("\n" + "=" * 70)
+    print("⚙️  Worker Pool (workers=1, max_queue=1)")
+    print("-" * 50)
+    release = threading.Event()
+    
+    def slow_report(text: str, skill: str) -> dict:
+        release.wait(5)
+        return {"text": "Slow report ready."}
+    
+    async def slow_summary(text: str, skill: str) -> dict:
+        await asyncio.sleep(5)
+        return {"text": "Never reached: canceled first."}
+    
+    busy = A2AAgentServer(server.card, workers=1, max_queue=1)
+    busy.register_handler("current_weather", slow_report)
+    busy.register_handler("forecast", slow_summary)
+    
+    def send(text: str, request_id: int) -> dict:
+        return busy.handle_request({
+            "jsonrpc": "2.0",
+            "method": "tasks/send",
+            "params": {"message": {"role": "user", "parts": [{"type": "text", "text": text}]}},
+            "id": request_id
+        })
+    
+    first = send("current weather please", 30)["result"]["id"]
+    second = send("forecast please", 31)["result"]["id"]
+    time.sleep(0.05)
+    print(f"Running: {busy.tasks.get(first)['status']['state']}, "
+          f"queued: {busy.tasks.get(second)['status']['state']}")
+    print(f"Third send while full: {send('current weather again', 32)['error']}")
+    
+    cancel = busy.handle_request({"jsonrpc": "2.0", "method": "tasks/cancel", "params": {"id": second}, "id": 33})
+    print(f"Cancel queued task: {cancel['result']['status']['state']}")
+    release.set()
+    print(f"First task: {wait_for_task(busy, first)['status']['state']}")
+    again = busy.handle_request({"jsonrpc": "2.0", "method": "tasks/cancel", "params": {"id": first}, "id": 34})
+    print(f"Cancel finished task: {again['error']}")
+    print(f"Pool metrics: {busy.metrics}")
+    busy.close()
+    
+    # 8. Streaming: events in-process, then as SSE over HTTP
+    print("\n" + "=" * 70)
+    print("📡 Streaming (tasks/sendSubscribe)")
+    print("-" * 50)
+    request = {
+        "jsonrpc": "2.0",
+        "method": "tasks/sendSubscribe",
+        "params": {"message": {"role": "user", "parts": [{"type": "text", "text": "Give me the forecast"}]}},
+        "id": 40
+    }
+    for response in server.handle_stream(request):
+        print(f"  {describe_event(response['result'])}")
+    
+    def slow_tokens(text: str, skill: str):
+        for word in "Sunny skies all week with highs near 70.".split():
+            time.sleep(0.05)  # pretend each token takes a while to generate
+            yield word + " "
+    
+    streaming = A2AAgentServer(server.card)
+    streaming.register_handler("forecast", slow_tokens)
+    httpd = serve_http(streaming, port=0)
+    url = f"http://127.0.0.1:{httpd.server_address[1]}/"
+    print(f"\nPOST {url} (text/event-stream):")
+    started = time.perf_counter()
+    http_request = urllib.request.Request(url, data=json.dumps(request).encode(),
+                                          headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(http_request) as http_response:
+        for line in http_response:
+            if line.startswith(b"data: "):
+                event = json.loads(line[len(b"data: "):])["result"]
+                print(f"  {(time.perf_counter() - started) * 1000:5.0f} ms  {describe_event(event)}")
+    httpd.shutdown()
+    streaming.close()
+    
+    # 9. File attachments: blob references instead of inline base64
+    print("\n" + "=" * 70)
+    print("📎 File Attachments (content-addressed blobs)")
+    print("-" * 50)
+    report = ("Hourly readings for San Francisco\n" * 2000).encode()
+    inline = {"type": "file", "file": {"name": "readings.txt", "mimeType": "text/plain",
+                                       "bytes": base64.b64encode(report).decode()}}
+    for i in range(2):
+        response = server.handle_request({
+            "jsonrpc": "2.0",
+            "method": "tasks/send",
+            "params": {"configuration": {"blocking": True}, "message": {"role": "user", "parts": [
+                {"type": "text", "text": "Summarize these readings"}, inline]}},
+            "id": 50 + i
+        })
+    stored = response["result"]["messages"][0]["parts"][1]
+    print(f"Inline upload of {len(report)} bytes (base64 {len(inline['file']['bytes'])}) is stored as:")
+    print(f"  {json.dumps(stored)}")
+    print(f"Stored task size: {len(json.dumps(response['result']))} bytes")
+    
+    httpd = serve_http(server, port=0)
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+    digest = hashlib.sha256(report).hexdigest()
+    head = urllib.request.Request(f"{base}/blobs/{digest}", method="HEAD")
+    with urllib.request.urlopen(head) as http_response:
+        print(f"HEAD /blobs/{digest[:12]}…: {http_response.status}, already stored (skip upload)")
+    
+    chunks = (report[i:i + 16384] for i in range(0, len(report), 16384))
+    upload = urllib.request.Request(f"{base}/blobs", data=chunks, method="POST",
+                                    headers={"Content-Type": "application/octet-stream", "X-Content-SHA256": digest})
+    with urllib.request.urlopen(upload) as http_response:
+        print(f"POST /blobs (chunked) → {http_response.status} {json.loads(http_response.read())}")
+    with urllib.request.urlopen(f"{base}/blobs/{digest}") as http_response:
+        hasher = hashlib.sha256()
+        for chunk in iter(lambda: http_response.read(16384), b""):
+            hasher.update(chunk)
+        print(f"GET /blobs/{digest[:12]}… streamed back, hash matches: {hasher.hexdigest() == digest}")
+    httpd.shutdown()
+    
+    response = server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "tasks/send",
+        "params": {"message": {"role": "user", "parts": [
+            {"type": "file", "file": {"uri": BLOB_URI_PREFIX + "0" * 64, "mimeType": "text/plain"}}]}},
+        "id": 52
+    })
+    print(f"Reference to a missing blob: {response['error']}")
+    print(f"Blob store: {server.blobs.stats()}")
+    
+    # 10. Agent Card over HTTP: cached encoding, conditional GET
+    print("\n" + "=" * 70)
+    print("📇 Agent Card caching")
+    print("-" * 50)
+    httpd = serve_http(server, port=0)
+    card_url = f"http://127.0.0.1:{httpd.server_address[1]}/.well-known/agent.json"
+    with urllib.request.urlopen(card_url) as http_response:
+        etag = http_response.headers["ETag"]
+        print(f"GET  → {http_response.status}, {len(http_response.read())} bytes, ETag {etag}, "
+              f"Cache-Control: {http_response.headers['Cache-Control']}")
+    try:
+        urllib.request.urlopen(urllib.request.Request(card_url, headers={"If-None-Match": etag}))
+    except urllib.error.HTTPError as e:  # urllib reports 304 as an error
+        print(f"GET with If-None-Match → {e.code} Not Modified, no body")
+    server.card.version = "1.0.1"
+    with urllib.request.urlopen(urllib.request.Request(card_url, headers={"If-None-Match": etag})) as http_response:
+        print(f"After a version bump → {http_response.status}, new ETag {http_response.headers['ETag']}")
+    httpd.shutdown()
+    
+    started = time.perf_counter()
+    for _ in range(10_000):
+        asdict(server.card)
+    uncached = time.perf_counter() - started
+    started = time.perf_counter()
+    for _ in range(10_000):
+        server.get_agent_card()
+    print(f"agent/info card ×10k: asdict {uncached * 1000:.1f} ms, cached {(time.perf_counter() - started) * 1000:.1f} ms")
+    server.close()
+    
+    # 11. State transition history for a long conversation
+    print("\n" + "=" * 70)
+    print("🕰️  State Transition History")
+    print("-" * 50)
+    with tempfile.TemporaryDirectory() as root:
+        history = TransitionLog(max_entries=64, spill_path=f"{root}/transitions.log")
+        chat = A2AAgentServer(server.card, history=history, max_messages=16)
+        for turn in range(500):
+            chat.handle_request({
+                "jsonrpc": "2.0",
+                "method": "tasks/send",
+                "params": {"id": "conversation-1", "sessionId": "s-1", "configuration": {"blocking": True},
+                           "message": {"role": "user", "parts": [{"type": "text", "text": f"weather, turn {turn}"}]}},
+                "id": turn
+            })
+        task = chat.handle_request({
+            "jsonrpc": "2.0",
+            "method": "tasks/get",
+            "params": {"id": "conversation-1", "historyLength": 2, "includeStateHistory": True,
+                       "stateHistoryLength": 3},
+            "id": "history"
+        })["result"]
+        print(f"500 turns: {history.count('conversation-1')} transitions, "
+              f"{len(chat.tasks.get('conversation-1')['messages'])} messages kept, {len(task['messages'])} returned")
+        for entry in task["stateHistory"]:
+            print(f"  {entry['timestamp'][11:23]}  {entry['state']:<10} messages[{entry['messageOffset']}] "
+                  f"of those returned")
+        started = time.perf_counter()
+        full = history.history("conversation-1", retained_messages=16)
+        kept = [entry for entry in full if entry["messageOffset"] is not None]
+        print(f"Full history: {len(full)} entries, {len(kept)} pointing at kept messages (the first at "
+              f"messages[{kept[0]['messageOffset']}]) in {(time.perf_counter() - started) * 1000:.2f} ms")
+        print(f"Log stats: {history.stats()}")
+        chat.close()
+        history.close()
+    
     print("\n" + "=" * 70)
     print("✅ A2A agent server demo complete!")
 
 
+# =============================================================================
+# Benchmark: skill detection
+# =============================================================================
+
+def _legacy_detect_skill(skills: list[Skill], text: str) -> str:
+    """The original per-skill substring loop, kept as the benchmark baseline."""
+    text_lower = text.lower()
+    for skill in skills:
+        if skill.id in text_lower or skill.name.lower() in text_lower:
+            return skill.id
+    return skills[0].id if skills else "default"
+
+
+def benchmark_skill_detection(skill_counts: list[int], messages: int = 2000):
+    """Time the substring loop against the compiled matcher as skills grow."""
+    rng = random.Random(7)
+    vocabulary = [f"{a}{b}" for a in ("geo", "fin", "doc", "med", "ops", "ads", "law", "hr")
+                  for b in ("scan", "sync", "plan", "rank", "fix", "lint", "tag", "map", "sum", "ask")]
+    filler = "please could you take a look at this for me when you have a moment".split()
+    
+    print("=" * 70)
+    print(f"Skill detection benchmark ({messages} messages of ~30 words)")
+    print("=" * 70)
+    print(f"{'skills':>8}{'loop':>12}{'compiled':>12}{'speedup':>10}{'build':>10}{'loop right':>12}")
+    
+    for count in skill_counts:
+        skills = [Skill(f"{rng.choice(vocabulary)}_{i}", f"{rng.choice(vocabulary)} task {i}", "",
+                        tags=[f"{rng.choice(vocabulary)}{i}"]) for i in range(count)]
+        texts, wanted = [], []
+        for _ in range(messages):
+            words = [rng.choice(filler) for _ in range(30)]
+            skill = rng.choice(skills)
+            words[rng.randrange(30)] = skill.id  # ask for one skill by id
+            texts.append(" ".join(words))
+            wanted.append(skill.id)
+        
+        started = time.perf_counter()
+        matcher = SkillMatcher(skills)
+        build = time.perf_counter() - started
+        
+        started = time.perf_counter()
+        expected = [_legacy_detect_skill(skills, text) for text in texts]
+        loop = time.perf_counter() - started
+        started = time.perf_counter()
+        found = [matcher.match(text) for text in texts]
+        compiled = time.perf_counter() - started
+        
+        # Substrings let the loop pick e.g. ops_1 for "ops_12"; word boundaries don't
+        assert found == wanted, "matcher missed the requested skill"
+        right = sum(a == b for a, b in zip(expected, wanted)) / messages
+        print(f"{count:>8}{loop:>11.3f}s{compiled:>11.3f}s{loop / compiled:>9.1f}x{build:>9.3f}s{right:>11.1%}")
+
+
 if __name__ == "__main__":
-    run_demo()
+    if sys.argv[1:2] == ["--bench-skills"]:
+        benchmark_skill_detection([int(arg) for arg in sys.argv[2:]] or [10, 100, 1000, 5000])
+    else:
+        run_demo()
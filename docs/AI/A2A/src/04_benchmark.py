@@ -0,0 +1,465 @@
+"""
+A2A Example 04: Benchmark
+=========================
+Measure how much traffic the example agent server (03) can take.
+
+This example shows:
+1. Synthetic send/get/cancel mixes with chosen message sizes
+2. Agents with a few or many skills (skill detection cost)
+3. Driving the server in-process, over plain HTTP, or through the client
+   transport from 02 (pooled keep-alive connections, JSON-RPC batches)
+   at a chosen concurrency
+4. Reporting requests/second, latency percentiles, tracemalloc
+   allocations and task-store growth
+5. Saving a baseline and comparing later runs against it
+
+Usage:
+    python 04_benchmark.py                        # short demo run
+    python 04_benchmark.py --transport inproc http client batch --concurrency 1 8 \\
+        --skills 3 1000 --message-bytes 64 4096 --requests 5000 --save baseline.json
+    python 04_benchmark.py --mix send=1 --no-blocking --compare baseline.json
+"""
+
+import argparse
+import asyncio
+import http.client
+import importlib.util
+import json
+import platform
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+
+SRC_DIR = Path(__file__).resolve().parent
+
+
+def _load_example(filename: str):
+    spec = importlib.util.spec_from_file_location(f"example_{Path(filename).stem}", SRC_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+agent = _load_example("03_agent_server.py")
+task_client = _load_example("02_task_client.py")
+
+
+# =============================================================================
+# Workloads
+# =============================================================================
+
+DEFAULT_MIX = {"send": 0.6, "get": 0.3, "cancel": 0.1}
+WORDS = "please check the latest conditions for our office and report back soon".split()
+
+
+def create_agent(skills: int = 3, **options):
+    """The weather agent, padded with synthetic skills up to `skills`."""
+    server = agent.create_weather_agent(**options)
+    for i in range(len(server.card.skills), skills):
+        server.card.skills.append(agent.Skill(f"skill_{i}", f"Synthetic Skill {i}", "Benchmark filler",
+                                              tags=[f"topic{i}"]))
+    server.rebuild_skill_matcher()
+    return server
+
+
+def synthetic_workload(count: int, mix: dict[str, float] = DEFAULT_MIX, message_bytes: int = 64,
+                       skills: int = 3, blocking: bool = True, seed: int = 0) -> list[dict]:
+    """
+    Draw `count` requests from a weighted send/get/cancel mix.
+
+    Sends get fresh task ids and a message of about `message_bytes`
+    naming a random skill. Gets and cancels refer to a task sent
+    earlier in the list (a send if there is none yet).
+    """
+    rng = random.Random(seed)
+    kinds, weights = zip(*mix.items())
+    skill_names = ["forecast", "alerts", "current weather"] + [f"topic{i}" for i in range(3, skills)]
+    filler = " ".join(rng.choice(WORDS) for _ in range(message_bytes // 5 + 1))
+    sent: list[str] = []
+    requests = []
+    for i in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        if kind == "send" or not sent:
+            task_id = f"bench-{seed}-{i}"
+            sent.append(task_id)
+            text = f"{filler[:max(0, message_bytes - 20)]} {rng.choice(skill_names)}"
+            params = {"id": task_id, "message": {"role": "user", "parts": [{"type": "text", "text": text}]}}
+            if blocking:
+                params["configuration"] = {"blocking": True}
+            requests.append({"jsonrpc": "2.0", "method": "tasks/send", "params": params})
+        else:
+            method = "tasks/get" if kind == "get" else "tasks/cancel"
+            requests.append({"jsonrpc": "2.0", "method": method, "params": {"id": rng.choice(sent)}})
+    return requests
+
+
+# =============================================================================
+# Targets
+# =============================================================================
+
+class InProcessTarget:
+    """Calls A2AAgentServer.handle_request directly."""
+
+    transport = "inproc"
+
+    def __init__(self, server, concurrency: int = 1):
+        self.server = server
+
+    def send(self, request: dict) -> dict:
+        return self.server.handle_request(request)
+
+    def close(self):
+        pass
+
+
+class HttpTarget:
+    """POSTs JSON-RPC to serve_http() over one keep-alive connection per thread."""
+
+    transport = "http"
+
+    def __init__(self, server, concurrency: int = 1):
+        self.httpd = agent.serve_http(server, port=0)
+        self.address = self.httpd.server_address
+        self._local = threading.local()
+
+    def send(self, request: dict) -> dict:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(*self.address)
+        body = json.dumps(request)
+        try:
+            connection.request("POST", "/", body, {"Content-Type": "application/json"})
+            return json.loads(connection.getresponse().read())
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            self._local.connection = None
+            return {"error": {"code": "transport"}}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class ClientTarget(HttpTarget):
+    """
+    Sends through A2AClient and AsyncA2ATransport (02), as an agent
+    calling another agent would: one keep-alive connection pool sized to
+    the concurrency, with the transport's retries and stats.
+    """
+
+    transport = "client"
+
+    def __init__(self, server, concurrency: int = 1):
+        super().__init__(server)
+        host, port = self.address[:2]
+        self.pool = task_client.AsyncA2ATransport(max_connections=concurrency)
+        self.client = task_client.A2AClient(f"http://{host}:{port}/", self.pool)
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="bench-client", daemon=True).start()
+
+    def send(self, request: dict) -> dict:
+        return asyncio.run_coroutine_threadsafe(self._send(request), self._loop).result()
+
+    async def _send(self, request: dict) -> dict:
+        try:
+            return await self.client.call(request)
+        except task_client.TransportError:
+            return {"error": {"code": "transport"}}
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self.pool.close(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        super().close()
+
+
+class BatchTarget(ClientTarget):
+    """
+    Like ClientTarget, but requests that arrive while a batch is in
+    flight are queued and go out together as the next JSON-RPC batch.
+    """
+
+    transport = "batch"
+
+    def __init__(self, server, concurrency: int = 1):
+        super().__init__(server, concurrency)
+        self._queue: list[tuple[dict, asyncio.Future]] = []
+        self._flushing = False
+
+    async def _send(self, request: dict) -> dict:
+        reply = self._loop.create_future()
+        self._queue.append((request, reply))
+        if not self._flushing:
+            self._flushing = True
+            self._loop.create_task(self._flush())
+        return await reply
+
+    async def _flush(self):
+        while self._queue:
+            batch, self._queue = self._queue, []
+            try:
+                replies = await self.client.call([request for request, _ in batch])
+            except task_client.TransportError:
+                replies = []
+            by_id = {reply.get("id"): reply for reply in replies} if isinstance(replies, list) else {}
+            for request, reply in batch:
+                reply.set_result(by_id.get(request["id"], {"error": {"code": "transport"}}))
+        self._flushing = False
+
+
+TARGETS = {"inproc": InProcessTarget, "http": HttpTarget, "client": ClientTarget, "batch": BatchTarget}
+
+
+# =============================================================================
+# Measurement
+# =============================================================================
+
+def _percentile(samples: list[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def replay(send: Callable[[dict], dict], requests: list[dict], concurrency: int = 1) -> dict:
+    """Send every request, `concurrency` at a time, and summarize latencies and outcomes."""
+    latencies: list[float] = []
+    outcomes: dict[str, int] = {}
+    lock = threading.Lock()
+    pending = iter(enumerate(requests, start=1))
+
+    def worker():
+        local, seen = [], {}
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                break
+            request_id, request = item
+            started = time.perf_counter()
+            response = send({**request, "id": request_id})
+            local.append(time.perf_counter() - started)
+            outcome = str(response["error"]["code"]) if "error" in response else "ok"
+            seen[outcome] = seen.get(outcome, 0) + 1
+        with lock:
+            latencies.extend(local)
+            for outcome, n in seen.items():
+                outcomes[outcome] = outcomes.get(outcome, 0) + n
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "outcomes": dict(sorted(outcomes.items())),
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def store_growth(server, requests: int) -> dict:
+    """What the run left behind in the task store and transition log."""
+    server.wait_idle(timeout=10.0)  # background tasks finish, so the numbers are final
+    store = server.tasks.stats()
+    history = server.history.stats()
+    return {
+        "tasks": len(server.tasks),
+        "packed_tasks": store.get("packed_tasks", 0),
+        "packed_bytes": store.get("packed_bytes", 0),
+        "history_entries": history["entries"],
+        "history_bytes": history["bytes_in_memory"],
+        "history_bytes_per_request": round(history["bytes_in_memory"] / max(requests, 1), 1),
+    }
+
+
+def traced_allocations(requests: list[dict], skills: int) -> dict:
+    """tracemalloc figures while one fresh in-process server handles the requests."""
+    tracemalloc.start()
+    try:
+        server = create_agent(skills, max_queue=len(requests))
+        baseline, _ = tracemalloc.get_traced_memory()
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        for request_id, request in enumerate(requests, start=1):
+            server.handle_request({**request, "id": request_id})
+        server.wait_idle(timeout=10.0)
+        current, peak = tracemalloc.get_traced_memory()
+        growth = tracemalloc.take_snapshot().compare_to(before, "filename")
+        server.close()
+    finally:
+        tracemalloc.stop()
+    blocks = sum(stat.count_diff for stat in growth)
+    return {
+        "retained_kb": (current - baseline) // 1024,
+        "peak_kb": (peak - baseline) // 1024,
+        "retained_blocks": blocks,
+        "blocks_per_request": round(blocks / max(len(requests), 1), 1),
+    }
+
+
+def run_benchmark(transports: list[str], concurrencies: list[int], skill_counts: list[int],
+                  message_sizes: list[int], requests: int, mix: dict[str, float] = DEFAULT_MIX,
+                  blocking: bool = True, seed: int = 0, warmup: int = 50) -> dict:
+    """
+    Run every transport/concurrency/skills/message-size combination
+    against a fresh server.
+
+    Returns results keyed "<transport>/c<concurrency>/s<skills>/m<bytes>".
+    """
+    results = {}
+    for skills in skill_counts:
+        for size in message_sizes:
+            workload = synthetic_workload(requests, mix, size, skills, blocking, seed)
+            # Measured separately: tracing allocations slows every request down
+            memory = traced_allocations(workload, skills)
+            for transport in transports:
+                for concurrency in concurrencies:
+                    server = create_agent(skills, max_queue=requests + warmup)
+                    target = TARGETS[transport](server, concurrency)
+                    try:
+                        warm = synthetic_workload(warmup, mix, size, skills, blocking, seed + 1)
+                        replay(target.send, warm, concurrency)
+                        stats = replay(target.send, workload, concurrency)
+                        stats["store"] = store_growth(server, requests + warmup)
+                    finally:
+                        target.close()
+                        server.close()
+                    stats["memory"] = memory
+                    results[f"{transport}/c{concurrency}/s{skills}/m{size}"] = stats
+    return results
+
+
+# =============================================================================
+# Baselines
+# =============================================================================
+
+def save_baseline(results: dict, path: Path):
+    """Write results with enough context to judge a later comparison."""
+    document = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def compare_baseline(results: dict, path: Path, tolerance: float = 0.10) -> list[str]:
+    """
+    Compare against a saved baseline; returns the keys that regressed.
+
+    A run regresses when its throughput drops, or its p99 latency grows,
+    by more than `tolerance` (10% by default).
+    """
+    baseline = json.loads(path.read_text())["results"]
+    regressions = []
+    print(f"\n{'run':<28}{'rps':>18}{'p99 ms':>22}")
+    for key, stats in results.items():
+        if key not in baseline:
+            print(f"{key:<28}{'(not in baseline)':>40}")
+            continue
+        before = baseline[key]
+        rps_change = stats["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        p99_change = stats["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+        regressed = rps_change < -tolerance or p99_change > tolerance
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<28}{before['rps']:>9.0f} → {stats['rps']:<6.0f}"
+              f"{before['p99_ms']:>10.3f} → {stats['p99_ms']:<8.3f} {'✗' if regressed else '✓'}")
+    return regressions
+
+
+def print_results(results: dict):
+    print(f"{'run':<28}{'reqs':>6}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'peak KiB':>10}{'blk/req':>9}{'tasks':>7}{'log B':>8}  outcomes")
+    for key, stats in results.items():
+        memory, store = stats["memory"], stats["store"]
+        print(f"{key:<28}{stats['requests']:>6}{stats['rps']:>9.0f}{stats['p50_ms']:>9.3f}"
+              f"{stats['p95_ms']:>9.3f}{stats['p99_ms']:>9.3f}{memory['peak_kb']:>10}"
+              f"{memory['blocks_per_request']:>9}{store['tasks']:>7}{store['history_bytes']:>8}  "
+              f"{stats['outcomes']}")
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def parse_mix(items: list[str]) -> dict[str, float]:
+    mix = {}
+    for item in items:
+        kind, _, weight = item.partition("=")
+        if kind not in DEFAULT_MIX or not weight:
+            raise ValueError(f"Mix entries look like send=0.6 (kinds: {', '.join(DEFAULT_MIX)}): {item!r}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def run_demo():
+    """A short run over every transport, two skill counts and two message sizes."""
+
+    print("=" * 70)
+    print("A2A Benchmark Demo")
+    print("=" * 70)
+    print(f"\nWorkload: {DEFAULT_MIX}, blocking sends, 1000 requests per run")
+    print("Outcomes: ok, or JSON-RPC error code (-32002: cancel of a finished task)")
+
+    results = run_benchmark(list(TARGETS), [1, 4], [3, 300], [64, 4096], requests=1000)
+
+    print("\n⏱️  Results")
+    print("-" * 70)
+    print_results(results)
+
+    print("\n" + "=" * 70)
+    print("✅ Benchmark demo complete!")
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(description="Benchmark the A2A example agent server")
+    parser.add_argument("--transport", nargs="+", choices=sorted(TARGETS), default=["inproc"])
+    parser.add_argument("--concurrency", nargs="+", type=int, default=[1])
+    parser.add_argument("--skills", nargs="+", type=int, default=[3], help="skills on the agent card")
+    parser.add_argument("--message-bytes", nargs="+", type=int, default=[64])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per run")
+    parser.add_argument("--mix", nargs="+", default=[], help="e.g. send=0.6 get=0.3 cancel=0.1")
+    parser.add_argument("--no-blocking", action="store_true",
+                        help="measure task acceptance instead of completion")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", type=Path, help="write results as a baseline")
+    parser.add_argument("--compare", type=Path, help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args(argv)
+    try:
+        mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = run_benchmark(args.transport, args.concurrency, args.skills, args.message_bytes,
+                            args.requests, mix, blocking=not args.no_blocking, seed=args.seed)
+    print_results(results)
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"\nBaseline saved to {args.save}")
+    if args.compare:
+        regressions = compare_baseline(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n✗ {len(regressions)} run(s) regressed beyond {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    run_demo()
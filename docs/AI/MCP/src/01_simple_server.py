@@ -8,12 +8,18 @@ This example shows:
 2. Tool listing
 3. Tool execution
 4. Stdio transport simulation
+5. Progress notifications and cancellation for long-running tools
 """
 
+import inspect
 import json
 import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, field, asdict
-from typing import Any, Optional
+from typing import Any, Callable, Optional
 
 
 @dataclass
@@ -37,6 +43,123 @@ class ToolResult:
     content: list
 
 
+MAX_KEPT_NOTIFICATIONS = 1000
+
+
+class RequestCancelled(Exception):
+    """Raised inside a tool handler once its request has been cancelled."""
+
+
+class ToolContext:
+    """
+    Handed to tool handlers that take a second argument.
+    
+    Long-running tools use it to report progress (sent as throttled
+    notifications/progress messages) and to notice cancellation.
+    """
+    
+    def __init__(self, request_id: Any, progress_token: Any,
+                 send_notification: Callable[[dict], None], min_interval: float = 0.1):
+        self.request_id = request_id
+        self.progress_token = progress_token
+        self._send = send_notification
+        self._min_interval = min_interval
+        self._last_sent = 0.0
+        self._cancelled = threading.Event()
+        self._wakeup = threading.Event()  # set on completion or cancellation
+    
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+    
+    def check_cancelled(self):
+        """Raise RequestCancelled if the client gave up on this request."""
+        if self._cancelled.is_set():
+            raise RequestCancelled(f"Request {self.request_id} was cancelled")
+    
+    def report_progress(self, progress: float, total: Optional[float] = None,
+                        message: Optional[str] = None):
+        """Report progress; also a cancellation checkpoint."""
+        self.check_cancelled()
+        if self.progress_token is None:
+            return
+        
+        now = time.monotonic()
+        final = total is not None and progress >= total
+        if not final and now - self._last_sent < self._min_interval:
+            return
+        self._last_sent = now
+        
+        params = {"progressToken": self.progress_token, "progress": progress}
+        if total is not None:
+            params["total"] = total
+        if message is not None:
+            params["message"] = message
+        self._send({"jsonrpc": "2.0", "method": "notifications/progress", "params": params})
+    
+    def cancel(self):
+        self._cancelled.set()
+        self._wakeup.set()
+
+
+def _accepts_context(handler: Callable) -> bool:
+    """True if the handler can take (arguments, context)."""
+    try:
+        params = inspect.signature(handler).parameters.values()
+    except (TypeError, ValueError):
+        return False
+    positional = [p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)]
+    return len(positional) >= 2 or any(p.kind == p.VAR_POSITIONAL for p in params)
+
+
+class ToolRunner:
+    """
+    Runs tool handlers on a worker pool and tracks them for cancellation.
+    
+    A call waits on its own thread until the handler finishes or a
+    `notifications/cancelled` for its request id, handled on another
+    thread, releases it. Shared by the servers in 01 and 04.
+    """
+    
+    def __init__(self, max_workers: int = 4):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._in_flight: dict[Any, ToolContext] = {}
+        self._lock = threading.Lock()
+    
+    def run(self, handler: Callable, arguments: dict, wants_context: bool, request_id: Any,
+            progress_token: Any, send_notification: Callable[[dict], None]) -> Any:
+        """Call handler(arguments[, ctx]) and return its result; RequestCancelled if cancelled."""
+        ctx = ToolContext(request_id, progress_token, send_notification)
+        if request_id is not None:  # without an id a call cannot be cancelled
+            with self._lock:
+                self._in_flight[request_id] = ctx
+        try:
+            if wants_context:
+                future = self._executor.submit(handler, arguments, ctx)
+            else:
+                future = self._executor.submit(handler, arguments)
+            future.add_done_callback(lambda _: ctx._wakeup.set())
+            
+            ctx._wakeup.wait()
+            if ctx.cancelled:
+                # Frees the worker if it never started; running handlers stop
+                # at their next report_progress/check_cancelled
+                future.cancel()
+                raise RequestCancelled(f"Request {request_id} was cancelled")
+            return future.result()
+        finally:
+            if request_id is not None:
+                with self._lock:
+                    self._in_flight.pop(request_id, None)
+    
+    def cancel(self, params: Optional[dict]):
+        """Handle notifications/cancelled for an in-flight request."""
+        with self._lock:
+            ctx = self._in_flight.get((params or {}).get("requestId"))
+        if ctx is not None:
+            ctx.cancel()
+
+
 class SimpleMCPServer:
     """
     A simple MCP server implementation.
@@ -45,37 +168,61 @@ class SimpleMCPServer:
     - Tool registration
     - Request handling
     - Response formatting
+    
+    Tool calls run on a worker pool so that a `notifications/cancelled`
+    arriving on another thread can release the waiting request.
     """
     
-    def __init__(self, name: str, version: str = "1.0.0"):
+    def __init__(self, name: str, version: str = "1.0.0", max_workers: int = 4):
         self.name = name
         self.version = version
         self.tools: dict[str, Tool] = {}
         self.handlers: dict[str, callable] = {}
+        self._wants_context: dict[str, bool] = {}
+        
+        # Outgoing notifications, the most recent kept for inspection;
+        # replace send_notification to write to a transport
+        self.notifications: deque[dict] = deque(maxlen=MAX_KEPT_NOTIFICATIONS)
+        self.send_notification: Callable[[dict], None] = self.notifications.append
+        
+        self._tool_runner = ToolRunner(max_workers)
     
     def register_tool(self, tool: Tool, handler: callable):
-        """Register a tool with its handler."""
+        """Register a tool with its handler: handler(args) or handler(args, ctx)."""
         self.tools[tool.name] = tool
         self.handlers[tool.name] = handler
+        self._wants_context[tool.name] = _accepts_context(handler)
     
-    def handle_request(self, request: dict) -> dict:
-        """Process a JSON-RPC request and return response."""
-        method = request.get("method")
-        params = request.get("params", {})
+    def handle_request(self, request: dict) -> Optional[dict]:
+        """
+        Process a JSON-RPC request and return response.
+        
+        Notifications and cancelled requests produce no response (None).
+        """
+        method = request.get("method") or ""
+        params = request.get("params") or {}
         request_id = request.get("id")
         
         try:
+            if method == "notifications/cancelled":
+                self._tool_runner.cancel(params)
+                return None
+            if "id" not in request and method.startswith("notifications/"):
+                return None
+            
             if method == "initialize":
                 result = self._handle_initialize(params)
             elif method == "tools/list":
                 result = self._handle_list_tools()
             elif method == "tools/call":
-                result = self._handle_call_tool(params)
+                result = self._handle_call_tool(params, request_id)
             else:
                 return self._error_response(request_id, -32601, f"Unknown method: {method}")
             
             return self._success_response(request_id, result)
         
+        except RequestCancelled:
+            return None
         except Exception as e:
             return self._error_response(request_id, -32000, str(e))
     
@@ -98,7 +245,7 @@ class SimpleMCPServer:
             "tools": [asdict(tool) for tool in self.tools.values()]
         }
     
-    def _handle_call_tool(self, params: dict) -> dict:
+    def _handle_call_tool(self, params: dict, request_id: Any = None) -> dict:
         """Handle tools/call request."""
         tool_name = params.get("name")
         arguments = params.get("arguments", {})
@@ -106,7 +253,9 @@ class SimpleMCPServer:
         if tool_name not in self.handlers:
             raise ValueError(f"Unknown tool: {tool_name}")
         
-        result = self.handlers[tool_name](arguments)
+        result = self._tool_runner.run(
+            self.handlers[tool_name], arguments, self._wants_context[tool_name], request_id,
+            (params.get("_meta") or {}).get("progressToken"), self.send_notification)
         
         return {
             "content": [asdict(result)] if isinstance(result, TextContent) else result
@@ -193,6 +342,30 @@ def create_demo_server():
         )
     )
     
+    # Register a long-running tool that reports progress and honours cancel
+    def count_slowly(args: dict, ctx: ToolContext) -> TextContent:
+        total = args["to"]
+        for i in range(1, total + 1):
+            time.sleep(args.get("delay", 0.01))
+            ctx.report_progress(i, total, f"counted to {i}")
+        return TextContent(text=f"Counted to {total}")
+    
+    server.register_tool(
+        Tool(
+            name="count_slowly",
+            description="Count up to a number, reporting progress",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "to": {"type": "integer"},
+                    "delay": {"type": "number"}
+                },
+                "required": ["to"]
+            }
+        ),
+        count_slowly
+    )
+    
     return server
 
 
@@ -259,6 +432,44 @@ def simulate_mcp_session():
     })
     print(json.dumps(response, indent=2))
     
+    # 5. Long-running tool with progress notifications
+    print("\n⏳ Request: tools/call (count_slowly, with progressToken)")
+    print("-" * 50)
+    response = server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "tools/call",
+        "params": {
+            "name": "count_slowly",
+            "arguments": {"to": 30},
+            "_meta": {"progressToken": "count-1"}
+        },
+        "id": 5
+    })
+    for notification in server.notifications:
+        print(f"  ← {notification['method']} {notification['params']['progress']}"
+              f"/{notification['params']['total']}")
+    print(json.dumps(response, indent=2))
+    
+    # 6. Cancel a call from another thread (as a transport reader would)
+    print("\n🛑 notifications/cancelled while count_slowly is running")
+    print("-" * 50)
+    responses = []
+    caller = threading.Thread(target=lambda: responses.append(server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "tools/call",
+        "params": {"name": "count_slowly", "arguments": {"to": 1000}},
+        "id": 6
+    })))
+    caller.start()
+    time.sleep(0.1)
+    server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "notifications/cancelled",
+        "params": {"requestId": 6, "reason": "User gave up"}
+    })
+    caller.join()
+    print(f"Response to cancelled request: {responses[0]}")
+    
     print("\n" + "=" * 70)
     print("✅ MCP session complete!")
 
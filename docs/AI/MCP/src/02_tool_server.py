@@ -8,11 +8,34 @@ This example demonstrates:
 2. Nested input schemas
 3. Tool categorization
 4. Error handling
+5. Schemas compiled once into argument validators
+6. Result memoization for deterministic tools
+7. Single-pass, chunked text analysis for large inputs
+8. Oversized results paged through a continuation cursor
+9. A columnar store behind query_data (filters, sort, aggregates)
 """
 
+import bisect
+import codecs
+import csv
+import functools
+import hashlib
+import heapq
 import json
+import math
+import operator
+import os
+import re
+import sys
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from itertools import compress
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field, asdict
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
 from datetime import datetime
 
 
@@ -31,6 +54,796 @@ class TextContent:
     text: str = ""
 
 
+@dataclass
+class CachePolicy:
+    """Marks a tool as cacheable: results live for `ttl_seconds` within `max_bytes`."""
+    ttl_seconds: float = 300.0
+    max_bytes: int = 1 << 20
+    # Calls passing any of these arguments read external state; skip the cache
+    bypass_args: tuple[str, ...] = ()
+    # Hashing arguments longer than this costs more than the cache saves
+    max_argument_chars: int = 64 * 1024
+
+
+class ResultCache:
+    """
+    LRU of tool results keyed by a canonical hash of the arguments.
+    
+    Entries expire after the policy TTL; the least recently used ones are
+    evicted once the cached text exceeds the byte budget. Calls whose
+    arguments exceed `max_argument_chars` are not cached at all.
+    """
+    
+    def __init__(self, policy: CachePolicy):
+        self.policy = policy
+        self._entries: OrderedDict[str, tuple[float, str, int]] = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.skipped = 0
+    
+    def key(self, arguments: dict) -> Optional[str]:
+        """Canonical hash of the arguments, or None if they are too large to cache."""
+        limit = self.policy.max_argument_chars
+        # Checked before encoding, so a multi-MB text is never copied or hashed
+        if sum(len(value) for value in arguments.values() if isinstance(value, str)) > limit:
+            self.skipped += 1
+            return None
+        canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        if len(canonical) > limit:
+            self.skipped += 1
+            return None
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+    
+    def get(self, key: str):
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, text, _ = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return text
+            self._remove(key)
+        self.misses += 1
+        return None
+    
+    def put(self, key: str, text: str):
+        size = len(text.encode("utf-8"))
+        if size > self.policy.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.policy.ttl_seconds, text, size)
+        self.bytes += size
+        while self.bytes > self.policy.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+    
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self.bytes -= size
+    
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "evictions": self.evictions,
+            "skipped": self.skipped,
+        }
+
+
+# =============================================================================
+# Paged Results
+# =============================================================================
+
+def encode_json_page(items: list, start: int, budget: int) -> tuple[str, int]:
+    """
+    Encode items[start:] as a compact JSON array of at most `budget` bytes.
+    
+    Items are encoded one at a time, so an oversized result never becomes
+    one giant string. At least one item is always included. Returns the
+    text and the index of the first item left out.
+    """
+    encoder = json.JSONEncoder(separators=(",", ":"))
+    parts: list[str] = []
+    size = 2  # the brackets
+    index = start
+    while index < len(items):
+        part = encoder.encode(items[index])
+        if parts and size + len(part) + 1 > budget:
+            break
+        parts.append(part)
+        size += len(part) + 1
+        index += 1
+    return "[" + ",".join(parts) + "]", index
+
+
+class ResultStore:
+    """
+    Keeps oversized tool results server-side for paged retrieval.
+    
+    A cursor is "<result id>:<offset>". Results expire after `ttl_seconds`
+    and only the `max_results` most recent ones are kept.
+    """
+    
+    def __init__(self, page_bytes: int = 8 * 1024, ttl_seconds: float = 300.0, max_results: int = 64):
+        self.page_bytes = page_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_results = max_results
+        self._results: OrderedDict[str, tuple[float, list]] = OrderedDict()
+        self._next_id = 0
+    
+    @property
+    def issued(self) -> int:
+        """How many paged results (each with its own cursor) have been handed out."""
+        return self._next_id
+    
+    def first_page(self, items: list) -> Optional[str]:
+        """Return a paged response, or None if the result fits in one page."""
+        text, next_index = encode_json_page(items, 0, self.page_bytes)
+        if next_index == len(items):
+            return None
+        
+        self._next_id += 1
+        result_id = f"r{self._next_id}"
+        self._results[result_id] = (time.monotonic() + self.ttl_seconds, items)
+        while len(self._results) > self.max_results:
+            self._results.popitem(last=False)
+        return self._wrap(text, result_id, next_index, len(items))
+    
+    def next_page(self, cursor: str) -> str:
+        result_id, _, offset = cursor.partition(":")
+        entry = self._results.get(result_id)
+        if entry is None or entry[0] < time.monotonic() or not offset.isdigit():
+            self._results.pop(result_id, None)
+            raise ValueError(f"Unknown or expired cursor: {cursor}")
+        
+        items = entry[1]
+        text, next_index = encode_json_page(items, int(offset), self.page_bytes)
+        if next_index == len(items):
+            del self._results[result_id]
+        return self._wrap(text, result_id, next_index, len(items))
+    
+    @staticmethod
+    def _wrap(items_text: str, result_id: str, next_index: int, total: int) -> str:
+        cursor = json.dumps(f"{result_id}:{next_index}") if next_index < total else "null"
+        return f'{{"items":{items_text},"nextCursor":{cursor},"total":{total}}}'
+
+
+# =============================================================================
+# Schema Compilation
+# =============================================================================
+
+class SchemaValidationError(ValueError):
+    """Tool arguments do not match the tool's inputSchema."""
+
+
+_TYPE_CHECKS = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "null": lambda v: v is None,
+}
+
+
+def compile_schema(schema: dict, path: str = "arguments") -> Callable[[Any], Any]:
+    """
+    Compile a JSON Schema subset into a validator function.
+    
+    Supports type, enum, minimum/maximum, minLength/maxLength, properties,
+    required, additionalProperties, items, minItems/maxItems and default.
+    The schema is walked once here; the returned function only runs the
+    checks that apply and returns the value with defaults filled in.
+    """
+    checks: list[Callable[[Any], Any]] = []
+    
+    if "type" in schema:
+        types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        type_checks = [_TYPE_CHECKS[t] for t in types]
+        expected = " or ".join(types)
+        
+        def check_type(value):
+            if not any(check(value) for check in type_checks):
+                raise SchemaValidationError(
+                    f"{path}: expected {expected}, got {type(value).__name__}")
+            return value
+        checks.append(check_type)
+    
+    if "enum" in schema:
+        allowed = schema["enum"]
+        
+        def check_enum(value):
+            if value not in allowed:
+                raise SchemaValidationError(f"{path}: must be one of {allowed}")
+            return value
+        checks.append(check_enum)
+    
+    for keyword, fails, message in (
+        ("minimum", lambda v, limit: v < limit, "must be >= {}"),
+        ("maximum", lambda v, limit: v > limit, "must be <= {}"),
+        ("minLength", lambda v, limit: len(v) < limit, "must have length >= {}"),
+        ("maxLength", lambda v, limit: len(v) > limit, "must have length <= {}"),
+        ("minItems", lambda v, limit: len(v) < limit, "must have >= {} items"),
+        ("maxItems", lambda v, limit: len(v) > limit, "must have <= {} items"),
+    ):
+        if keyword in schema:
+            def check_bound(value, limit=schema[keyword], fails=fails, message=message):
+                if fails(value, limit):
+                    raise SchemaValidationError(f"{path}: {message.format(limit)}")
+                return value
+            checks.append(check_bound)
+    
+    if "properties" in schema or "required" in schema:
+        properties = {
+            name: compile_schema(sub, f"{path}.{name}")
+            for name, sub in schema.get("properties", {}).items()
+        }
+        defaults = {
+            name: sub["default"]
+            for name, sub in schema.get("properties", {}).items()
+            if "default" in sub
+        }
+        required = schema.get("required", [])
+        closed = schema.get("additionalProperties", True) is False
+        
+        def check_object(value):
+            missing = [name for name in required if name not in value]
+            if missing:
+                raise SchemaValidationError(f"{path}: missing required {', '.join(missing)}")
+            if closed:
+                extra = value.keys() - properties.keys()
+                if extra:
+                    raise SchemaValidationError(f"{path}: unexpected {', '.join(sorted(extra))}")
+            result = {**defaults, **value}
+            for name, validate in properties.items():
+                if name in result:
+                    result[name] = validate(result[name])
+            return result
+        checks.append(check_object)
+    
+    if "items" in schema:
+        validate_item = compile_schema(schema["items"], f"{path}[]")
+        
+        def check_items(value):
+            return [validate_item(item) for item in value]
+        checks.append(check_items)
+    
+    def validate(value):
+        for check in checks:
+            value = check(value)
+        return value
+    
+    return validate
+
+
+# =============================================================================
+# Streaming Text Analysis
+# =============================================================================
+
+# Characters str.splitlines() treats as line boundaries ("\r\n" counts once)
+ASCII_LINE_BREAKS = "\n\r\v\f\x1c\x1d\x1e"
+LINE_BREAKS = ASCII_LINE_BREAKS + "\x85\u2028\u2029"
+
+_ASCII_DIGIT = re.compile(r"[0-9]")
+_ASCII_UPPER = re.compile(r"[A-Z]")
+
+CHUNK_CHARS = 1 << 20  # characters per chunk when splitting in-memory text
+CHUNK_BYTES = 1 << 20  # bytes per read when streaming files
+PARALLEL_THRESHOLD = 8 << 20  # inputs at least this large fan out to processes
+
+
+@dataclass
+class TextStats:
+    """
+    Statistics for a run of text.
+    
+    Stats for adjacent chunks combine with `merge`, so a text can be
+    analyzed chunk by chunk (or in parallel) and give the same result as
+    analyzing it whole.
+    """
+    characters: int = 0
+    words: int = 0
+    line_breaks: int = 0
+    has_numbers: bool = False
+    has_uppercase: bool = False
+    first: str = ""
+    last: str = ""
+    
+    @classmethod
+    def of(cls, chunk: str, has_numbers: bool = False, has_uppercase: bool = False) -> "TextStats":
+        """Scan one chunk. Flags already known to be True are not searched again."""
+        if not chunk:
+            return cls()
+        
+        if chunk.isascii():
+            breaks = sum(chunk.count(c) for c in ASCII_LINE_BREAKS)
+            has_numbers = has_numbers or _ASCII_DIGIT.search(chunk) is not None
+            has_uppercase = has_uppercase or _ASCII_UPPER.search(chunk) is not None
+        else:
+            breaks = sum(chunk.count(c) for c in LINE_BREAKS)
+            has_numbers = has_numbers or any(map(str.isdigit, chunk))
+            has_uppercase = has_uppercase or any(map(str.isupper, chunk))
+        
+        return cls(
+            characters=len(chunk),
+            words=len(chunk.split()),
+            line_breaks=breaks - chunk.count("\r\n"),
+            has_numbers=has_numbers,
+            has_uppercase=has_uppercase,
+            first=chunk[0],
+            last=chunk[-1],
+        )
+    
+    def merge(self, other: "TextStats") -> "TextStats":
+        """Combine with the stats of the text immediately following this one."""
+        if not self.characters:
+            return other
+        if not other.characters:
+            return self
+        
+        # A word or a "\r\n" pair may straddle the boundary
+        split_word = not self.last.isspace() and not other.first.isspace()
+        split_crlf = self.last == "\r" and other.first == "\n"
+        
+        return TextStats(
+            characters=self.characters + other.characters,
+            words=self.words + other.words - split_word,
+            line_breaks=self.line_breaks + other.line_breaks - split_crlf,
+            has_numbers=self.has_numbers or other.has_numbers,
+            has_uppercase=self.has_uppercase or other.has_uppercase,
+            first=self.first,
+            last=other.last,
+        )
+    
+    def to_analysis(self) -> dict:
+        """The analyze_text result for the whole text."""
+        trailing_line = bool(self.last) and self.last not in LINE_BREAKS
+        return {
+            "character_count": self.characters,
+            "word_count": self.words,
+            "line_count": (self.line_breaks + trailing_line) or 1,
+            "has_numbers": self.has_numbers,
+            "has_uppercase": self.has_uppercase,
+        }
+
+
+def analyze_chunks(chunks: Iterable[str]) -> TextStats:
+    """Single pass over a stream of text chunks."""
+    stats = TextStats()
+    for chunk in chunks:
+        stats = stats.merge(TextStats.of(chunk, stats.has_numbers, stats.has_uppercase))
+    return stats
+
+
+def iter_file_chunks(path: Path, start: int = 0, end: Optional[int] = None,
+                     chunk_bytes: int = CHUNK_BYTES) -> Iterator[str]:
+    """Decode a byte range of a UTF-8 file incrementally."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = None if end is None else end - start
+        while remaining is None or remaining > 0:
+            block = f.read(chunk_bytes if remaining is None else min(chunk_bytes, remaining))
+            if not block:
+                break
+            if remaining is not None:
+                remaining -= len(block)
+            yield decoder.decode(block)
+        yield decoder.decode(b"", final=True)
+
+
+def _utf8_boundary(path: Path, offset: int) -> int:
+    """Move `offset` forward past UTF-8 continuation bytes."""
+    with open(path, "rb") as f:
+        f.seek(offset)
+        for byte in f.read(4):
+            if byte & 0xC0 != 0x80:
+                break
+            offset += 1
+    return offset
+
+
+def _text_slice_stats(chunk: str) -> TextStats:
+    return TextStats.of(chunk)
+
+
+def _file_range_stats(path: Path, start: int, end: int) -> TextStats:
+    return analyze_chunks(iter_file_chunks(path, start, end))
+
+
+def analyze_text_parallel(text: str, pool: ProcessPoolExecutor,
+                          chunk_chars: int = CHUNK_CHARS) -> TextStats:
+    """Scan slices of an in-memory text in worker processes, then merge in order."""
+    slices = (text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars))
+    return functools.reduce(TextStats.merge, pool.map(_text_slice_stats, slices), TextStats())
+
+
+def analyze_file_parallel(path: Path, pool: ProcessPoolExecutor, workers: int) -> TextStats:
+    """Let each worker stream its own byte range of the file, then merge in order."""
+    size = path.stat().st_size
+    step = max(size // (workers * 4), CHUNK_BYTES)
+    bounds = sorted({_utf8_boundary(path, offset) for offset in range(0, size, step)} | {size})
+    ranges = list(zip(bounds, bounds[1:]))
+    results = pool.map(_file_range_stats, [path] * len(ranges),
+                       [s for s, _ in ranges], [e for _, e in ranges])
+    return functools.reduce(TextStats.merge, results, TextStats())
+
+
+# =============================================================================
+# Columnar Data Store
+# =============================================================================
+
+FILTER_OPS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, options: value in options,
+}
+
+# op -> method on the filter value that tests `row_value <op> value`
+_REFLECTED_OPS = {"eq": "__eq__", "ne": "__ne__", "gt": "__lt__", "gte": "__le__",
+                  "lt": "__gt__", "lte": "__ge__"}
+
+AGGREGATES = ("count", "sum", "avg", "min", "max")
+_AGGREGATE = re.compile(r"^(count|sum|avg|min|max)(?:\((\w+)\))?$")
+
+SAMPLE_TABLES = {
+    "users": [
+        {"id": 1, "name": "Alice", "email": "alice@example.com"},
+        {"id": 2, "name": "Bob", "email": "bob@example.com"},
+        {"id": 3, "name": "Charlie", "email": "charlie@example.com"},
+    ],
+    "products": [
+        {"id": "p1", "name": "Widget", "price": 19.99},
+        {"id": "p2", "name": "Gadget", "price": 49.99},
+    ],
+    "orders": [
+        {"id": "o1", "user_id": 1, "total": 69.98},
+        {"id": "o2", "user_id": 2, "total": 19.99},
+    ],
+}
+
+
+def _column(values: list) -> Any:
+    """Pack a column into a typed array when every value allows it."""
+    if values and all(type(v) is int for v in values):
+        try:
+            return array("q", values)
+        except OverflowError:
+            return values
+    if values and all(type(v) in (int, float) for v in values):
+        return array("d", values)
+    return values
+
+
+def _parse_csv_value(text: str) -> Any:
+    if text == "":
+        return None
+    for parse in (int, float):
+        try:
+            return parse(text)
+        except ValueError:
+            pass
+    return text
+
+
+class ColumnarTable:
+    """
+    A read-mostly table stored as one array per column.
+    
+    Numeric columns live in array.array ('q' or 'd'), everything else in a
+    plain list. Queries work a column at a time on a selection of row
+    positions: filters narrow the selection one column at a time, sorting
+    and aggregates touch only the columns they name, and rows are only
+    assembled for the page that is returned.
+    
+    Tables of at least INDEX_MIN_ROWS rows also build indexes on first
+    use: posting lists for low-cardinality columns (answering eq/in) and a
+    sorted permutation for numeric columns (answering ranges and
+    order_by). Since tables never change after loading, indexes are never
+    invalidated.
+    """
+    
+    INDEX_MIN_ROWS = 4096
+    MAX_DISTINCT_RATIO = 8  # posting lists only when rows >= 8 x distinct values
+    
+    def __init__(self, name: str, columns: dict[str, Any]):
+        lengths = {len(values) for values in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"Columns of {name} have different lengths")
+        self.name = name
+        self.columns = columns
+        self.size = lengths.pop() if lengths else 0
+        self._postings: dict[str, Optional[dict[Any, array]]] = {}
+        self._orderings: dict[tuple[str, bool], array] = {}
+        self._sorted_values: dict[str, array] = {}
+    
+    @classmethod
+    def from_rows(cls, name: str, rows: list[dict]) -> "ColumnarTable":
+        names = list(dict.fromkeys(key for row in rows for key in row))
+        return cls(name, {col: _column([row.get(col) for row in rows]) for col in names})
+    
+    @classmethod
+    def from_csv(cls, path: Path, name: Optional[str] = None) -> "ColumnarTable":
+        """Load a CSV with a header row; numbers become numbers, blanks None."""
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            header = next(reader)
+            values = [[] for _ in header]
+            for record in reader:
+                for column, text in zip(values, record):
+                    column.append(_parse_csv_value(text))
+        return cls(name or Path(path).stem, {col: _column(v) for col, v in zip(header, values)})
+    
+    @classmethod
+    def from_jsonl(cls, path: Path, name: Optional[str] = None) -> "ColumnarTable":
+        """Load one JSON object per line."""
+        with open(path, encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+        return cls.from_rows(name or Path(path).stem, rows)
+    
+    def _get(self, col: str):
+        if col not in self.columns:
+            raise ValueError(f"Unknown column in {self.name}: {col}")
+        return self.columns[col]
+    
+    # Indexes
+    
+    def _postings_for(self, col: str) -> Optional[dict[Any, array]]:
+        """Row positions per distinct value, or None if the column has too many."""
+        if col not in self._postings:
+            values = self.columns[col]
+            postings = None
+            try:
+                distinct = set(values)
+            except TypeError:  # unhashable values (nested JSON)
+                distinct = None
+            if distinct is not None and len(distinct) * self.MAX_DISTINCT_RATIO <= self.size:
+                postings = {key: array("q") for key in distinct}
+                for position, value in enumerate(values):
+                    postings[value].append(position)
+            self._postings[col] = postings
+        return self._postings[col]
+    
+    def _ordering(self, col: str, descending: bool = False) -> array:
+        """Row positions of a numeric column in (stable) sorted order."""
+        key = (col, descending)
+        if key not in self._orderings:
+            values = self.columns[col]
+            self._orderings[key] = array("q", sorted(range(self.size), key=values.__getitem__,
+                                                     reverse=descending))
+        return self._orderings[key]
+    
+    def _range(self, col: str, op: str, value: Any) -> Optional[array]:
+        """Positions with `column <op> value`, via binary search on the ordering."""
+        if type(value) not in (int, float) or op not in ("eq", "gt", "gte", "lt", "lte"):
+            return None
+        ordering = self._ordering(col)
+        if col not in self._sorted_values:
+            values = self.columns[col]
+            self._sorted_values[col] = array(values.typecode, map(values.__getitem__, ordering))
+        keys = self._sorted_values[col]
+        lo, hi = 0, self.size
+        if op in ("eq", "gte"):
+            lo = bisect.bisect_left(keys, value)
+        if op == "gt":
+            lo = bisect.bisect_right(keys, value)
+        if op in ("eq", "lte"):
+            hi = bisect.bisect_right(keys, value)
+        if op == "lt":
+            hi = bisect.bisect_left(keys, value)
+        return ordering[lo:max(lo, hi)]
+    
+    def _lookup(self, col: str, op: str, value: Any):
+        """Unordered positions matching one filter from an index, or None."""
+        if self.size < self.INDEX_MIN_ROWS:
+            return None
+        if op in ("eq", "in"):
+            postings = self._postings_for(col)
+            if postings is not None:
+                if op == "eq":
+                    try:
+                        return postings.get(value, ())
+                    except TypeError:
+                        raise ValueError("Filter 'eq' needs a scalar value")
+                try:
+                    keys = set(value)
+                except TypeError:
+                    raise ValueError("Filter 'in' needs a list of scalar values")
+                return [p for key in keys if key in postings for p in postings[key]]
+        if isinstance(self.columns[col], array):
+            return self._range(col, op, value)
+        return None
+    
+    # Queries
+    
+    def select(self, filters: list[tuple[str, str, Any]] = (),
+               ordered: bool = True) -> Optional[list[int]]:
+        """
+        Row positions matching every filter, or None for "all rows".
+        
+        Filters are (column, op, value) triples with op from FILTER_OPS.
+        The most selective indexed filter produces the first selection;
+        the rest are applied by scanning their column at those positions.
+        Positions are in row order unless `ordered` is False.
+        """
+        pending = []
+        selection = None
+        for col, op, value in filters:
+            if op not in FILTER_OPS:
+                raise ValueError(f"Unknown filter operator: {op}")
+            self._get(col)
+            found = self._lookup(col, op, value)
+            if found is None:
+                pending.append((col, op, value))
+            elif selection is None or len(found) < len(selection):
+                if selection is not None:
+                    pending.append(driver)
+                selection, driver = found, (col, op, value)
+            else:
+                pending.append((col, op, value))
+        
+        if selection is not None:
+            selection = sorted(selection) if ordered else list(selection)
+        for col, op, value in pending:
+            values = self.columns[col]
+            test = self._predicate(values, op, value)
+            if selection is None:
+                selection = list(compress(range(self.size), map(test, values)))
+            else:
+                selection = list(compress(selection, map(test, map(values.__getitem__, selection))))
+        return selection
+    
+    @staticmethod
+    def _predicate(values: Any, op: str, value: Any) -> Callable[[Any], Any]:
+        """
+        Test for one column value. Where the column type allows, this is a
+        C-level callable (a bound comparison, set.__contains__, an
+        operator partial), so map() runs it without a Python frame per row.
+        """
+        if op == "in":
+            try:
+                return set(value).__contains__
+            except TypeError:
+                raise ValueError("Filter 'in' needs a list of scalar values")
+        if isinstance(values, array):
+            if type(value) not in (int, float):
+                return lambda v: op == "ne"
+            if values.typecode == "d":
+                value = float(value)
+            # value.__lt__(v) is v > value, and so on
+            return getattr(value, _REFLECTED_OPS[op])
+        if op == "eq":
+            return functools.partial(operator.eq, value)
+        
+        fn = FILTER_OPS[op]
+        
+        def test(v):
+            if v is None:
+                return False
+            try:
+                return fn(v, value)
+            except TypeError:
+                return False
+        return test
+    
+    def query(self, filters: list[tuple[str, str, Any]] = (),
+              fields: Optional[list[str]] = None,
+              order_by: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, offset: int = 0) -> tuple[list[dict], int]:
+        """Run a query and return (page of rows, total matching rows)."""
+        selection = self.select(filters)
+        total = self.size if selection is None else len(selection)
+        end = total if limit is None else min(offset + limit, total)
+        
+        if order_by is None:
+            positions = range(offset, end) if selection is None else selection[offset:end]
+        else:
+            values = self._get(order_by)
+            if not isinstance(values, array):
+                # Rows missing the column sort last regardless of direction
+                selection = range(self.size) if selection is None else selection
+                present = [i for i in selection if values[i] is not None]
+                missing = [i for i in selection if values[i] is None]
+                positions = (sorted(present, key=values.__getitem__, reverse=descending) + missing)[offset:end]
+            elif selection is None and self.size >= self.INDEX_MIN_ROWS:
+                positions = self._ordering(order_by, descending)[offset:end]
+            else:
+                selection = range(self.size) if selection is None else selection
+                if limit is not None:
+                    # Same result as sorted(...)[:end], without sorting everything
+                    pick = heapq.nlargest if descending else heapq.nsmallest
+                    positions = pick(end, selection, key=values.__getitem__)[offset:]
+                else:
+                    positions = sorted(selection, key=values.__getitem__, reverse=descending)[offset:]
+        
+        names = [f for f in fields if f in self.columns] if fields else list(self.columns)
+        columns = [(f, self.columns[f]) for f in names]
+        page = [{f: values[i] for f, values in columns} for i in positions]
+        return page, total
+    
+    def aggregate(self, aggregates: list[str],
+                  filters: list[tuple[str, str, Any]] = ()) -> dict:
+        """
+        Compute aggregates such as "count", "sum(total)" or "avg(price)"
+        over the rows matching `filters`. Missing values are skipped.
+        """
+        selection = self.select(filters, ordered=False)
+        gathered: dict[str, Any] = {}
+        result = {}
+        for spec in aggregates:
+            match = _AGGREGATE.match(spec)
+            if match is None:
+                raise ValueError(f"Invalid aggregate: {spec} (use one of {', '.join(AGGREGATES)}, e.g. sum(total))")
+            fn, col = match.groups()
+            if col is None:
+                if fn != "count":
+                    raise ValueError(f"Aggregate {fn} needs a column, e.g. {fn}(price)")
+                result[spec] = self.size if selection is None else len(selection)
+                continue
+            
+            if col not in gathered:
+                column = self._get(col)
+                values = column if selection is None else list(map(column.__getitem__, selection))
+                if not isinstance(column, array):
+                    values = [v for v in values if v is not None]
+                gathered[col] = values
+            values = gathered[col]
+            
+            if fn == "count":
+                result[spec] = len(values)
+            elif not values:
+                result[spec] = None
+            elif fn in ("sum", "avg"):
+                try:
+                    total = math.fsum(values) if isinstance(values[0], float) else sum(values)
+                except TypeError:
+                    raise ValueError(f"Cannot {fn} non-numeric column {col}")
+                result[spec] = total if fn == "sum" else total / len(values)
+            else:
+                try:
+                    result[spec] = min(values) if fn == "min" else max(values)
+                except TypeError:
+                    raise ValueError(f"Cannot {fn} column {col} with mixed value types")
+        return result
+
+
+class ColumnStore:
+    """Named ColumnarTables, loaded once and shared by every query."""
+    
+    def __init__(self):
+        self.tables: dict[str, ColumnarTable] = {}
+    
+    def add(self, table: ColumnarTable) -> ColumnarTable:
+        self.tables[table.name] = table
+        return table
+    
+    def load(self, path: Path, name: Optional[str] = None) -> ColumnarTable:
+        """Load a .csv or .jsonl file as a table named after the file."""
+        path = Path(path)
+        if path.suffix == ".csv":
+            return self.add(ColumnarTable.from_csv(path, name))
+        if path.suffix in (".jsonl", ".ndjson"):
+            return self.add(ColumnarTable.from_jsonl(path, name))
+        raise ValueError(f"Unsupported data file: {path}")
+    
+    def table(self, name: str) -> ColumnarTable:
+        if name not in self.tables:
+            raise ValueError(f"Unknown table: {name}")
+        return self.tables[name]
+
+
 class ToolServer:
     """
     MCP server focused on demonstrating tool patterns.
@@ -38,12 +851,37 @@ class ToolServer:
     Categories:
     - Utility tools (time, random)
     - Text tools (format, analyze)
-    - Data tools (query simulation)
+    - Data tools (columnar query store)
+    
+    Deterministic tools carry a CachePolicy; their results are memoized.
     """
     
-    def __init__(self):
+    # Tools whose output changes between identical calls; never cached
+    VOLATILE_TOOLS = frozenset({"get_current_time", "generate_id"})
+    
+    def __init__(self, file_root: Optional[str] = None, workers: Optional[int] = None,
+                 page_bytes: int = 8 * 1024, data_dir: Optional[str] = None):
         self.name = "tool-demo-server"
         self.version = "1.0.0"
+        self.results = ResultStore(page_bytes=page_bytes)
+        self.file_root = Path(file_root).resolve() if file_root else None
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.metrics = {
+            "calls": 0,
+            "validation_failures": 0,
+            "validation_seconds": 0.0,
+        }
+        
+        # Tables are loaded once; query_data only reads them
+        self.store = ColumnStore()
+        for table_name, rows in SAMPLE_TABLES.items():
+            self.store.add(ColumnarTable.from_rows(table_name, rows))
+        if data_dir:
+            for path in sorted(Path(data_dir).iterdir()):
+                if path.suffix in (".csv", ".jsonl", ".ndjson"):
+                    self.store.load(path)
+        
         self._register_all_tools()
     
     def _register_all_tools(self):
@@ -124,45 +962,141 @@ class ToolServer:
                     "text": {
                         "type": "string",
                         "description": "Text to analyze"
+                    },
+                    "uri": {
+                        "type": "string",
+                        "description": "file:// reference to analyze instead of inline text"
                     }
-                },
-                "required": ["text"]
+                }
             }
         )
         
         # Data tools
         self.tools["query_data"] = Tool(
             name="query_data",
-            description="Query simulated data store",
+            description="Query the in-memory data store",
             inputSchema={
                 "type": "object",
                 "properties": {
                     "table": {
                         "type": "string",
-                        "enum": ["users", "products", "orders"]
+                        "enum": sorted(self.store.tables)
                     },
                     "filters": {
                         "type": "object",
-                        "description": "Key-value filters to apply"
+                        "description": "column: value for equality, or column: {op: value} "
+                                       "with op in eq, ne, gt, gte, lt, lte, in"
+                    },
+                    "fields": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Columns to return (default: all)"
+                    },
+                    "order_by": {"type": "string"},
+                    "descending": {"type": "boolean", "default": False},
+                    "offset": {
+                        "type": "integer",
+                        "minimum": 0,
+                        "default": 0
                     },
                     "limit": {
                         "type": "integer",
                         "minimum": 1,
                         "maximum": 100,
                         "default": 10
+                    },
+                    "aggregates": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Return aggregates instead of rows, e.g. count, sum(total), avg(price)"
                     }
                 },
                 "required": ["table"]
             }
         )
+        
+        self.tools["fetch_more"] = Tool(
+            name="fetch_more",
+            description="Fetch the next page of a large result using its nextCursor",
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "cursor": {
+                        "type": "string",
+                        "description": "nextCursor from a previous paged result"
+                    }
+                },
+                "required": ["cursor"],
+                "additionalProperties": False
+            }
+        )
+        
+        # Compile every schema once, up front
+        self.validators = {
+            name: compile_schema(tool.inputSchema) for name, tool in self.tools.items()
+        }
+        
+        # Pure functions of their arguments
+        self.caches: dict[str, ResultCache] = {}
+        self.set_cache_policy("format_text", CachePolicy(ttl_seconds=600, max_bytes=256 * 1024))
+        self.set_cache_policy("analyze_text", CachePolicy(ttl_seconds=600, max_bytes=256 * 1024,
+                                                          bypass_args=("uri",)))
+        self.set_cache_policy("query_data", CachePolicy(ttl_seconds=30, max_bytes=1 << 20))
+    
+    def load_table(self, path: str, name: Optional[str] = None) -> dict:
+        """Load a CSV/JSONL file into the store and make it queryable."""
+        table = self.store.load(Path(path), name)
+        tool = self.tools["query_data"]
+        tool.inputSchema["properties"]["table"]["enum"] = sorted(self.store.tables)
+        self.validators["query_data"] = compile_schema(tool.inputSchema)
+        self.set_cache_policy("query_data", self.caches["query_data"].policy)  # drop stale results
+        return {"table": table.name, "rows": table.size, "columns": list(table.columns)}
+    
+    def set_cache_policy(self, name: str, policy: CachePolicy):
+        """Mark a tool as cacheable."""
+        if name in self.VOLATILE_TOOLS:
+            raise ValueError(f"Tool is not deterministic and cannot be cached: {name}")
+        self.caches[name] = ResultCache(policy)
     
     def list_tools(self) -> list[dict]:
         """Return all tools."""
         return [asdict(tool) for tool in self.tools.values()]
     
     def call_tool(self, name: str, arguments: dict) -> TextContent:
-        """Execute a tool and return result."""
+        """Validate arguments against the tool schema, then execute the tool."""
+        
+        if name not in self.tools:
+            raise ValueError(f"Unknown tool: {name}")
+        
+        self.metrics["calls"] += 1
+        started = time.perf_counter()
+        try:
+            arguments = self.validators[name](arguments)
+        except SchemaValidationError:
+            self.metrics["validation_failures"] += 1
+            raise
+        finally:
+            self.metrics["validation_seconds"] += time.perf_counter() - started
+        
+        cache = self.caches.get(name)
+        if cache is None or any(arg in arguments for arg in cache.policy.bypass_args):
+            return self._dispatch(name, arguments)
         
+        key = cache.key(arguments)
+        if key is None:
+            return self._dispatch(name, arguments)
+        text = cache.get(key)
+        if text is None:
+            issued = self.results.issued
+            text = self._dispatch(name, arguments).text
+            # A paged reply's cursor is consumed by fetch_more, so a cached
+            # copy would hand later callers a dead cursor
+            if self.results.issued == issued:
+                cache.put(key, text)
+        return TextContent(text=text)
+    
+    def _dispatch(self, name: str, arguments: dict) -> TextContent:
+        """Run the handler for a validated call."""
         if name == "get_current_time":
             return self._handle_get_time(arguments)
         elif name == "generate_id":
@@ -173,8 +1107,45 @@ class ToolServer:
             return self._handle_analyze_text(arguments)
         elif name == "query_data":
             return self._handle_query_data(arguments)
-        else:
-            raise ValueError(f"Unknown tool: {name}")
+        elif name == "fetch_more":
+            return TextContent(text=self.results.next_page(arguments["cursor"]))
+    
+    def analyze_stream(self, chunks: Iterable[str]) -> dict:
+        """Analyze text that arrives as a stream of chunks."""
+        return analyze_chunks(chunks).to_analysis()
+    
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+    
+    def _worker_pool(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers < 2:
+            return None
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+    
+    def _resolve_file(self, uri: str) -> Path:
+        """Map file://relative/path to a file under file_root."""
+        if self.file_root is None:
+            raise ValueError("No file root configured")
+        if not uri.startswith("file://"):
+            raise ValueError(f"Unsupported URI: {uri}")
+        path = (self.file_root / uri[len("file://"):].lstrip("/")).resolve()
+        if self.file_root not in path.parents or not path.is_file():
+            raise ValueError(f"File not found: {uri}")
+        return path
+    
+    def get_metrics(self) -> dict:
+        """Return call and validation counters."""
+        calls = self.metrics["calls"]
+        return {
+            **self.metrics,
+            "validation_avg_us": round(self.metrics["validation_seconds"] / calls * 1e6, 2) if calls else 0.0,
+            "cache": {name: cache.stats() for name, cache in self.caches.items()},
+        }
     
     # Tool handlers
     
@@ -223,40 +1194,50 @@ class ToolServer:
         return TextContent(text=text)
     
     def _handle_analyze_text(self, args: dict) -> TextContent:
-        text = args["text"]
-        
-        analysis = {
-            "character_count": len(text),
-            "word_count": len(text.split()),
-            "line_count": len(text.splitlines()) or 1,
-            "has_numbers": any(c.isdigit() for c in text),
-            "has_uppercase": any(c.isupper() for c in text),
-        }
+        if "uri" in args:
+            path = self._resolve_file(args["uri"])
+            pool = self._worker_pool() if path.stat().st_size >= PARALLEL_THRESHOLD else None
+            if pool is not None:
+                stats = analyze_file_parallel(path, pool, self.workers)
+            else:
+                stats = analyze_chunks(iter_file_chunks(path))
+        elif "text" in args:
+            text = args["text"]
+            pool = self._worker_pool() if len(text) >= PARALLEL_THRESHOLD else None
+            if pool is not None:
+                stats = analyze_text_parallel(text, pool)
+            else:
+                stats = analyze_chunks(text[i:i + CHUNK_CHARS] for i in range(0, len(text), CHUNK_CHARS))
+        else:
+            raise ValueError("analyze_text needs either 'text' or 'uri'")
         
-        return TextContent(text=json.dumps(analysis, indent=2))
+        return TextContent(text=json.dumps(stats.to_analysis(), indent=2))
     
     def _handle_query_data(self, args: dict) -> TextContent:
-        table = args["table"]
-        limit = args.get("limit", 10)
-        
-        # Simulated data
-        data = {
-            "users": [
-                {"id": 1, "name": "Alice", "email": "alice@example.com"},
-                {"id": 2, "name": "Bob", "email": "bob@example.com"},
-                {"id": 3, "name": "Charlie", "email": "charlie@example.com"},
-            ],
-            "products": [
-                {"id": "p1", "name": "Widget", "price": 19.99},
-                {"id": "p2", "name": "Gadget", "price": 49.99},
-            ],
-            "orders": [
-                {"id": "o1", "user_id": 1, "total": 69.98},
-                {"id": "o2", "user_id": 2, "total": 19.99},
-            ]
-        }
+        table = self.store.table(args["table"])
+        filters = []
+        for col, condition in args.get("filters", {}).items():
+            if isinstance(condition, dict):
+                filters.extend((col, op, value) for op, value in condition.items())
+            else:
+                filters.append((col, "eq", condition))
         
-        result = data.get(table, [])[:limit]
+        if "aggregates" in args:
+            return TextContent(text=json.dumps(table.aggregate(args["aggregates"], filters), indent=2))
+        
+        result, _ = table.query(
+            filters,
+            fields=args.get("fields"),
+            order_by=args.get("order_by"),
+            descending=args.get("descending", False),
+            limit=args.get("limit", 10),
+            offset=args.get("offset", 0),
+        )
+        
+        # Oversized results come back as a first page plus nextCursor
+        paged = self.results.first_page(result)
+        if paged is not None:
+            return TextContent(text=paged)
         return TextContent(text=json.dumps(result, indent=2))
 
 
@@ -314,9 +1295,207 @@ def run_demo():
     result = server.call_tool("query_data", {"table": "users", "limit": 2})
     print(f"  → {result.text}")
     
+    # 5b. Filters, projection, sort and aggregates
+    print("\n[query_data with filters, sort and aggregates]")
+    result = server.call_tool("query_data", {
+        "table": "products", "fields": ["name", "price"],
+        "order_by": "price", "descending": True
+    })
+    print(f"  → {json.loads(result.text)}")
+    result = server.call_tool("query_data", {
+        "table": "orders", "filters": {"total": {"gt": 10}},
+        "aggregates": ["count", "sum(total)", "avg(total)"]
+    })
+    print(f"  → {json.loads(result.text)}")
+    
+    # 6. Paged result (tiny page budget to force paging)
+    print("\n[query_data with a 120-byte page budget, then fetch_more]")
+    paged_server = ToolServer(page_bytes=120)
+    pages = []
+    for _ in range(2):  # an identical call gets its own cursor, not a cached dead one
+        page = json.loads(paged_server.call_tool("query_data", {"table": "users"}).text)
+        names = [[row["name"] for row in page["items"]]]
+        while page["nextCursor"] is not None:
+            page = json.loads(paged_server.call_tool("fetch_more", {"cursor": page["nextCursor"]}).text)
+            names.append([row["name"] for row in page["items"]])
+        pages.append(names)
+    print(f"  → {pages[0]}")
+    print(f"  Identical call paged through again: {pages[1] == pages[0]}")
+    
+    # 7. Repeated deterministic call is served from the cache
+    print("\n[format_text again]")
+    result = server.call_tool("format_text", {
+        "text": "  hello world  ",
+        "operations": ["trim", "uppercase"]
+    })
+    print(f"  → {result.text} (format_text cache: {server.caches['format_text'].stats()})")
+    
+    # 8. Invalid arguments fail before reaching the handler
+    print("\n[format_text with bad arguments]")
+    try:
+        server.call_tool("format_text", {"text": "hi", "operations": ["shout"]})
+    except SchemaValidationError as e:
+        print(f"  ✗ {e}")
+    
+    print(f"\n📊 Metrics: {server.get_metrics()}")
+    
     print("\n" + "=" * 70)
     print("✅ All tools executed successfully!")
 
 
+# =============================================================================
+# Benchmark: analyze_text
+# =============================================================================
+
+def _legacy_analysis(text: str) -> dict:
+    """The original five-pass analyze_text, kept as the benchmark baseline."""
+    return {
+        "character_count": len(text),
+        "word_count": len(text.split()),
+        "line_count": len(text.splitlines()) or 1,
+        "has_numbers": any(c.isdigit() for c in text),
+        "has_uppercase": any(c.isupper() for c in text),
+    }
+
+
+def benchmark_analyze_text(sizes_mb: list[int], in_memory_limit_mb: int = 256):
+    """
+    Time the legacy analyzer against the chunked one at each input size.
+    
+    Inputs above `in_memory_limit_mb` are only analyzed from a file, since
+    the legacy version needs the whole text (and its split) in memory.
+    """
+    paragraph = ("the quick brown fox jumps over the lazy dog\n" * 20
+                 + "no digits and no capitals in this block at all\n")
+    server = ToolServer()
+    pool = server._worker_pool()
+    
+    print("=" * 70)
+    print(f"analyze_text benchmark ({server.workers} workers)")
+    print("=" * 70)
+    print(f"{'size':>8}  {'variant':<24}{'seconds':>10}{'speedup':>10}")
+    
+    def timed(fn):
+        started = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - started, result
+    
+    with tempfile.TemporaryDirectory() as root:
+        for size_mb in sizes_mb:
+            path = Path(root) / f"input_{size_mb}mb.txt"
+            block = paragraph * (CHUNK_BYTES // len(paragraph))
+            with open(path, "w") as f:
+                written = 0
+                while written < size_mb << 20:
+                    f.write(block)
+                    written += len(block)
+            
+            rows = []
+            if size_mb <= in_memory_limit_mb:
+                text = path.read_text()
+                baseline, expected = timed(lambda: _legacy_analysis(text))
+                rows.append(("legacy (5 passes)", baseline, expected))
+                rows.append(("single pass", *timed(
+                    lambda: analyze_chunks(text[i:i + CHUNK_CHARS]
+                                           for i in range(0, len(text), CHUNK_CHARS)).to_analysis())))
+                if pool is not None:
+                    rows.append(("single pass, processes", *timed(
+                        lambda: analyze_text_parallel(text, pool).to_analysis())))
+                del text
+            else:
+                baseline = None
+            
+            rows.append(("file stream", *timed(
+                lambda: analyze_chunks(iter_file_chunks(path)).to_analysis())))
+            if pool is not None:
+                rows.append(("file stream, processes", *timed(
+                    lambda: analyze_file_parallel(path, pool, server.workers).to_analysis())))
+            
+            reference = rows[0][2]
+            for variant, seconds, result in rows:
+                assert result == reference, f"{variant} disagrees: {result} != {reference}"
+                speedup = f"{baseline / seconds:.1f}x" if baseline else "-"
+                print(f"{size_mb:>6}MB  {variant:<24}{seconds:>10.3f}{speedup:>10}")
+            path.unlink()
+    
+    server.close()
+
+
+# =============================================================================
+# Benchmark: query_data
+# =============================================================================
+
+def benchmark_query_data(row_counts: list[int]):
+    """
+    Time analytical queries on the columnar store against the same
+    queries written over a list of row dicts.
+    
+    Each table is written as JSONL and CSV first, so load times from
+    both formats are reported too.
+    """
+    import random
+    
+    statuses = ["pending", "paid", "shipped", "refunded"]
+    # Each pair returns the same value, so the columnar answer can be checked
+    queries = [
+        ("count+sum+avg where status=shipped",
+         lambda rows: (lambda hits: {"count": len(hits), "sum(total)": math.fsum(hits),
+                                     "avg(total)": math.fsum(hits) / len(hits)})(
+             [r["total"] for r in rows if r["status"] == "shipped"]),
+         lambda table: table.aggregate(["count", "sum(total)", "avg(total)"], [("status", "eq", "shipped")])),
+        ("sum(total) where total > 900",
+         lambda rows: {"sum(total)": math.fsum(r["total"] for r in rows if r["total"] > 900)},
+         lambda table: table.aggregate(["sum(total)"], [("total", "gt", 900)])),
+        ("top 10 by total, 2 fields",
+         lambda rows: [{"id": r["id"], "total": r["total"]}
+                       for r in sorted(rows, key=lambda r: r["total"], reverse=True)[:10]],
+         lambda table: table.query(fields=["id", "total"], order_by="total", descending=True, limit=10)[0]),
+        ("user_id in (1..50), page 3",
+         lambda rows: (lambda ids: [r for r in rows if r["user_id"] in ids][20:30])(set(range(1, 51))),
+         lambda table: table.query([("user_id", "in", list(range(1, 51)))], limit=10, offset=20)[0]),
+    ]
+    
+    print("=" * 70)
+    print("query_data benchmark (row dicts vs columnar store)")
+    print("=" * 70)
+    
+    def timed(fn):
+        started = time.perf_counter()
+        result = fn()
+        return time.perf_counter() - started, result
+    
+    with tempfile.TemporaryDirectory() as root:
+        for count in row_counts:
+            rng = random.Random(count)
+            rows = [{"id": i, "user_id": rng.randint(1, 1000), "status": rng.choice(statuses),
+                     "total": round(rng.uniform(1, 1000), 2)} for i in range(count)]
+            jsonl, csv_path = Path(root) / "orders.jsonl", Path(root) / "orders.csv"
+            with open(jsonl, "w") as f:
+                f.writelines(json.dumps(row) + "\n" for row in rows)
+            with open(csv_path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+                writer.writeheader()
+                writer.writerows(rows)
+            
+            load_jsonl, table = timed(lambda: ColumnarTable.from_jsonl(jsonl))
+            load_csv, _ = timed(lambda: ColumnarTable.from_csv(csv_path))
+            print(f"\n{count:,} rows: load JSONL {load_jsonl:.3f}s, CSV {load_csv:.3f}s")
+            print(f"  {'query':<38}{'rows':>9}{'1st call':>10}{'columnar':>10}{'speedup':>9}")
+            
+            for label, over_rows, over_table in queries:
+                baseline, expected = timed(lambda: over_rows(rows))
+                first, result = timed(lambda: over_table(table))  # builds any index it needs
+                if result != expected:
+                    raise AssertionError(f"{label}: columnar result {result!r} != row dicts {expected!r}")
+                seconds = min(timed(lambda: over_table(table))[0] for _ in range(5))
+                print(f"  {label:<38}{baseline:>8.4f}s{first:>9.4f}s{seconds:>9.4f}s"
+                      f"{baseline / seconds:>8.1f}x")
+
+
 if __name__ == "__main__":
-    run_demo()
+    if sys.argv[1:2] == ["bench"]:
+        benchmark_analyze_text([int(arg) for arg in sys.argv[2:]] or [1, 100])
+    elif sys.argv[1:2] == ["bench-query"]:
+        benchmark_query_data([int(arg) for arg in sys.argv[2:]] or [100_000, 1_000_000])
+    else:
+        run_demo()
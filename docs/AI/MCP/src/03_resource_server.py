@@ -8,13 +8,34 @@ This example demonstrates:
 2. Dynamic resources (database simulation)
 3. Resource subscriptions
 4. Multiple MIME types
+5. Versioned content cache with conditional (ETag-style) reads
+6. Indexed db:// queries with filters, projection, ordering and cursors
+7. mmap-backed file:// reads with byte/line ranges and change watching
+8. Compiled template rendering
+9. URI-template routing (resources/templates/list)
+10. Oversized db:// results split into byte-budgeted pages
 """
 
+import base64
+import hashlib
+import html
 import json
+import mimetypes
+import mmap
+import operator
 import os
+import re
+import stat
+import tempfile
+import textwrap
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
 from dataclasses import dataclass, asdict
-from typing import Optional
+from typing import Any, Callable, Optional
 from pathlib import Path
+from urllib.parse import parse_qsl, unquote, urlsplit
 
 
 @dataclass
@@ -33,6 +54,557 @@ class ResourceContents:
     mimeType: str
     text: Optional[str] = None
     blob: Optional[str] = None  # Base64 for binary
+    etag: Optional[str] = None  # Content hash for conditional reads
+    _meta: Optional[dict] = None  # e.g. {"nextCursor": ...} for paged reads
+
+
+@dataclass
+class CachedContent:
+    """Encoded resource body kept in the content cache."""
+    mimeType: str
+    text: str
+    etag: str
+    meta: Optional[dict] = None
+
+
+# =============================================================================
+# URI Template Routing
+# =============================================================================
+
+@dataclass
+class ResourceTemplate:
+    """An MCP resource template (RFC 6570 style URI template)."""
+    uriTemplate: str
+    name: str
+    mimeType: Optional[str] = None
+    description: Optional[str] = None
+
+
+class _TrieNode:
+    __slots__ = ("literals", "variables", "target")
+    
+    def __init__(self):
+        self.literals: dict[str, "_TrieNode"] = {}
+        # (name, reserved, converter, child) in registration order
+        self.variables: list[tuple[str, bool, Callable[[str], Any], "_TrieNode"]] = []
+        self.target = None
+
+
+class UriTemplateRouter:
+    """
+    Resolves URIs against URI templates compiled into a character trie.
+    
+    Supports `{var}` (one path segment), `{+var}` (reserved expansion, may
+    span "/") and typed variables such as `{id:int}`. Literal characters
+    are preferred over variables, so `db://users/active` beats
+    `db://{table}/{filter}`. A match walks the URI once, so resolving
+    does not get slower as more templates are registered.
+    """
+    
+    CONVERTERS = {"str": str, "int": int}
+    EXPRESSION = re.compile(r"\{(\+?)(\w+)(?::(\w+))?\}")
+    
+    def __init__(self):
+        self._root = _TrieNode()
+        self.templates: list[ResourceTemplate] = []
+    
+    def add(self, template: ResourceTemplate, handler: Callable):
+        """Compile a template into the trie."""
+        node = self._root
+        pos = 0
+        source = template.uriTemplate
+        for expr in self.EXPRESSION.finditer(source):
+            node = self._add_literal(node, source[pos:expr.start()])
+            reserved, name, kind = expr.group(1) == "+", expr.group(2), expr.group(3) or "str"
+            if kind not in self.CONVERTERS:
+                raise ValueError(f"Unknown variable type '{kind}' in {source}")
+            for var in node.variables:
+                if var[:3] == (name, reserved, self.CONVERTERS[kind]):
+                    node = var[3]
+                    break
+            else:
+                child = _TrieNode()
+                node.variables.append((name, reserved, self.CONVERTERS[kind], child))
+                node = child
+            pos = expr.end()
+        node = self._add_literal(node, source[pos:])
+        
+        if node.target is not None:
+            raise ValueError(f"Duplicate resource template: {source}")
+        node.target = (template, handler)
+        self.templates.append(template)
+    
+    @staticmethod
+    def _add_literal(node: _TrieNode, text: str) -> _TrieNode:
+        for char in text:
+            node = node.literals.setdefault(char, _TrieNode())
+        return node
+    
+    def match(self, uri: str) -> Optional[tuple[ResourceTemplate, Callable, dict]]:
+        """Return (template, handler, params) for a URI, ignoring its query string."""
+        path = uri.split("?", 1)[0].split("#", 1)[0]
+        params: dict = {}
+        target = self._match(self._root, path, 0, params)
+        if target is None:
+            return None
+        template, handler = target
+        return template, handler, params
+    
+    def _match(self, node: _TrieNode, uri: str, pos: int, params: dict):
+        # Walk literal-only stretches iteratively; branch only where a node
+        # also has variable edges (literals are tried first there)
+        while True:
+            if pos == len(uri):
+                return node.target
+            child = node.literals.get(uri[pos])
+            if node.variables:
+                break
+            if child is None:
+                return None
+            node, pos = child, pos + 1
+        
+        if child is not None:
+            found = self._match(child, uri, pos + 1, params)
+            if found is not None:
+                return found
+        return self._match_variables(node, uri, pos, params)
+    
+    def _match_variables(self, node: _TrieNode, uri: str, pos: int, params: dict):
+        for name, reserved, convert, child in node.variables:
+            end = len(uri)
+            if not reserved:
+                slash = uri.find("/", pos)
+                if slash != -1:
+                    end = slash
+            # Greedy first, then shorter values that end where a literal continues
+            candidates = [end] + [i for i in range(end - 1, pos, -1) if uri[i] in child.literals]
+            for stop_at in candidates:
+                if stop_at == pos:
+                    continue
+                try:
+                    value = convert(unquote(uri[pos:stop_at]))
+                except ValueError:
+                    continue
+                params[name] = value
+                found = self._match(child, uri, stop_at, params)
+                if found is not None:
+                    return found
+                del params[name]
+        return None
+
+
+# =============================================================================
+# Table Engine (backs db:// resources)
+# =============================================================================
+
+FILTER_OPS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, options: value in options,
+}
+
+
+class Table:
+    """
+    A small in-process table with hash indexes on declared columns.
+    
+    Equality (and `in`) filters on indexed columns are answered from the
+    index; the remaining filters only look at the surviving rows.
+    """
+    
+    def __init__(self, name: str, rows: list[dict], indexes: tuple[str, ...] = ()):
+        self.name = name
+        self.rows: list[dict] = []
+        self.indexes: dict[str, dict[Any, list[int]]] = {col: {} for col in indexes}
+        for row in rows:
+            self.insert(row)
+    
+    def insert(self, row: dict):
+        """Append a row and update every index."""
+        position = len(self.rows)
+        self.rows.append(row)
+        for col, index in self.indexes.items():
+            index.setdefault(row.get(col), []).append(position)
+    
+    def query(self, filters: list[tuple[str, str, Any]] = (),
+              fields: Optional[list[str]] = None,
+              order_by: Optional[str] = None, descending: bool = False,
+              limit: Optional[int] = None, offset: int = 0) -> tuple[list[dict], int]:
+        """
+        Run a query and return (page of rows, total matching rows).
+        
+        Filters are (column, op, value) triples with op from FILTER_OPS.
+        """
+        if limit is not None and limit < 0:
+            raise ValueError(f"limit must not be negative: {limit}")
+        positions: Optional[set[int]] = None
+        residual = []
+        
+        for col, op, value in filters:
+            if col in self.indexes and op in ("eq", "in"):
+                keys = value if op == "in" else [value]
+                hits = set()
+                try:
+                    for key in keys:
+                        hits.update(self.indexes[col].get(key, ()))
+                except TypeError:
+                    raise ValueError(f"Filter {op!r} on {col} needs scalar values")
+                positions = hits if positions is None else positions & hits
+            else:
+                residual.append((col, FILTER_OPS[op], value))
+        
+        if positions is None:
+            rows = self.rows
+        else:
+            rows = [self.rows[i] for i in sorted(positions)]
+        
+        if residual:
+            rows = [r for r in rows if all(self._match(r.get(col), fn, value)
+                                           for col, fn, value in residual)]
+        
+        if order_by is not None:
+            # Rows missing the column sort last regardless of direction
+            present = [r for r in rows if r.get(order_by) is not None]
+            missing = [r for r in rows if r.get(order_by) is None]
+            rows = sorted(present, key=lambda r: r[order_by], reverse=descending) + missing
+        
+        total = len(rows)
+        end = None if limit is None else offset + limit
+        page = rows[offset:end]
+        
+        if fields:
+            page = [{f: r[f] for f in fields if f in r} for r in page]
+        
+        return page, total
+    
+    @staticmethod
+    def _match(actual: Any, fn, expected: Any) -> bool:
+        if actual is None:
+            return False
+        try:
+            return fn(actual, expected)
+        except TypeError:
+            return False
+
+
+def _coerce(value: str) -> Any:
+    """Interpret a query-string value as JSON when possible (2, true, null)."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _encode_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(str(offset).encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        offset = int(base64.urlsafe_b64decode(padded).decode())
+    except ValueError:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if offset < 0:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return offset
+
+
+# =============================================================================
+# Templates (backs template:// resources)
+# =============================================================================
+
+DEFAULT_TEMPLATES = {
+    "email/welcome": {
+        "mimeType": "text/html",
+        "content": """<!DOCTYPE html>
+<html>
+<head><title>Welcome!</title></head>
+<body>
+    <h1>Welcome to Our Platform!</h1>
+    <p>Hello {{username}},</p>
+    <p>Thank you for joining us.</p>
+</body>
+</html>"""
+    },
+    "report/summary": {
+        "mimeType": "text/markdown",
+        "content": """# Summary Report
+
+## Overview
+Generated on: {{date}}
+
+## Metrics
+- Total Users: {{user_count}}
+- Active Sessions: {{session_count}}
+
+## Recommendations
+1. Review inactive accounts
+2. Optimize database queries
+"""
+    }
+}
+
+
+class CompiledTemplate:
+    """
+    A {{variable}} template split once into literals and placeholders.
+    
+    Rendering is a single join; values are HTML-escaped for text/html.
+    """
+    
+    PLACEHOLDER = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+    
+    def __init__(self, source: str, escape_html: bool = False):
+        pieces = self.PLACEHOLDER.split(source)
+        self.literals = pieces[0::2]
+        self.names = pieces[1::2]
+        self.variables = frozenset(self.names)
+        self.escape = html.escape if escape_html else str
+    
+    def render(self, variables: dict) -> str:
+        missing = self.variables - variables.keys()
+        if missing:
+            raise ValueError(f"Missing template variables: {', '.join(sorted(missing))}")
+        
+        escape = self.escape
+        out = [self.literals[0]]
+        for name, literal in zip(self.names, self.literals[1:]):
+            out.append(escape(str(variables[name])))
+            out.append(literal)
+        return "".join(out)
+
+
+# =============================================================================
+# File Provider (backs file:// resources)
+# =============================================================================
+
+TEXT_MIME_TYPES = {"application/json", "application/xml", "application/javascript",
+                   "application/x-sh", "application/yaml"}
+
+
+class FileResourceProvider:
+    """
+    Serves file:// resources from a root directory.
+    
+    URIs are relative to the root (file://logs/app.log). Reads go through
+    mmap, so `?bytes=0-4095` or `?lines=100-200` page through large files
+    without loading them. Binary files are only returned as base64 blobs
+    when asked for with `?encoding=base64`.
+    """
+    
+    LINE_CHECKPOINT = 1024  # remember the offset of every Nth line
+    
+    def __init__(self, root: str, max_read_bytes: int = 1 << 20, max_indexed_files: int = 256):
+        self.root = Path(root).resolve()
+        self.max_read_bytes = max_read_bytes
+        self.max_indexed_files = max_indexed_files
+        # path -> (mtime_ns, size, [offset of line 1, line N+1, line 2N+1, ...]), LRU
+        self._line_checkpoints: OrderedDict[Path, tuple[int, int, list[int]]] = OrderedDict()
+    
+    def resolve(self, uri: str) -> Path:
+        """Map a file:// URI to a path inside the root, rejecting traversal."""
+        return self.locate(uri)[0]
+    
+    def locate(self, uri: str) -> tuple[Path, os.stat_result]:
+        """resolve() and the file's stat, taken once for a whole read."""
+        relative = unquote(urlsplit(uri)._replace(scheme="", query="").geturl().lstrip("/"))
+        path = (self.root / relative).resolve()
+        if path != self.root and self.root not in path.parents:
+            raise ValueError(f"Path escapes resource root: {uri}")
+        try:
+            info = path.stat()
+        except OSError:
+            info = None
+        if info is None or not stat.S_ISREG(info.st_mode):
+            raise ValueError(f"File not found: {uri}")
+        return path, info
+    
+    def list_resources(self, limit: int = 100) -> list[Resource]:
+        """List files under the root (first `limit` entries)."""
+        resources = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in sorted(filenames):
+                relative = (Path(dirpath) / filename).relative_to(self.root).as_posix()
+                resources.append(Resource(
+                    uri=f"file://{relative}",
+                    name=filename,
+                    mimeType=self.mime_type(Path(dirpath) / filename)
+                ))
+                if len(resources) >= limit:
+                    return resources
+        return resources
+    
+    @staticmethod
+    def mime_type(path: Path) -> str:
+        guessed, _ = mimetypes.guess_type(path.name)
+        return guessed or "application/octet-stream"
+    
+    @staticmethod
+    def etag(info: os.stat_result, query: str = "") -> str:
+        """Cheap validator from file metadata (a stat result); no content hashing needed."""
+        return f"{info.st_mtime_ns:x}-{info.st_size:x}-{zlib.crc32(query.encode()):x}"
+    
+    def read(self, uri: str, located: Optional[tuple[Path, os.stat_result]] = None) -> ResourceContents:
+        """
+        Read a whole file or a byte/line range of it, with its etag.
+        
+        Pass the result of locate() as `located` to reuse its stat.
+        """
+        path, info = located or self.locate(uri)
+        query = urlsplit(uri).query
+        params = dict(parse_qsl(query))
+        mime = self.mime_type(path)
+        
+        with open(path, "rb") as f:
+            size = info.st_size
+            # mmap cannot map an empty file
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            try:
+                if "lines" in params:
+                    first, last = self._parse_range(params["lines"], default_end=None)
+                    start = self._line_offset(path, info, view, max(first, 1))
+                    end = self._line_offset(path, info, view, last + 1) if last else size
+                    meta = {"size": size, "lines": [first, last]}
+                else:
+                    first, last = self._parse_range(params.get("bytes", "0-"),
+                                                    default_end=max(size - 1, 0))
+                    start, end = first, min(last + 1, size)
+                    meta = {"size": size}
+                
+                if end - start > self.max_read_bytes:
+                    end = start + self.max_read_bytes
+                    meta["truncated"] = True
+                    meta["nextByte"] = end
+                if "lines" not in params:
+                    meta["bytes"] = [start, end - 1]
+                data = view[start:end]
+                
+                textual = mime.startswith("text/") or mime in TEXT_MIME_TYPES
+                if mime == "application/octet-stream":
+                    binary = b"\0" in view[:min(size, 1024)]
+                else:
+                    binary = not textual
+            finally:
+                if size:
+                    view.close()
+        
+        etag = self.etag(info, query)
+        if binary or params.get("encoding") == "base64":
+            if params.get("encoding") != "base64":
+                raise ValueError(f"Binary file, request it with ?encoding=base64: {uri}")
+            return ResourceContents(uri=uri, mimeType=mime, etag=etag,
+                                    blob=base64.b64encode(data).decode("ascii"), _meta=meta)
+        
+        return ResourceContents(uri=uri, mimeType=mime, etag=etag,
+                                text=data.decode("utf-8", errors="replace"), _meta=meta)
+    
+    @staticmethod
+    def _parse_range(spec: str, default_end: Optional[int]) -> tuple[int, Optional[int]]:
+        """Parse "start-end" (inclusive), "start-" or "start"."""
+        start, sep, end = spec.partition("-")
+        try:
+            first = int(start) if start else 0
+            last = int(end) if end else (default_end if sep else first)
+        except ValueError:
+            raise ValueError(f"Invalid range: {spec}")
+        if first < 0 or (last is not None and last < first):
+            raise ValueError(f"Invalid range: {spec}")
+        return first, last
+    
+    def _line_offset(self, path: Path, info: os.stat_result, view, line: int) -> int:
+        """Byte offset where 1-based `line` starts (size if past the end)."""
+        size = info.st_size
+        cached = self._line_checkpoints.get(path)
+        if cached is None or cached[:2] != (info.st_mtime_ns, size):
+            cached = (info.st_mtime_ns, size, [0])
+            self._line_checkpoints[path] = cached
+            if len(self._line_checkpoints) > self.max_indexed_files:
+                self._line_checkpoints.popitem(last=False)
+        else:
+            self._line_checkpoints.move_to_end(path)
+        checkpoints = cached[2]
+        
+        # Resume from the closest checkpoint at or before the wanted line
+        slot = min((line - 1) // self.LINE_CHECKPOINT, len(checkpoints) - 1)
+        current_line = slot * self.LINE_CHECKPOINT + 1
+        offset = checkpoints[slot]
+        
+        while current_line < line and offset < size:
+            newline = view.find(b"\n", offset)
+            offset = size if newline == -1 else newline + 1
+            current_line += 1
+            if (current_line - 1) % self.LINE_CHECKPOINT == 0 \
+                    and (current_line - 1) // self.LINE_CHECKPOINT == len(checkpoints):
+                checkpoints.append(offset)
+        return offset
+
+
+class FileWatcher:
+    """
+    Polls watched files and reports changes through a callback.
+    
+    Uses stat() polling so it works everywhere without extra dependencies;
+    an inotify/kqueue backend could replace `_poll` on platforms that have one.
+    A file that disappears is reported once, like any other change.
+    """
+    
+    def __init__(self, callback: Callable[[Path], None], interval: float = 1.0):
+        self.callback = callback
+        self.interval = interval
+        self._watched: dict[Path, Optional[tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def watch(self, path: Path):
+        with self._lock:
+            self._watched[path] = self._signature(path)
+            if self._thread is None:
+                # Each polling thread gets its own event, so watch() after stop() starts afresh
+                self._stop = threading.Event()
+                self._thread = threading.Thread(target=self._run, args=(self._stop,),
+                                                name="file-watcher", daemon=True)
+                self._thread.start()
+    
+    def unwatch(self, path: Path):
+        with self._lock:
+            self._watched.pop(path, None)
+    
+    def stop(self):
+        """Stop polling; a later watch() starts it again."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+    
+    @staticmethod
+    def _signature(path: Path) -> Optional[tuple[int, int]]:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+    
+    def _run(self, stop: threading.Event):
+        while not stop.wait(self.interval):
+            self._poll()
+    
+    def _poll(self):
+        with self._lock:
+            watched = list(self._watched.items())
+        for path, previous in watched:
+            current = self._signature(path)
+            if current != previous:
+                with self._lock:
+                    if path in self._watched:
+                        self._watched[path] = current
+                self.callback(path)
 
 
 class ResourceServer:
@@ -44,12 +616,64 @@ class ResourceServer:
     - config:// - Configuration data
     - db:// - Database queries
     - api:// - API responses
+    
+    Encoded contents are cached per (uri, store version). Mutating a
+    store bumps its version, so stale entries are never served.
     """
     
-    def __init__(self):
+    def __init__(self, indent: Optional[int] = None, max_cache_entries: int = 256,
+                 file_root: Optional[str] = None, watch_interval: float = 1.0,
+                 page_bytes: int = 64 * 1024):
         self.name = "resource-demo-server"
         self.version = "1.0.0"
+        # db:// reads larger than this return a page plus _meta.nextCursor
+        self.page_bytes = page_bytes
         self.subscriptions: set[str] = set()
+        self._file_subscriptions: dict[str, Path] = {}  # file:// URI -> watched path
+        
+        # Outgoing notifications (notifications/resources/updated) go to
+        # on_notification when set; otherwise the most recent are kept here
+        self.notifications: deque[dict] = deque(maxlen=1000)
+        self.on_notification: Optional[Callable[[dict], None]] = None
+        
+        self._templates: dict[str, dict] = dict(DEFAULT_TEMPLATES)
+        self._compiled_templates: dict[tuple[str, int], CompiledTemplate] = {}
+        
+        self._files = FileResourceProvider(file_root) if file_root else None
+        self._watcher = FileWatcher(self._on_file_changed, watch_interval) if file_root else None
+        
+        self._router = UriTemplateRouter()
+        self._router.add(ResourceTemplate(
+            "config://{key}", "Configuration section", "application/json"
+        ), self._read_config)
+        self._router.add(ResourceTemplate(
+            "db://{table}", "Table query", "application/json",
+            "Rows of a table; supports ?col=value, col__gte=..., fields=, order=, limit=, cursor="
+        ), self._read_database)
+        self._router.add(ResourceTemplate(
+            "db://{table}/{filter}", "Filtered table", "application/json",
+            "Rows matching a named filter (active)"
+        ), self._read_database)
+        self._router.add(ResourceTemplate(
+            "api://{endpoint}", "API endpoint", "application/json"
+        ), self._read_api)
+        self._router.add(ResourceTemplate(
+            "template://{+path}", "Template", None,
+            "Raw template, or rendered with ?variable=value"
+        ), self._read_template)
+        if self._files is not None:
+            # Reads are routed here too, but skip the content cache
+            self._router.add(ResourceTemplate(
+                "file://{+path}", "File", None,
+                "File under the resource root; supports ?bytes=, ?lines=, ?encoding=base64"
+            ), self._read_file)
+        
+        # JSON pretty-printing only costs tokens for LLM clients; off by default
+        self.indent = indent
+        self.max_cache_entries = max_cache_entries
+        self._versions: dict[str, int] = {"config": 0, "db": 0, "api": 0, "template": 0}
+        self._content_cache: OrderedDict[tuple[str, int], CachedContent] = OrderedDict()
+        self.cache_stats = {"hits": 0, "misses": 0, "not_modified": 0}
         
         # Simulated data stores
         self._config = {
@@ -67,16 +691,16 @@ class ResourceServer:
         }
         
         self._database = {
-            "users": [
+            "users": Table("users", [
                 {"id": 1, "username": "alice", "role": "admin", "active": True},
                 {"id": 2, "username": "bob", "role": "user", "active": True},
                 {"id": 3, "username": "charlie", "role": "user", "active": False},
-            ],
-            "settings": [
+            ], indexes=("id", "role", "active")),
+            "settings": Table("settings", [
                 {"key": "theme", "value": "dark"},
                 {"key": "language", "value": "en"},
                 {"key": "notifications", "value": "true"},
-            ]
+            ], indexes=("key",))
         }
     
     def list_resources(self) -> list[dict]:
@@ -101,7 +725,7 @@ class ResourceServer:
                 uri="db://users",
                 name="Users Table",
                 mimeType="application/json",
-                description="All user records"
+                description="User records (?role=user&id__gte=2&fields=id,username&order=-id&limit=10)"
             ),
             Resource(
                 uri="db://users/active",
@@ -139,74 +763,322 @@ class ResourceServer:
             ),
         ]
         
+        for path, template in self._templates.items():
+            if path not in DEFAULT_TEMPLATES:
+                resources.append(Resource(
+                    uri=f"template://{path}",
+                    name=path,
+                    mimeType=template["mimeType"]
+                ))
+        
+        if self._files is not None:
+            resources.extend(self._files.list_resources())
+        
         return [asdict(r) for r in resources]
     
-    def read_resource(self, uri: str) -> dict:
-        """Read a resource and return its contents."""
-        
-        if uri.startswith("config://"):
-            return self._read_config(uri)
-        elif uri.startswith("db://"):
-            return self._read_database(uri)
-        elif uri.startswith("api://"):
-            return self._read_api(uri)
-        elif uri.startswith("template://"):
-            return self._read_template(uri)
+    def read_resource(self, uri: str, if_none_match: Optional[str] = None) -> dict:
+        """
+        Read a resource and return its contents.
+        
+        If `if_none_match` equals the current etag of the resource, a small
+        not-modified result is returned instead of the full body.
+        """
+        if uri.startswith("file://"):
+            # Validated by file metadata, not cached
+            if self._files is None:
+                raise ValueError("No file root configured")
+            located = self._files.locate(uri)
+            etag = self._files.etag(located[1], urlsplit(uri).query)
+            if if_none_match is not None and if_none_match == etag:
+                self.cache_stats["not_modified"] += 1
+                return {"uri": uri, "etag": etag, "notModified": True}
+            return asdict(self._files.read(uri, located))
+        
+        key = (uri, self._versions.get(self._scheme(uri), 0))
+        cached = self._content_cache.get(key)
+        
+        if cached is None:
+            self.cache_stats["misses"] += 1
+            contents = self._read_uncached(uri)
+            cached = CachedContent(
+                mimeType=contents.mimeType,
+                text=contents.text,
+                etag=self._etag(contents.text),
+                meta=contents._meta
+            )
+            self._content_cache[key] = cached
+            if len(self._content_cache) > self.max_cache_entries:
+                self._content_cache.popitem(last=False)
         else:
+            self.cache_stats["hits"] += 1
+            self._content_cache.move_to_end(key)
+        
+        if if_none_match is not None and if_none_match == cached.etag:
+            self.cache_stats["not_modified"] += 1
+            return {"uri": uri, "etag": cached.etag, "notModified": True}
+        
+        return asdict(ResourceContents(
+            uri=uri,
+            mimeType=cached.mimeType,
+            text=cached.text,
+            etag=cached.etag,
+            _meta=cached.meta
+        ))
+    
+    def _read_uncached(self, uri: str) -> ResourceContents:
+        """Route a read to the handler of the matching URI template."""
+        matched = self._router.match(uri)
+        if matched is None:
             raise ValueError(f"Unknown resource URI: {uri}")
+        
+        _, handler, params = matched
+        return handler(uri, **params)
+    
+    def list_resource_templates(self) -> list[dict]:
+        """Return the URI templates this server resolves (resources/templates/list)."""
+        return [asdict(t) for t in self._router.templates]
+    
+    def update_config(self, key: str, value: dict):
+        """Replace a configuration section."""
+        self._config[key] = value
+        self._bump("config", f"config://{key}")
+    
+    def insert_row(self, table: str, row: dict):
+        """Append a row to a database table."""
+        if table not in self._database:
+            self._database[table] = Table(table, [])
+        self._database[table].insert(row)
+        self._bump("db", f"db://{table}")
+    
+    def render_template(self, uri: str, variables: dict) -> dict:
+        """Render a template:// resource with the given variables."""
+        matched = self._router.match(uri)
+        path = matched[2].get("path") if matched else None
+        if path not in self._templates:
+            raise ValueError(f"Template not found: {path}")
+        
+        return asdict(ResourceContents(
+            uri=uri,
+            mimeType=self._templates[path]["mimeType"],
+            text=self._compiled_template(path).render(variables)
+        ))
+    
+    def load_templates(self, directory: str):
+        """Load templates from a directory; the key is the path minus extension."""
+        root = Path(directory)
+        loaded = []
+        for file in sorted(root.rglob("*")):
+            if file.is_file():
+                key = file.relative_to(root).with_suffix("").as_posix()
+                self._templates[key] = {
+                    "mimeType": mimetypes.guess_type(file.name)[0] or "text/plain",
+                    "content": file.read_text(encoding="utf-8")
+                }
+                loaded.append(f"template://{key}")
+        self._bump("template", *loaded)
     
     def subscribe(self, uri: str) -> dict:
         """Subscribe to resource changes."""
+        if uri.startswith("file://"):
+            if self._files is None:
+                raise ValueError("No file root configured")
+            path = self._files.resolve(uri)
+            self._watcher.watch(path)
+            self._file_subscriptions[uri] = path
         self.subscriptions.add(uri)
         return {"subscribed": True, "uri": uri}
     
     def unsubscribe(self, uri: str) -> dict:
-        """Unsubscribe from resource changes."""
+        """Unsubscribe from resource changes (also once the file is gone)."""
         self.subscriptions.discard(uri)
+        path = self._file_subscriptions.pop(uri, None)
+        if path is not None and path not in self._file_subscriptions.values():
+            self._watcher.unwatch(path)
         return {"subscribed": False, "uri": uri}
     
+    def close(self):
+        """Stop background watchers."""
+        if self._watcher is not None:
+            self._watcher.stop()
+    
+    # Notifications
+    
+    def _notify_updated(self, uri: str):
+        notification = {
+            "jsonrpc": "2.0",
+            "method": "notifications/resources/updated",
+            "params": {"uri": uri}
+        }
+        if self.on_notification is not None:
+            self.on_notification(notification)
+        else:
+            self.notifications.append(notification)
+    
+    def _on_file_changed(self, path: Path):
+        """Watcher callback: notify every subscription on the changed (or deleted) file."""
+        for uri, watched in list(self._file_subscriptions.items()):
+            if watched == path:
+                self._notify_updated(uri)
+    
+    # Cache helpers
+    
+    @staticmethod
+    def _scheme(uri: str) -> str:
+        return uri.split("://", 1)[0]
+    
+    @staticmethod
+    def _etag(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+    
+    def _bump(self, store: str, *changed: str):
+        """
+        Advance a store's version and drop its now-stale cache entries.
+        
+        Subscribers are notified when they watch one of the `changed`
+        URIs or a URI derived from one (db://users/active and
+        db://users?role=user both follow db://users).
+        """
+        self._versions[store] = self._versions.get(store, 0) + 1
+        prefix = f"{store}://"
+        for key in [k for k in self._content_cache if k[0].startswith(prefix)]:
+            del self._content_cache[key]
+        if store == "template":
+            self._compiled_templates.clear()
+        
+        changed_params = [matched[2] for matched in map(self._router.match, changed) if matched]
+        for uri in list(self.subscriptions):
+            if not uri.startswith(prefix):
+                continue
+            if uri in changed or self._derived_from(uri, changed_params):
+                self._notify_updated(uri)
+    
+    def _derived_from(self, uri: str, changed_params: list[dict]) -> bool:
+        """Whether `uri` resolves with all the variables of a changed URI."""
+        matched = self._router.match(uri)
+        if matched is None:
+            return False
+        params = matched[2]
+        return any(changed and all(params.get(name) == value for name, value in changed.items())
+                   for changed in changed_params)
+    
+    def _encode(self, data) -> str:
+        """Serialize JSON, compact unless an indent was requested."""
+        if self.indent is None:
+            return json.dumps(data, separators=(",", ":"))
+        return json.dumps(data, indent=self.indent)
+    
+    def _encode_rows(self, rows: list[dict], fields: Optional[list[str]],
+                     budget: int) -> tuple[str, int]:
+        """
+        Encode rows one at a time until the byte budget is reached.
+        
+        Produces the same text as _encode(rows) when everything fits, and
+        never builds the encoding of rows that will not be sent. Returns
+        the text and the number of rows included (always at least one).
+        """
+        parts: list[str] = []
+        size = 2
+        for row in rows:
+            if fields:
+                row = {f: row[f] for f in fields if f in row}
+            part = self._encode(row)
+            if parts and size + len(part) + 2 > budget:
+                break
+            parts.append(part)
+            size += len(part) + 2
+        
+        if not parts:
+            return "[]", 0
+        if self.indent is None:
+            return "[" + ",".join(parts) + "]", len(parts)
+        pad = " " * self.indent
+        return "[\n" + ",\n".join(textwrap.indent(p, pad) for p in parts) + "\n]", len(parts)
+    
     # Resource handlers
     
-    def _read_config(self, uri: str) -> dict:
+    def _read_config(self, uri: str, key: str) -> ResourceContents:
         """Read configuration resource."""
-        key = uri.replace("config://", "")
-        
         if key not in self._config:
             raise ValueError(f"Config not found: {key}")
         
-        return asdict(ResourceContents(
+        return ResourceContents(
             uri=uri,
             mimeType="application/json",
-            text=json.dumps(self._config[key], indent=2)
-        ))
+            text=self._encode(self._config[key])
+        )
     
-    def _read_database(self, uri: str) -> dict:
-        """Read database resource."""
-        path = uri.replace("db://", "")
-        parts = path.split("/")
-        table = parts[0]
+    def _read_database(self, uri: str, table: str, filter: Optional[str] = None) -> ResourceContents:
+        """
+        Read database resource.
         
+        Query-string parameters:
+        - `col=value` or `col__op=value` filters (op: eq, ne, gt, gte, lt, lte, in)
+        - `fields=a,b` projection
+        - `order=col` / `order=-col` ordering
+        - `limit=n` and `cursor=...` pagination
+        """
         if table not in self._database:
             raise ValueError(f"Table not found: {table}")
         
-        data = self._database[table]
+        db_table = self._database[table]
+        filters: list[tuple[str, str, Any]] = []
+        fields = None
+        order_by = None
+        descending = False
+        limit = None
+        offset = 0
         
-        # Apply filters
-        if len(parts) > 1:
-            filter_key = parts[1]
-            if filter_key == "active":
-                data = [r for r in data if r.get("active", True)]
+        # Legacy path filter: db://users/active
+        if filter is not None:
+            if filter != "active":
+                raise ValueError(f"Unknown filter: {filter}")
+            filters.append(("active", "eq", True))
         
-        return asdict(ResourceContents(
+        for key, value in parse_qsl(urlsplit(uri).query):
+            if key == "fields":
+                fields = [f for f in value.split(",") if f]
+            elif key == "order":
+                descending = value.startswith("-")
+                order_by = value.lstrip("-")
+            elif key == "limit":
+                limit = int(value)
+            elif key == "cursor":
+                offset = _decode_cursor(value)
+            else:
+                col, _, op = key.partition("__")
+                op = op or "eq"
+                if op not in FILTER_OPS:
+                    raise ValueError(f"Unknown filter operator: {op}")
+                if op == "in":
+                    filters.append((col, op, [_coerce(v) for v in value.split(",")]))
+                else:
+                    filters.append((col, op, _coerce(value)))
+        
+        # Projection happens while encoding, so only sent rows are copied
+        rows, total = db_table.query(filters, None, order_by, descending, limit, offset)
+        if offset > total:
+            raise ValueError(f"Invalid cursor: offset {offset} is past the {total} matching rows")
+        text, sent = self._encode_rows(rows, fields, self.page_bytes)
+        
+        meta = None
+        if limit is not None or sent < len(rows):
+            meta = {"total": total}
+            if offset + sent < total:
+                meta["nextCursor"] = _encode_cursor(offset + sent)
+        
+        return ResourceContents(
             uri=uri,
             mimeType="application/json",
-            text=json.dumps(data, indent=2)
-        ))
+            text=text,
+            _meta=meta
+        )
     
-    def _read_api(self, uri: str) -> dict:
+    def _read_file(self, uri: str, path: str) -> ResourceContents:
+        """Read file resource (etag from file metadata)."""
+        return self._files.read(uri)
+    
+    def _read_api(self, uri: str, endpoint: str) -> ResourceContents:
         """Read API resource (simulated)."""
-        endpoint = uri.replace("api://", "")
-        
         if endpoint == "status":
             data = {
                 "status": "healthy",
@@ -221,56 +1093,42 @@ class ResourceServer:
         else:
             raise ValueError(f"Unknown API endpoint: {endpoint}")
         
-        return asdict(ResourceContents(
+        return ResourceContents(
             uri=uri,
             mimeType="application/json",
-            text=json.dumps(data, indent=2)
-        ))
+            text=self._encode(data)
+        )
     
-    def _read_template(self, uri: str) -> dict:
-        """Read template resource."""
-        path = uri.replace("template://", "")
-        
-        templates = {
-            "email/welcome": {
-                "mimeType": "text/html",
-                "content": """<!DOCTYPE html>
-<html>
-<head><title>Welcome!</title></head>
-<body>
-    <h1>Welcome to Our Platform!</h1>
-    <p>Hello {{username}},</p>
-    <p>Thank you for joining us.</p>
-</body>
-</html>"""
-            },
-            "report/summary": {
-                "mimeType": "text/markdown",
-                "content": """# Summary Report
-
-## Overview
-Generated on: {{date}}
-
-## Metrics
-- Total Users: {{user_count}}
-- Active Sessions: {{session_count}}
-
-## Recommendations
-1. Review inactive accounts
-2. Optimize database queries
-"""
-            }
-        }
-        
-        if path not in templates:
+    def _read_template(self, uri: str, path: str) -> ResourceContents:
+        """Read template resource (rendered when variables are given)."""
+        if path not in self._templates:
             raise ValueError(f"Template not found: {path}")
         
-        template = templates[path]
-        return asdict(ResourceContents(
+        template = self._templates[path]
+        variables = dict(parse_qsl(urlsplit(uri).query))
+        if variables:
+            # template://email/welcome?username=bob renders in one read
+            text = self._compiled_template(path).render(variables)
+        else:
+            text = template["content"]
+        
+        return ResourceContents(
             uri=uri,
             mimeType=template["mimeType"],
-            text=template["content"]
-        ))
+            text=text
+        )
+    
+    def _compiled_template(self, path: str) -> "CompiledTemplate":
+        key = (path, self._versions["template"])
+        compiled = self._compiled_templates.get(key)
+        if compiled is None:
+            template = self._templates[path]
+            compiled = CompiledTemplate(
+                template["content"],
+                escape_html=template["mimeType"] == "text/html"
+            )
+            self._compiled_templates[key] = compiled
+        return compiled
 
 
 # =============================================================================
@@ -280,7 +1138,7 @@ Generated on: {{date}}
 def run_demo():
     """Demonstrate the resource server."""
     
-    server = ResourceServer()
+    server = ResourceServer(indent=2)
     
     print("=" * 70)
     print("MCP Resource Server Demo")
@@ -293,6 +1151,12 @@ def run_demo():
         print(f"  [{resource['mimeType']:20}] {resource['uri']}")
         print(f"                         └─ {resource.get('description', '')}")
     
+    # Resource templates
+    print("\n🧩 Resource Templates:")
+    print("-" * 50)
+    for template in server.list_resource_templates():
+        print(f"  {template['uriTemplate']}")
+    
     # Read resources
     print("\n" + "=" * 70)
     print("📖 Reading Resources")
@@ -313,16 +1177,31 @@ def run_demo():
     result = server.read_resource("db://users/active")
     print(result["text"])
     
-    # 4. API status
+    # 4. Indexed query with projection and cursor pagination
+    uri = "db://users?role=user&fields=id,username&order=-id&limit=1"
+    print(f"\n[{uri}]")
+    result = server.read_resource(uri)
+    print(result["text"], result["_meta"])
+    
+    next_uri = f"{uri}&cursor={result['_meta']['nextCursor']}"
+    result = server.read_resource(next_uri)
+    print(result["text"], result["_meta"])
+    
+    # 5. API status
     print("\n[api://status]")
     result = server.read_resource("api://status")
     print(result["text"])
     
-    # 5. Template
+    # 6. Template
     print("\n[template://report/summary]")
     result = server.read_resource("template://report/summary")
     print(result["text"])
     
+    # 7. Rendered template (compiled once, values HTML-escaped)
+    print("\n[render template://email/welcome]")
+    result = server.render_template("template://email/welcome", {"username": "<Bob>"})
+    print(result["text"])
+    
     # Subscriptions
     print("\n" + "=" * 70)
     print("🔔 Resource Subscriptions")
@@ -334,6 +1213,59 @@ def run_demo():
     
     print(f"\nActive subscriptions: {server.subscriptions}")
     
+    # Conditional reads
+    print("\n" + "=" * 70)
+    print("🗃️  Cached & Conditional Reads")
+    print("=" * 70)
+    
+    etag = server.read_resource("config://app")["etag"]
+    print(f"\nconfig://app etag: {etag}")
+    result = server.read_resource("config://app", if_none_match=etag)
+    print(f"  Re-read with matching etag → {result}")
+    
+    server.update_config("app", {**server._config["app"], "debug": True})
+    result = server.read_resource("config://app", if_none_match=etag)
+    print(f"  After update → new etag {result['etag']} (full body returned)")
+    print(f"  Cache stats: {server.cache_stats}")
+    
+    # File resources
+    print("\n" + "=" * 70)
+    print("📁 File Resources (mmap ranged reads + watching)")
+    print("=" * 70)
+    
+    with tempfile.TemporaryDirectory() as root:
+        log_path = Path(root) / "logs" / "app.log"
+        log_path.parent.mkdir()
+        log_path.write_text("".join(f"line {i}: request ok\n" for i in range(1, 5001)))
+        (Path(root) / "logo.png").write_bytes(b"\x89PNG\r\n\x1a\n" + bytes(16))
+        
+        files = ResourceServer(file_root=root, watch_interval=0.05)
+        
+        result = files.read_resource("file://logs/app.log?lines=2500-2502")
+        print(f"\n[file://logs/app.log?lines=2500-2502] {result['_meta']}")
+        print(result["text"], end="")
+        
+        result = files.read_resource("file://logs/app.log?bytes=0-15")
+        print(f"\n[file://logs/app.log?bytes=0-15] {result['text']!r}")
+        
+        result = files.read_resource("file://logo.png?encoding=base64")
+        print(f"\n[file://logo.png?encoding=base64] blob={result['blob'][:16]}...")
+        
+        for uri in ("file://logo.png", "file://../etc/passwd"):
+            try:
+                files.read_resource(uri)
+            except ValueError as e:
+                print(f"\n[{uri}] rejected: {e}")
+        
+        files.subscribe("file://logs/app.log")
+        with open(log_path, "a") as f:
+            f.write("line 5001: appended\n")
+        deadline = time.monotonic() + 2
+        while not files.notifications and time.monotonic() < deadline:
+            time.sleep(0.01)
+        print(f"\nAfter append → {list(files.notifications)}")
+        files.close()
+    
     print("\n" + "=" * 70)
     print("✅ Resource demo complete!")
 
@@ -7,13 +7,50 @@ This example shows:
 1. Defining a tool with `_meta.ui.resourceUri`
 2. Implementing the `resources/read` endpoint to serve HTML
 3. Simulating the client/host flow of discovering and fetching the UI
+4. Progress notifications and cancellation for long-running tools
+5. Resource templates resolved through a URI-template trie
+6. Per-method/per-tool latency histograms as a resource and Prometheus text
+7. UI resources pre-rendered once per version, with conditional and gzip reads
 """
 
+import base64
+import gzip
+import hashlib
+import importlib.util
 import json
 import sys
+import threading
+import time
+from collections import deque
 from dataclasses import dataclass, asdict
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Callable
 
+
+SRC_DIR = Path(__file__).resolve().parent
+
+
+def _load_example(filename: str):
+    """Import a sibling numbered example file as a module."""
+    spec = importlib.util.spec_from_file_location(f"example_{Path(filename).stem}", SRC_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Progress reporting and cancellation for tool calls work as in 01
+simple_server = _load_example("01_simple_server.py")
+RequestCancelled = simple_server.RequestCancelled
+ToolContext = simple_server.ToolContext
+ToolRunner = simple_server.ToolRunner
+_accepts_context = simple_server._accepts_context
+
+# Resource templates resolve through 03's URI-template trie
+resource_server = _load_example("03_resource_server.py")
+ResourceTemplate = resource_server.ResourceTemplate
+UriTemplateRouter = resource_server.UriTemplateRouter
+
+
 # =============================================================================
 # Core MCP Server Logic (Enhanced with Resources)
 # =============================================================================
@@ -32,59 +69,454 @@ class Resource:
     uri: str
     name: str
     mimeType: str
+    _meta: Optional[dict] = None  # e.g. {"contentHash": ...} for cacheable UI
 
 @dataclass
 class ResourceContent:
     """Content of a resource."""
     uri: str
     mimeType: str
-    text: str
+    text: Optional[str] = None
+    blob: Optional[str] = None  # Base64, e.g. a gzip-compressed bundle
+    _meta: Optional[dict] = None
+
+
+def _without_none(obj) -> dict:
+    return {k: v for k, v in asdict(obj).items() if v is not None}
+
+
+class PrerenderedResource:
+    """
+    A resource body rendered and encoded once per version.
+    
+    The text response, its content hash and (for bodies of at least
+    `compress_min_bytes`) a gzip+base64 blob are all built up front, so a
+    read only picks one of the ready-made dicts.
+    """
+    
+    def __init__(self, uri: str, mime_type: str, text: str, version: str,
+                 compress_min_bytes: int = 1024):
+        data = text.encode("utf-8")
+        self.uri = uri
+        self.version = version
+        self.content_hash = "sha256:" + hashlib.sha256(data).hexdigest()
+        meta = {"contentHash": self.content_hash, "version": version}
+        
+        self.text_content = {"uri": uri, "mimeType": mime_type, "text": text, "_meta": meta}
+        self.not_modified = {"uri": uri, "mimeType": mime_type,
+                             "_meta": {**meta, "notModified": True}}
+        self.gzip_content = None
+        if len(data) >= compress_min_bytes:
+            # mtime=0 keeps the blob (and anything hashing it) reproducible
+            blob = base64.b64encode(gzip.compress(data, mtime=0)).decode("ascii")
+            self.gzip_content = {"uri": uri, "mimeType": mime_type, "blob": blob,
+                                 "_meta": {**meta, "contentEncoding": "gzip"}}
+    
+    def read(self, if_none_match: Optional[str] = None, accept_encoding=()) -> dict:
+        """
+        Pick the response for a read. The returned dict is a fresh shallow
+        copy, so callers may add or replace its top-level keys.
+        """
+        if if_none_match == self.content_hash:
+            return dict(self.not_modified)
+        if self.gzip_content is not None and _accepts_gzip(accept_encoding):
+            return dict(self.gzip_content)
+        return dict(self.text_content)
+
+
+def _accepts_gzip(accept_encoding) -> bool:
+    """True if acceptEncoding (a list of codings, or a "gzip, br" string) names gzip."""
+    if isinstance(accept_encoding, str):
+        accept_encoding = accept_encoding.split(",")
+    return any(isinstance(coding, str) and coding.split(";")[0].strip().lower() == "gzip"
+               for coding in accept_encoding or ())
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+class LatencyHistogram:
+    """
+    HDR-style histogram of durations in microseconds.
+    
+    Values below 2 * SUB_BUCKETS get one bucket each; above that every
+    power of two is split into SUB_BUCKETS linear buckets, so any
+    recorded value is known to within 1/SUB_BUCKETS (12.5%) while the
+    whole range from 1µs to hours fits in a few hundred counters.
+    """
+    
+    SUB_BITS = 3
+    SUB_BUCKETS = 1 << SUB_BITS
+    
+    def __init__(self):
+        self.counts: List[int] = []
+        self.count = 0
+        self.total_us = 0
+        self.max_us = 0
+    
+    def _index(self, value: int) -> int:
+        if value < 2 * self.SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - self.SUB_BITS - 1
+        return self.SUB_BUCKETS * (shift + 1) + (value >> shift) - self.SUB_BUCKETS
+    
+    def _upper_bound(self, index: int) -> int:
+        if index < 2 * self.SUB_BUCKETS:
+            return index
+        shift = index // self.SUB_BUCKETS - 1
+        mantissa = index % self.SUB_BUCKETS + self.SUB_BUCKETS
+        return ((mantissa + 1) << shift) - 1
+    
+    def record(self, seconds: float):
+        value = int(seconds * 1_000_000)
+        index = self._index(value)
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += 1
+        self.count += 1
+        self.total_us += value
+        if value > self.max_us:
+            self.max_us = value
+    
+    def percentile(self, p: float) -> float:
+        """Latency in seconds at or below which `p` percent of calls finished."""
+        if not self.count:
+            return 0.0
+        rank = max(1, round(self.count * p / 100))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(self._upper_bound(index), self.max_us) / 1_000_000
+        return self.max_us / 1_000_000
+    
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_us / self.count / 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p90_ms": round(self.percentile(90) * 1000, 3),
+            "p99_ms": round(self.percentile(99) * 1000, 3),
+            "max_ms": round(self.max_us / 1000, 3),
+        }
+
+
+class _CallStats:
+    """Counters and latencies for one method or tool."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.latency = LatencyHistogram()
+    
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class ServerMetrics:
+    """
+    Per-method and per-tool call counts, error counts, payload sizes and
+    latency histograms, readable as JSON or Prometheus text.
+    """
+    
+    QUANTILES = (0.5, 0.9, 0.99)
+    
+    def __init__(self, server_name: str):
+        self.server_name = server_name
+        self.started = time.time()
+        self.methods: Dict[str, _CallStats] = {}
+        self.tools: Dict[str, _CallStats] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _record(table: Dict[str, _CallStats], key: str, seconds: float, ok: bool,
+                bytes_in: int, bytes_out: int):
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = _CallStats()
+        stats.calls += 1
+        stats.errors += not ok
+        stats.bytes_in += bytes_in
+        stats.bytes_out += bytes_out
+        stats.latency.record(seconds)
+    
+    def record_method(self, method: str, seconds: float, ok: bool,
+                      bytes_in: int = 0, bytes_out: int = 0):
+        with self._lock:
+            self._record(self.methods, method, seconds, ok, bytes_in, bytes_out)
+    
+    def record_tool(self, name: str, seconds: float, ok: bool,
+                    bytes_in: int = 0, bytes_out: int = 0):
+        with self._lock:
+            self._record(self.tools, name, seconds, ok, bytes_in, bytes_out)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "server": self.server_name,
+                "uptime_seconds": round(time.time() - self.started, 3),
+                "methods": {k: v.snapshot() for k, v in self.methods.items()},
+                "tools": {k: v.snapshot() for k, v in self.tools.items()},
+            }
+    
+    @staticmethod
+    def _label(value: str) -> str:
+        """Escape a label value: backslash, double quote and newline."""
+        return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    
+    def to_prometheus(self) -> str:
+        """Render in the Prometheus text exposition format (version 0.0.4)."""
+        lines = []
+        with self._lock:
+            for kind, stats in (("method", self.methods), ("tool", self.tools)):
+                prefix = f"mcp_{kind}"
+                table = {self._label(k): v for k, v in stats.items()}
+                lines += [
+                    f"# HELP {prefix}_calls_total Calls handled per {kind}.",
+                    f"# TYPE {prefix}_calls_total counter",
+                ]
+                lines += [f'{prefix}_calls_total{{{kind}="{k}"}} {v.calls}' for k, v in table.items()]
+                lines += [
+                    f"# HELP {prefix}_errors_total Calls that failed per {kind}.",
+                    f"# TYPE {prefix}_errors_total counter",
+                ]
+                lines += [f'{prefix}_errors_total{{{kind}="{k}"}} {v.errors}' for k, v in table.items()]
+                for direction in ("in", "out"):
+                    lines += [
+                        f"# HELP {prefix}_bytes_{direction}_total Payload bytes {direction} per {kind}.",
+                        f"# TYPE {prefix}_bytes_{direction}_total counter",
+                    ]
+                    lines += [f'{prefix}_bytes_{direction}_total{{{kind}="{k}"}} {getattr(v, "bytes_" + direction)}'
+                              for k, v in table.items()]
+                lines += [
+                    f"# HELP {prefix}_latency_seconds Call latency per {kind}.",
+                    f"# TYPE {prefix}_latency_seconds summary",
+                ]
+                for k, v in table.items():
+                    for q in self.QUANTILES:
+                        lines.append(f'{prefix}_latency_seconds{{{kind}="{k}",quantile="{q}"}} '
+                                     f'{v.latency.percentile(q * 100):.6f}')
+                    lines.append(f'{prefix}_latency_seconds_sum{{{kind}="{k}"}} {v.latency.total_us / 1_000_000:.6f}')
+                    lines.append(f'{prefix}_latency_seconds_count{{{kind}="{k}"}} {v.latency.count}')
+        return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(metrics: ServerMetrics, host: str = "127.0.0.1", port: int = 9464):
+    """Serve GET /metrics on a background thread; returns the HTTP server."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = metrics.to_prometheus().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    httpd = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+# =============================================================================
+# MCP Server
+# =============================================================================
 
 class MCPServer:
     """
     A simple MCP server implementation supporting Tools and Resources.
+    
+    Tool calls run on a worker pool so that a `notifications/cancelled`
+    arriving on another thread can release the waiting request.
+    
+    With `metrics=True` every request is timed and counted, and the
+    numbers are served as `metrics://server` (JSON) and
+    `metrics://server/prometheus`. When disabled the only cost is one
+    attribute check per request. Payload sizes are recorded only for
+    messages that arrive through handle_message(), which already holds
+    the encoded bytes. Methods outside METHODS are counted as "unknown",
+    so clients cannot grow the set of metric labels.
     """
     
-    def __init__(self, name: str, version: str = "1.0.0"):
+    METHODS = frozenset({
+        "initialize", "tools/list", "tools/call", "resources/list", "resources/read",
+        "resources/templates/list", "notifications/cancelled",
+    })
+    
+    def __init__(self, name: str, version: str = "1.0.0", max_workers: int = 4,
+                 metrics: bool = False):
         self.name = name
         self.version = version
         self.tools: Dict[str, Tool] = {}
         self.tool_handlers: Dict[str, Callable] = {}
         self.resources: Dict[str, Resource] = {}
         self.resource_handlers: Dict[str, Callable] = {}
+        self.prerendered: Dict[str, PrerenderedResource] = {}
+        self.resource_templates = UriTemplateRouter()
+        self._wants_context: Dict[str, bool] = {}
+        
+        # Outgoing notifications, the most recent kept for inspection;
+        # replace send_notification to write to a transport
+        self.notifications: deque = deque(maxlen=simple_server.MAX_KEPT_NOTIFICATIONS)
+        self.send_notification: Callable[[dict], None] = self.notifications.append
+        
+        self._tool_runner = ToolRunner(max_workers)
+        
+        self.metrics: Optional[ServerMetrics] = None
+        if metrics:
+            self.enable_metrics()
+    
+    def enable_metrics(self) -> ServerMetrics:
+        """Start recording metrics and expose them as resources."""
+        if self.metrics is None:
+            self.metrics = ServerMetrics(self.name)
+            self.register_resource(
+                Resource(uri="metrics://server", name="Server metrics", mimeType="application/json"),
+                lambda: ResourceContent(uri="metrics://server", mimeType="application/json",
+                                        text=json.dumps(self.metrics.snapshot()))
+            )
+            self.register_resource(
+                Resource(uri="metrics://server/prometheus", name="Server metrics (Prometheus)",
+                         mimeType="text/plain; version=0.0.4"),
+                lambda: ResourceContent(uri="metrics://server/prometheus",
+                                        mimeType="text/plain; version=0.0.4",
+                                        text=self.metrics.to_prometheus())
+            )
+        return self.metrics
     
     def register_tool(self, tool: Tool, handler: Callable):
-        """Register a tool with its handler."""
+        """Register a tool with its handler: handler(args) or handler(args, ctx)."""
         self.tools[tool.name] = tool
         self.tool_handlers[tool.name] = handler
+        self._wants_context[tool.name] = _accepts_context(handler)
 
     def register_resource(self, resource: Resource, handler: Callable):
         """Register a resource with its handler."""
         self.resources[resource.uri] = resource
         self.resource_handlers[resource.uri] = handler
     
-    def handle_request(self, request: dict) -> dict:
-        """Process a JSON-RPC request and return response."""
+    def register_ui_resource(self, uri: str, name: str, render: Callable[[], str], version: str,
+                             mime_type: str = "text/html", compress_min_bytes: int = 1024):
+        """
+        Register a UI resource rendered once per version.
+        
+        Reads carry `_meta.contentHash`; a read whose `ifNoneMatch` equals
+        it returns only the metadata, and clients sending
+        `acceptEncoding: ["gzip"]` get large bodies as a compressed blob.
+        Calling this again with a new version re-renders the resource and
+        notifies subscribers.
+        """
+        current = self.prerendered.get(uri)
+        if current is not None and current.version == version:
+            return
+        ui = PrerenderedResource(uri, mime_type, render(), version, compress_min_bytes)
+        self.prerendered[uri] = ui
+        self.resources[uri] = Resource(uri=uri, name=name, mimeType=mime_type,
+                                       _meta={"contentHash": ui.content_hash, "version": version})
+        if current is not None:
+            self.send_notification({"jsonrpc": "2.0", "method": "notifications/resources/updated",
+                                    "params": {"uri": uri}})
+    
+    def register_resource_template(self, template: ResourceTemplate, handler: Callable):
+        """Register a dynamic resource; handler(uri, **params) returns its content."""
+        self.resource_templates.add(template, handler)
+    
+    def handle_request(self, request: dict) -> Optional[dict]:
+        """
+        Process a JSON-RPC request and return response.
+        
+        Notifications and cancelled requests produce no response (None).
+        """
+        if self.metrics is None:
+            return self._dispatch(request)
+        
+        started = time.perf_counter()
+        response = self._dispatch(request)
+        self._record(request, response, time.perf_counter() - started)
+        return response
+    
+    def handle_message(self, message: bytes) -> Optional[bytes]:
+        """
+        Handle one encoded JSON-RPC message and return the encoded reply.
+        
+        The entry point for transports: with metrics on, payload sizes
+        are the byte lengths of `message` and of the reply, so nothing is
+        serialized a second time just to be measured.
+        """
+        try:
+            request = json.loads(message)
+        except ValueError as e:
+            return json.dumps(self._error_response(None, -32700, f"Parse error: {e}")).encode()
+        
+        if self.metrics is None:
+            response = self._dispatch(request)
+            return json.dumps(response).encode() if response is not None else None
+        
+        started = time.perf_counter()
+        response = self._dispatch(request)
+        elapsed = time.perf_counter() - started
+        reply = json.dumps(response).encode() if response is not None else None
+        self._record(request, response, elapsed, len(message), len(reply) if reply else 0)
+        return reply
+    
+    def _record(self, request: dict, response: Optional[dict], elapsed: float,
+                bytes_in: int = 0, bytes_out: int = 0):
+        ok = response is None or "error" not in response
         method = request.get("method")
-        params = request.get("params", {})
+        if method not in self.METHODS:
+            method = "unknown"  # keep label cardinality bounded
+        self.metrics.record_method(method, elapsed, ok, bytes_in, bytes_out)
+        params = request.get("params") or {}
+        if method == "tools/call" and params.get("name") in self.tools:
+            self.metrics.record_tool(params["name"], elapsed, ok, bytes_in, bytes_out)
+    
+    def _dispatch(self, request: dict) -> Optional[dict]:
+        method = request.get("method") or ""
+        params = request.get("params") or {}
         request_id = request.get("id")
         
         try:
+            if method == "notifications/cancelled":
+                self._tool_runner.cancel(params)
+                return None
+            if "id" not in request and method.startswith("notifications/"):
+                return None
+            
             if method == "initialize":
                 result = self._handle_initialize(params)
             elif method == "tools/list":
                 result = self._handle_list_tools()
             elif method == "tools/call":
-                result = self._handle_call_tool(params)
+                result = self._handle_call_tool(params, request_id)
             elif method == "resources/list":
                 result = self._handle_list_resources()
             elif method == "resources/read":
                 result = self._handle_read_resource(params)
+            elif method == "resources/templates/list":
+                result = self._handle_list_resource_templates()
             else:
                 return self._error_response(request_id, -32601, f"Unknown method: {method}")
             
             return self._success_response(request_id, result)
         
+        except RequestCancelled:
+            return None
         except Exception as e:
             return self._error_response(request_id, -32000, str(e))
     
@@ -109,28 +541,45 @@ class MCPServer:
             tools_list.append(t_dict)
         return {"tools": tools_list}
     
-    def _handle_call_tool(self, params: dict) -> dict:
+    def _handle_call_tool(self, params: dict, request_id: Any = None) -> dict:
         name = params.get("name")
         args = params.get("arguments", {})
         if name not in self.tool_handlers:
             raise ValueError(f"Unknown tool: {name}")
         
-        result = self.tool_handlers[name](args)
+        result = self._tool_runner.run(
+            self.tool_handlers[name], args, self._wants_context[name], request_id,
+            (params.get("_meta") or {}).get("progressToken"), self.send_notification)
+        
         # Wrap string result in list format
         if isinstance(result, str):
             return {"content": [{"type": "text", "text": result}]}
         return {"content": result}
 
     def _handle_list_resources(self) -> dict:
-        return {"resources": [asdict(r) for r in self.resources.values()]}
+        return {"resources": [_without_none(r) for r in self.resources.values()]}
 
     def _handle_read_resource(self, params: dict) -> dict:
         uri = params.get("uri")
-        if uri not in self.resource_handlers:
-            raise ValueError(f"Unknown resource: {uri}")
-        
-        content = self.resource_handlers[uri]()
-        return {"contents": [asdict(content)]}
+        ui = self.prerendered.get(uri)
+        if ui is not None:
+            return {"contents": [ui.read(params.get("ifNoneMatch"), params.get("acceptEncoding"))]}
+        if uri in self.resource_handlers:
+            content = self.resource_handlers[uri]()
+        else:
+            matched = self.resource_templates.match(uri)
+            if matched is None:
+                raise ValueError(f"Unknown resource: {uri}")
+            _, handler, template_params = matched
+            content = handler(uri, **template_params)
+        return {"contents": [_without_none(content)]}
+    
+    def _handle_list_resource_templates(self) -> dict:
+        templates = []
+        for template in self.resource_templates.templates:
+            t_dict = {k: v for k, v in asdict(template).items() if v is not None}
+            templates.append(t_dict)
+        return {"resourceTemplates": templates}
     
     def _success_response(self, request_id: Any, result: Any) -> dict:
         return {"jsonrpc": "2.0", "result": result, "id": request_id}
@@ -145,10 +594,15 @@ class MCPServer:
 
 def create_app_server():
     server = MCPServer("mcp-app-demo", "1.0.0")
+    feedback: List[dict] = []
     
     # 1. Define the UI Resource URI
     ui_uri = "internal://ui/feedback-form"
     
+    def submit_feedback(args: dict) -> str:
+        feedback.append(args)
+        return f"Received {args['category']} feedback: {args['details']}"
+    
     # 2. Register the Tool with the UI link
     server.register_tool(
         Tool(
@@ -168,7 +622,7 @@ def create_app_server():
                 }
             }
         ),
-        lambda args: f"Received {args['category']} feedback: {args['details']}"
+        submit_feedback
     )
     
     # 3. Register the Resource that provides the HTML UI
@@ -210,15 +664,25 @@ def create_app_server():
     </html>
     """
     
-    server.register_resource(
-        Resource(uri=ui_uri, name="Feedback Form UI", mimeType="text/html"),
-        lambda: ResourceContent(uri=ui_uri, mimeType="text/html", text=html_content)
+    server.register_ui_resource(ui_uri, "Feedback Form UI", lambda: html_content, version="1.0.0")
+    
+    # 4. Each submission is readable as a templated resource
+    def read_feedback(uri: str, id: int) -> ResourceContent:
+        if not 1 <= id <= len(feedback):
+            raise ValueError(f"Feedback not found: {id}")
+        return ResourceContent(uri=uri, mimeType="application/json", text=json.dumps(feedback[id - 1]))
+    
+    server.register_resource_template(
+        ResourceTemplate(uriTemplate="feedback://{id:int}", name="Submitted feedback",
+                         mimeType="application/json"),
+        read_feedback
     )
     
     return server
 
 def simulate_session():
     server = create_app_server()
+    server.enable_metrics()
     print("=" * 70)
     print("MCP App (UI) Demo")
     print("=" * 70)
@@ -255,6 +719,25 @@ def simulate_session():
     content = resp["result"]["contents"][0]
     print(f"Received UI Content ({content['mimeType']}):")
     print(content['text'][:150] + "... (truncated)")
+    content_hash = content["_meta"]["contentHash"]
+    print(f"contentHash: {content_hash[:23]}...")
+    
+    # The host re-opens the UI: it sends the hash it cached, and asks for gzip
+    resp = server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "resources/read",
+        "params": {"uri": ui_uri, "ifNoneMatch": content_hash},
+        "id": 31
+    })
+    print(f"Re-read with ifNoneMatch → {resp['result']['contents'][0]['_meta']}")
+    resp = server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "resources/read",
+        "params": {"uri": ui_uri, "acceptEncoding": ["gzip"]},
+        "id": 32
+    })
+    blob = resp["result"]["contents"][0]["blob"]
+    print(f"Read with acceptEncoding=gzip → {len(blob)} base64 chars instead of {len(content['text'])}")
 
     # 4. Submit Data (Simulating the UI calling the tool)
     print("\n🚀 Request: tools/call (UI submits data)")
@@ -270,5 +753,48 @@ def simulate_session():
     })
     print("Result:", resp["result"]["content"][0]["text"])
 
+    # 5. Discover and read a templated resource
+    print("\n🧩 Request: resources/templates/list + resources/read feedback://1")
+    print("-" * 50)
+    resp = server.handle_request({"jsonrpc": "2.0", "method": "resources/templates/list", "id": 5})
+    print("Templates:", [t["uriTemplate"] for t in resp["result"]["resourceTemplates"]])
+    resp = server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "resources/read",
+        "params": {"uri": "feedback://1"},
+        "id": 6
+    })
+    print("feedback://1 →", resp["result"]["contents"][0]["text"])
+
+    # 6. Metrics, as a resource and as a Prometheus scrape
+    print("\n📊 Request: resources/read metrics://server")
+    print("-" * 50)
+    for i in range(200):
+        # As a transport would: encoded bytes in and out, sized for free
+        server.handle_message(json.dumps({
+            "jsonrpc": "2.0", "method": "tools/call", "id": 100 + i,
+            "params": {"name": "submit_feedback", "arguments": {"category": "bug", "details": f"#{i}"}}
+        }).encode())
+    resp = server.handle_request({
+        "jsonrpc": "2.0",
+        "method": "resources/read",
+        "params": {"uri": "metrics://server"},
+        "id": 7
+    })
+    snapshot = json.loads(resp["result"]["contents"][0]["text"])
+    for method, stats in snapshot["methods"].items():
+        print(f"  {method:<26} calls={stats['calls']:<4} errors={stats['errors']} "
+              f"p50={stats['latency']['p50_ms']}ms p99={stats['latency']['p99_ms']}ms")
+    
+    from urllib.request import urlopen
+    httpd = serve_prometheus(server.metrics, port=0)
+    with urlopen(f"http://127.0.0.1:{httpd.server_address[1]}/metrics") as scrape:
+        lines = scrape.read().decode().splitlines()
+    httpd.shutdown()
+    print("\nGET /metrics:")
+    for line in lines:
+        if line.startswith("mcp_tool_"):
+            print(f"  {line}")
+
 if __name__ == "__main__":
     simulate_session()
@@ -0,0 +1,846 @@
+"""
+MCP Example 05: Gateway
+=======================
+One MCP endpoint in front of many MCP servers.
+
+This example shows:
+1. Mounting servers in-process or as pooled stdio subprocesses
+2. Namespacing tools (prefix__tool) and resources (prefix+uri)
+3. Merged, cached listings and call routing
+4. Warm child connections and per-backend latency metrics
+
+Run `python 05_mcp_gateway.py --serve tools` to expose a single example
+server over stdio (one JSON-RPC message per line).
+"""
+
+import importlib.util
+import itertools
+import json
+import os
+import queue
+import select
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+
+SRC_DIR = Path(__file__).resolve().parent
+UCP_SRC_DIR = SRC_DIR.parent.parent / "UCP" / "src"
+
+
+def load_example(path: Path):
+    """Import a numbered example file (e.g. 02_tool_server.py) as a module."""
+    spec = importlib.util.spec_from_file_location(f"example_{path.stem}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class BackendError(Exception):
+    """A mounted server rejected a request."""
+
+
+class CallCancelled(BackendError):
+    """A tool call was cancelled before its backend answered."""
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+#
+# Every backend exposes the same calls, whatever the shape of the server
+# behind it: initialize, list_tools, call_tool, cancel, list_resources,
+# list_resource_templates, read_resource. Results are MCP result dicts.
+#
+# `call_id` names a tool call so that `cancel(call_id)` can stop it while
+# it runs; backends that cannot cancel ignore both.
+
+class JsonRpcBackend:
+    """Wraps an in-process server that has handle_request (01, 04)."""
+
+    def __init__(self, server):
+        self.server = server
+        self._ids = itertools.count(1)
+        self._calls: dict[Any, int] = {}  # call_id -> request id of a running tools/call
+        self._lock = threading.Lock()
+
+    def _rpc(self, method: str, params: Optional[dict] = None, call_id: Any = None) -> dict:
+        request_id = next(self._ids)
+        if call_id is not None:
+            with self._lock:
+                self._calls[call_id] = request_id
+        try:
+            response = self.server.handle_request({
+                "jsonrpc": "2.0", "method": method, "params": params or {}, "id": request_id
+            })
+        finally:
+            if call_id is not None:
+                with self._lock:
+                    self._calls.pop(call_id, None)
+        if response is None:
+            # Servers send no response to a call that was cancelled
+            if call_id is not None:
+                raise CallCancelled(f"{method} was cancelled")
+            raise BackendError(f"No response to {method}")
+        if "error" in response:
+            raise BackendError(response["error"]["message"])
+        return response["result"]
+
+    def initialize(self) -> dict:
+        return self._rpc("initialize", {"protocolVersion": "2024-11-05", "capabilities": {}})
+
+    def list_tools(self) -> list[dict]:
+        return self._rpc("tools/list")["tools"]
+
+    def call_tool(self, name: str, arguments: dict, call_id: Any = None) -> dict:
+        return self._rpc("tools/call", {"name": name, "arguments": arguments}, call_id)
+
+    def cancel(self, call_id: Any):
+        with self._lock:
+            request_id = self._calls.get(call_id)
+        if request_id is not None:
+            self.server.handle_request({
+                "jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": request_id}
+            })
+
+    def list_resources(self) -> list[dict]:
+        try:
+            return self._rpc("resources/list")["resources"]
+        except BackendError:
+            return []  # server has no resources
+
+    def list_resource_templates(self) -> list[dict]:
+        try:
+            return self._rpc("resources/templates/list")["resourceTemplates"]
+        except BackendError:
+            return []
+
+    def read_resource(self, uri: str, options: Optional[dict] = None) -> dict:
+        return self._rpc("resources/read", {**(options or {}), "uri": uri})
+
+    def close(self):
+        pass
+
+
+class ToolServerBackend:
+    """
+    Wraps ToolServer (02): list_tools() / call_tool(name, args).
+
+    ToolServer is not written for concurrent callers, so calls into it
+    are serialized.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self._lock = threading.Lock()
+
+    def initialize(self) -> dict:
+        return {"serverInfo": {"name": self.server.name, "version": self.server.version}}
+
+    def list_tools(self) -> list[dict]:
+        with self._lock:
+            return self.server.list_tools()
+
+    def call_tool(self, name: str, arguments: dict, call_id: Any = None) -> dict:
+        try:
+            with self._lock:
+                return {"content": [asdict(self.server.call_tool(name, arguments))]}
+        except ValueError as e:
+            raise BackendError(str(e))
+
+    def cancel(self, call_id: Any):
+        pass
+
+    def list_resources(self) -> list[dict]:
+        return []
+
+    def list_resource_templates(self) -> list[dict]:
+        return []
+
+    def read_resource(self, uri: str, options: Optional[dict] = None) -> dict:
+        raise BackendError(f"Unknown resource: {uri}")
+
+    def close(self):
+        self.server.close()
+
+
+class ResourceServerBackend:
+    """
+    Wraps ResourceServer (03): list_resources() / read_resource(uri).
+
+    ResourceServer is not written for concurrent callers, so calls into
+    it are serialized.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self._lock = threading.Lock()
+
+    def initialize(self) -> dict:
+        return {"serverInfo": {"name": self.server.name, "version": self.server.version}}
+
+    def list_tools(self) -> list[dict]:
+        return []
+
+    def call_tool(self, name: str, arguments: dict, call_id: Any = None) -> dict:
+        raise BackendError(f"Unknown tool: {name}")
+
+    def cancel(self, call_id: Any):
+        pass
+
+    def list_resources(self) -> list[dict]:
+        with self._lock:
+            return self.server.list_resources()
+
+    def list_resource_templates(self) -> list[dict]:
+        with self._lock:
+            return self.server.list_resource_templates()
+
+    def read_resource(self, uri: str, options: Optional[dict] = None) -> dict:
+        try:
+            with self._lock:
+                return {"contents": [self.server.read_resource(uri, (options or {}).get("ifNoneMatch"))]}
+        except ValueError as e:
+            raise BackendError(str(e))
+
+    def close(self):
+        self.server.close()
+
+
+class UCPBackend:
+    """Wraps UCPMCPServer (UCP 03): call_tool(MCPToolCall) -> MCPToolResult."""
+
+    def __init__(self, server, module):
+        self.server = server
+        self.module = module
+
+    def initialize(self) -> dict:
+        return {"serverInfo": {"name": self.server.business_name, "version": "1.0.0"}}
+
+    def list_tools(self) -> list[dict]:
+        return self.server.list_tools()
+
+    def call_tool(self, name: str, arguments: dict, call_id: Any = None) -> dict:
+        result = self.server.call_tool(self.module.MCPToolCall(
+            id=f"call_{uuid.uuid4().hex[:8]}", name=name, arguments=arguments
+        ))
+        return {
+            "content": [{"type": "text", "text": json.dumps(result.content)}],
+            "isError": result.is_error
+        }
+
+    def cancel(self, call_id: Any):
+        pass
+
+    def list_resources(self) -> list[dict]:
+        return []
+
+    def list_resource_templates(self) -> list[dict]:
+        return []
+
+    def read_resource(self, uri: str, options: Optional[dict] = None) -> dict:
+        raise BackendError(f"Unknown resource: {uri}")
+
+    def close(self):
+        pass
+
+
+class StdioConnection:
+    """
+    One child server process speaking line-delimited JSON-RPC.
+
+    A request that is not answered within `timeout` seconds stops the
+    child, since it can no longer be trusted to answer in order; the pool
+    replaces it on next use.
+    """
+
+    def __init__(self, command: list[str], timeout: float = 30.0):
+        self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._buffer = bytearray()
+        self._write_lock = threading.Lock()
+        self._cancelled: Any = None
+        # Written by cancel() to wake a receive() blocked in select
+        self._wake_read, self._wake_write = os.pipe()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def request(self, method: str, params: dict) -> dict:
+        return self.receive(self.send(method, params))
+
+    def send(self, method: str, params: dict) -> int:
+        """Write a request and return its id; pair with receive()."""
+        request_id = next(self._ids)
+        self._write({"jsonrpc": "2.0", "method": method, "params": params, "id": request_id})
+        return request_id
+
+    def receive(self, request_id: int) -> dict:
+        """Read until the response to `request_id` arrives."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            message = json.loads(self._read_line(request_id, deadline))
+            if message.get("id") == request_id:
+                return message
+            # Anything else is a notification from the child, or the late
+            # answer to a cancelled request; skip it
+
+    def cancel(self, request_id: int):
+        """Ask the child to stop `request_id`; its receive() raises CallCancelled."""
+        self._cancelled = request_id
+        self._write({"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {"requestId": request_id}})
+        os.write(self._wake_write, b"x")
+
+    def _write(self, message: dict):
+        with self._write_lock:
+            self.process.stdin.write(json.dumps(message).encode() + b"\n")
+            self.process.stdin.flush()
+
+    def _read_line(self, request_id: int, deadline: float) -> bytes:
+        stdout = self.process.stdout.fileno()
+        scanned = 0
+        while True:
+            end = self._buffer.find(b"\n", scanned)
+            if end >= 0:
+                line = bytes(self._buffer[:end])
+                del self._buffer[:end + 1]
+                return line
+            scanned = len(self._buffer)
+
+            remaining = deadline - time.monotonic()
+            ready = select.select([stdout, self._wake_read], [], [], max(remaining, 0))[0]
+            if not ready:
+                self.process.kill()
+                self.process.wait()
+                raise BackendError(f"Child server did not answer within {self.timeout}s")
+            if self._wake_read in ready:
+                os.read(self._wake_read, 1024)
+                if self._cancelled == request_id:
+                    raise CallCancelled(f"Request {request_id} was cancelled")
+            if stdout in ready:
+                chunk = os.read(stdout, 65536)
+                if not chunk:
+                    raise BackendError("Child server exited")
+                self._buffer += chunk
+
+    def close(self):
+        self.process.stdin.close()
+        self.process.wait(timeout=5)
+        self.process.stdout.close()
+        os.close(self._wake_read)
+        os.close(self._wake_write)
+
+
+class StdioBackend:
+    """
+    A pool of warm child processes running the same server.
+
+    Children are started and initialized once, up front. Each request
+    borrows an idle child, so up to `pool_size` calls run concurrently,
+    and a child that dies is replaced on its next use.
+    """
+
+    def __init__(self, command: list[str], pool_size: int = 2, timeout: float = 30.0):
+        self.command = command
+        self.timeout = timeout
+        self._idle: queue.Queue[StdioConnection] = queue.Queue()
+        self._info: Optional[dict] = None
+        self._calls: dict[Any, tuple[StdioConnection, int]] = {}  # call_id -> running tools/call
+        self._lock = threading.Lock()
+        for _ in range(pool_size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self) -> StdioConnection:
+        connection = StdioConnection(self.command, self.timeout)
+        response = connection.request("initialize", {"protocolVersion": "2024-11-05", "capabilities": {}})
+        self._info = response.get("result")
+        return connection
+
+    def _rpc(self, method: str, params: Optional[dict] = None, call_id: Any = None) -> dict:
+        connection = self._idle.get()
+        try:
+            if not connection.alive:
+                connection.close()
+                connection = self._spawn()
+            request_id = connection.send(method, params or {})
+            if call_id is not None:
+                with self._lock:
+                    self._calls[call_id] = (connection, request_id)
+            try:
+                response = connection.receive(request_id)
+            finally:
+                if call_id is not None:
+                    with self._lock:
+                        self._calls.pop(call_id, None)
+        finally:
+            self._idle.put(connection)
+        if "error" in response:
+            raise BackendError(response["error"]["message"])
+        return response["result"]
+
+    def initialize(self) -> dict:
+        return self._info
+
+    def list_tools(self) -> list[dict]:
+        return self._rpc("tools/list")["tools"]
+
+    def call_tool(self, name: str, arguments: dict, call_id: Any = None) -> dict:
+        return self._rpc("tools/call", {"name": name, "arguments": arguments}, call_id)
+
+    def cancel(self, call_id: Any):
+        with self._lock:
+            running = self._calls.get(call_id)
+            if running is not None:
+                connection, request_id = running
+                connection.cancel(request_id)
+
+    def list_resources(self) -> list[dict]:
+        return self._rpc("resources/list")["resources"]
+
+    def list_resource_templates(self) -> list[dict]:
+        try:
+            return self._rpc("resources/templates/list")["resourceTemplates"]
+        except BackendError:
+            return []
+
+    def read_resource(self, uri: str, options: Optional[dict] = None) -> dict:
+        return self._rpc("resources/read", {**(options or {}), "uri": uri})
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get().close()
+
+
+def example_backend(name: str):
+    """Create an in-process backend for one of the example servers."""
+    if name == "simple":
+        return JsonRpcBackend(load_example(SRC_DIR / "01_simple_server.py").create_demo_server())
+    if name == "tools":
+        return ToolServerBackend(load_example(SRC_DIR / "02_tool_server.py").ToolServer())
+    if name == "resources":
+        return ResourceServerBackend(load_example(SRC_DIR / "03_resource_server.py").ResourceServer())
+    if name == "app":
+        return JsonRpcBackend(load_example(SRC_DIR / "04_mcp_app_server.py").create_app_server())
+    if name == "ucp":
+        module = load_example(UCP_SRC_DIR / "03_mcp_integration.py")
+        return UCPBackend(module.UCPMCPServer("Example Store", "https://api.example.com/ucp"), module)
+    raise ValueError(f"Unknown example server: {name}")
+
+
+# =============================================================================
+# Metrics
+# =============================================================================
+
+class BackendMetrics:
+    """Call counts and a window of recent latencies for one backend."""
+
+    def __init__(self, window: int = 1024):
+        self.calls = 0
+        self.errors = 0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self.calls += 1
+            self.errors += not ok
+            self._latencies.append(seconds)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._latencies)
+
+        def percentile(p: float) -> float:
+            if not samples:
+                return 0.0
+            return samples[min(len(samples) - 1, int(p * len(samples)))] * 1000
+
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "p50_ms": round(percentile(0.50), 3),
+            "p99_ms": round(percentile(0.99), 3),
+            "max_ms": round(samples[-1] * 1000, 3) if samples else 0.0,
+        }
+
+
+# =============================================================================
+# Gateway
+# =============================================================================
+
+class MCPGateway:
+    """
+    An MCP server that fronts several mounted backends.
+
+    Tools are exposed as `<prefix>__<tool>` and resources (and resource
+    templates) as `<prefix>+<uri>`. Merged listings are cached until a
+    backend is mounted or unmounted (or `invalidate()` is called).
+    """
+
+    TOOL_SEPARATOR = "__"
+    RESOURCE_SEPARATOR = "+"
+
+    def __init__(self, name: str = "mcp-gateway", version: str = "1.0.0"):
+        self.name = name
+        self.version = version
+        self.backends: dict[str, Any] = {}
+        self.metrics: dict[str, BackendMetrics] = {}
+        self._tools: Optional[list[dict]] = None
+        self._tool_routes: dict[str, tuple[str, str]] = {}
+        self._resources: Optional[list[dict]] = None
+        self._resource_templates: Optional[list[dict]] = None
+        self.listing_stats = {"hits": 0, "misses": 0}
+        self._calls: dict[Any, str] = {}  # request id -> prefix of a running tools/call
+        self._lock = threading.Lock()
+
+    def mount(self, prefix: str, backend):
+        """
+        Mount a backend under a prefix; it is initialized immediately.
+
+        A backend already mounted under the prefix is replaced and closed.
+        """
+        if self.TOOL_SEPARATOR in prefix or self.RESOURCE_SEPARATOR in prefix:
+            raise ValueError(f"Invalid prefix: {prefix}")
+        backend.initialize()
+        replaced = self.backends.get(prefix)
+        self.backends[prefix] = backend
+        self.metrics[prefix] = BackendMetrics()
+        self.invalidate()
+        if replaced is not None:
+            replaced.close()
+
+    def unmount(self, prefix: str):
+        self.backends.pop(prefix).close()
+        self.invalidate()
+
+    def invalidate(self):
+        """Drop cached listings."""
+        self._tools = None
+        self._resources = None
+        self._resource_templates = None
+
+    def close(self):
+        for backend in self.backends.values():
+            backend.close()
+
+    def handle_request(self, request: dict) -> Optional[dict]:
+        """Process a JSON-RPC request and return response."""
+        if not isinstance(request, dict):
+            return _error_response(None, -32600, "Invalid request")
+        method = request.get("method") or ""
+        params = request.get("params") or {}
+        request_id = request.get("id")
+
+        try:
+            if method == "notifications/cancelled":
+                self.cancel(params.get("requestId"))
+                return None
+            if "id" not in request:
+                return None  # other notifications need no response
+
+            if method == "initialize":
+                result = self._handle_initialize()
+            elif method == "tools/list":
+                result = {"tools": self.list_tools()}
+            elif method == "tools/call":
+                result = self.call_tool(params.get("name"), params.get("arguments", {}), request_id)
+            elif method == "resources/list":
+                result = {"resources": self.list_resources()}
+            elif method == "resources/templates/list":
+                result = {"resourceTemplates": self.list_resource_templates()}
+            elif method == "resources/read":
+                result = self.read_resource(params.get("uri"), _read_options(params))
+            else:
+                return _error_response(request_id, -32601, f"Unknown method: {method}")
+            return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+        except CallCancelled:
+            return None  # a cancelled request gets no response
+        except Exception as e:
+            return _error_response(request_id, -32000, str(e))
+
+    def _handle_initialize(self) -> dict:
+        return {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {
+                "tools": {"listChanged": True},
+                "resources": {"subscribe": False, "listChanged": True}
+            },
+            "serverInfo": {"name": self.name, "version": self.version}
+        }
+
+    # Listings
+
+    def list_tools(self) -> list[dict]:
+        if self._tools is not None:
+            self.listing_stats["hits"] += 1
+            return self._tools
+
+        self.listing_stats["misses"] += 1
+        tools, routes = [], {}
+        for prefix, backend in self.backends.items():
+            for tool in self._timed(prefix, backend.list_tools):
+                namespaced = f"{prefix}{self.TOOL_SEPARATOR}{tool['name']}"
+                tools.append({**tool, "name": namespaced})
+                routes[namespaced] = (prefix, tool["name"])
+        self._tools, self._tool_routes = tools, routes
+        return tools
+
+    def list_resources(self) -> list[dict]:
+        if self._resources is not None:
+            self.listing_stats["hits"] += 1
+            return self._resources
+
+        self.listing_stats["misses"] += 1
+        resources = []
+        for prefix, backend in self.backends.items():
+            for resource in self._timed(prefix, backend.list_resources):
+                resources.append({**resource, "uri": f"{prefix}{self.RESOURCE_SEPARATOR}{resource['uri']}"})
+        self._resources = resources
+        return resources
+
+    def list_resource_templates(self) -> list[dict]:
+        if self._resource_templates is not None:
+            self.listing_stats["hits"] += 1
+            return self._resource_templates
+
+        self.listing_stats["misses"] += 1
+        templates = []
+        for prefix, backend in self.backends.items():
+            for template in self._timed(prefix, backend.list_resource_templates):
+                templates.append({
+                    **template,
+                    "uriTemplate": f"{prefix}{self.RESOURCE_SEPARATOR}{template['uriTemplate']}"
+                })
+        self._resource_templates = templates
+        return templates
+
+    # Routing
+
+    def call_tool(self, name: str, arguments: dict, call_id: Any = None) -> dict:
+        """Route a tool call; pass `call_id` to make it cancellable with cancel()."""
+        if self._tools is None:
+            self.list_tools()
+        if name not in self._tool_routes:
+            raise ValueError(f"Unknown tool: {name}")
+        prefix, tool_name = self._tool_routes[name]
+        if call_id is None:
+            return self._timed(prefix, self.backends[prefix].call_tool, tool_name, arguments)
+
+        with self._lock:
+            self._calls[call_id] = prefix
+        try:
+            return self._timed(prefix, self.backends[prefix].call_tool, tool_name, arguments, call_id)
+        finally:
+            with self._lock:
+                self._calls.pop(call_id, None)
+
+    def cancel(self, call_id: Any):
+        """Forward a cancellation to the backend running that call, if any."""
+        with self._lock:
+            prefix = self._calls.get(call_id)
+        if prefix is not None:
+            self.backends[prefix].cancel(call_id)
+
+    def read_resource(self, uri: str, options: Optional[dict] = None) -> dict:
+        """Route a read; `options` (ifNoneMatch, acceptEncoding) go to the backend as-is."""
+        prefix, _, backend_uri = uri.partition(self.RESOURCE_SEPARATOR)
+        if prefix not in self.backends or not backend_uri:
+            raise ValueError(f"Unknown resource: {uri}")
+        result = self._timed(prefix, self.backends[prefix].read_resource, backend_uri, options)
+        # Hand back URIs in the gateway's namespace
+        return {"contents": [{**content, "uri": uri} for content in result["contents"]]}
+
+    def _timed(self, prefix: str, fn: Callable, *args):
+        started = time.perf_counter()
+        ok = False
+        try:
+            result = fn(*args)
+            ok = True
+            return result
+        finally:
+            self.metrics[prefix].record(time.perf_counter() - started, ok)
+
+    def get_metrics(self) -> dict:
+        """Per-backend call counts and latency percentiles."""
+        return {prefix: metrics.snapshot() for prefix, metrics in self.metrics.items()}
+
+
+# =============================================================================
+# Stdio Serving
+# =============================================================================
+
+class BackendServer:
+    """JSON-RPC front for a single backend, used when serving it over stdio."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def handle_request(self, request: dict) -> Optional[dict]:
+        if not isinstance(request, dict):
+            return _error_response(None, -32600, "Invalid request")
+        method = request.get("method") or ""
+        params = request.get("params") or {}
+        request_id = request.get("id")
+
+        try:
+            if method == "notifications/cancelled":
+                self.backend.cancel(params.get("requestId"))
+                return None
+            if "id" not in request:
+                return None
+
+            if method == "initialize":
+                result = {"protocolVersion": "2024-11-05", "capabilities": {"tools": {}, "resources": {}},
+                          **self.backend.initialize()}
+            elif method == "tools/list":
+                result = {"tools": self.backend.list_tools()}
+            elif method == "tools/call":
+                result = self.backend.call_tool(params.get("name"), params.get("arguments", {}), request_id)
+            elif method == "resources/list":
+                result = {"resources": self.backend.list_resources()}
+            elif method == "resources/templates/list":
+                result = {"resourceTemplates": self.backend.list_resource_templates()}
+            elif method == "resources/read":
+                result = self.backend.read_resource(params.get("uri"), _read_options(params))
+            else:
+                return _error_response(request_id, -32601, f"Unknown method: {method}")
+            return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+        except CallCancelled:
+            return None
+        except Exception as e:
+            return _error_response(request_id, -32000, str(e))
+
+
+def serve_stdio(handle_request: Callable[[dict], Optional[dict]], workers: int = 8):
+    """
+    Serve line-delimited JSON-RPC on stdin/stdout until stdin closes.
+
+    Tool calls run on a worker pool while reading continues, so a
+    notifications/cancelled reaches a call that is still running, and
+    their responses are written as they complete. Everything else is
+    quick and handled on the reading thread, in arrival order.
+    """
+    write_lock = threading.Lock()
+
+    def respond(response: Optional[dict]):
+        if response is not None:
+            with write_lock:
+                sys.stdout.write(json.dumps(response) + "\n")
+                sys.stdout.flush()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stdio") as pool:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                respond(_error_response(None, -32700, f"Parse error: {e}"))
+                continue
+            if not isinstance(request, dict):
+                respond(_error_response(None, -32600, "Invalid request"))
+            elif request.get("method") == "tools/call":
+                pool.submit(lambda request=request: respond(handle_request(request)))
+            else:
+                respond(handle_request(request))
+
+
+def _read_options(params: dict) -> dict:
+    """The resources/read params other than the URI (ifNoneMatch, acceptEncoding, ...)."""
+    return {key: value for key, value in params.items() if key != "uri"}
+
+
+def _error_response(request_id: Any, code: int, message: str) -> dict:
+    return {"jsonrpc": "2.0", "error": {"code": code, "message": message}, "id": request_id}
+
+
+# =============================================================================
+# Demo
+# =============================================================================
+
+def run_demo():
+    """Mount every example server behind one gateway."""
+
+    gateway = MCPGateway()
+
+    print("=" * 70)
+    print("MCP Gateway Demo")
+    print("=" * 70)
+
+    print("\n🔌 Mounting backends...")
+    for prefix in ("simple", "tools", "resources", "app", "ucp"):
+        gateway.mount(prefix, example_backend(prefix))
+        print(f"  • {prefix} (in-process)")
+
+    started = time.perf_counter()
+    gateway.mount("remote", StdioBackend([sys.executable, str(Path(__file__).resolve()),
+                                          "--serve", "tools"], pool_size=2))
+    print(f"  • remote (2 stdio children, warm in {time.perf_counter() - started:.2f}s)")
+
+    print("\n📋 tools/list (merged)")
+    print("-" * 50)
+    response = gateway.handle_request({"jsonrpc": "2.0", "method": "tools/list", "id": 1})
+    for tool in response["result"]["tools"]:
+        print(f"  {tool['name']}")
+
+    print("\n🔧 Routed calls")
+    print("-" * 50)
+    calls = [
+        ("simple__greet", {"name": "Gateway"}),
+        ("tools__format_text", {"text": "routed", "operations": ["uppercase"]}),
+        ("remote__format_text", {"text": "over stdio", "operations": ["title"]}),
+        ("ucp__create_checkout", {"currency": "USD"}),
+    ]
+    for request_id, (name, arguments) in enumerate(calls, start=2):
+        response = gateway.handle_request({
+            "jsonrpc": "2.0", "method": "tools/call",
+            "params": {"name": name, "arguments": arguments}, "id": request_id
+        })
+        text = response["result"]["content"][0]["text"] if "result" in response else response["error"]
+        print(f"  {name} → {str(text)[:60]}")
+
+    print("\n📖 resources/read resources+config://database")
+    print("-" * 50)
+    response = gateway.handle_request({
+        "jsonrpc": "2.0", "method": "resources/read",
+        "params": {"uri": "resources+config://database"}, "id": 10
+    })
+    print(f"  {response['result']['contents'][0]['text']}")
+
+    # Warm calls over the stdio pool
+    for _ in range(50):
+        gateway.call_tool("remote__format_text", {"text": "x", "operations": ["uppercase"]})
+    gateway.list_tools()
+
+    print("\n📊 Metrics")
+    print("-" * 50)
+    print(f"  listing cache: {gateway.listing_stats}")
+    for prefix, snapshot in gateway.get_metrics().items():
+        print(f"  {prefix:<10} {snapshot}")
+
+    gateway.close()
+
+    print("\n" + "=" * 70)
+    print("✅ Gateway demo complete!")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--serve"]:
+        backend = example_backend(sys.argv[2])
+        if isinstance(backend, JsonRpcBackend):
+            serve_stdio(backend.server.handle_request)  # already speaks JSON-RPC
+        else:
+            serve_stdio(BackendServer(backend).handle_request)
+    else:
+        run_demo()
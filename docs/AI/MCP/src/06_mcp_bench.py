@@ -0,0 +1,445 @@
+"""
+MCP Example 06: Benchmark and Replay Harness
+============================================
+Load-test the example servers with recorded or synthetic traffic.
+
+This example shows:
+1. Recording the requests a demo session sends (01, 04)
+2. Synthetic workload mixes for every example server
+3. Replaying in-process or over stdio at a chosen concurrency
+4. Reporting requests/second, p50/p99 latency and memory
+5. Saving a baseline and comparing later runs against it
+
+Usage:
+    python 06_mcp_bench.py                          # short demo run
+    python 06_mcp_bench.py record simple -o s.jsonl # record a session
+    python 06_mcp_bench.py run tools --transport inproc stdio \\
+        --concurrency 1 4 --requests 2000 --save baseline.json
+    python 06_mcp_bench.py run simple --session s.jsonl --compare baseline.json
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import platform
+import queue
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Optional
+
+
+SRC_DIR = Path(__file__).resolve().parent
+
+_spec = importlib.util.spec_from_file_location("example_05_mcp_gateway", SRC_DIR / "05_mcp_gateway.py")
+gateway = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(gateway)
+
+
+# =============================================================================
+# Workloads
+# =============================================================================
+
+# Demo sessions that can be recorded: target -> (file, server factory, session)
+SESSIONS = {
+    "simple": ("01_simple_server.py", "create_demo_server", "simulate_mcp_session"),
+    "app": ("04_mcp_app_server.py", "create_app_server", "simulate_session"),
+}
+
+
+def record_session(target: str) -> list[dict]:
+    """
+    Run a demo session with its output suppressed and return the requests
+    it sent.
+
+    Notifications and cancelled calls are dropped, as are requests that
+    fail against a fresh server (e.g. reads of resources the session set
+    up after creating it): they cannot be replayed out of context.
+    """
+    if target not in SESSIONS:
+        raise ValueError(f"No recordable session for {target}; choose from {sorted(SESSIONS)}")
+    filename, factory_name, session_name = SESSIONS[target]
+    module = gateway.load_example(SRC_DIR / filename)
+    factory = getattr(module, factory_name)
+    recorded, lock = [], threading.Lock()
+
+    def recording_factory(*args, **kwargs):
+        server = factory(*args, **kwargs)
+        handle_request = server.handle_request
+
+        def record(request: dict):
+            response = handle_request(request)
+            if response is not None:
+                with lock:
+                    recorded.append(request)
+            return response
+
+        server.handle_request = record
+        return server
+
+    setattr(module, factory_name, recording_factory)
+    with contextlib.redirect_stdout(io.StringIO()):
+        getattr(module, session_name)()
+
+    fresh = factory()
+    return [request for request in recorded if "error" not in fresh.handle_request(request)]
+
+
+def _call(name: str, arguments: dict) -> dict:
+    return {"jsonrpc": "2.0", "method": "tools/call", "params": {"name": name, "arguments": arguments}}
+
+
+def _read(uri: str) -> dict:
+    return {"jsonrpc": "2.0", "method": "resources/read", "params": {"uri": uri}}
+
+
+_LIST_TOOLS = {"jsonrpc": "2.0", "method": "tools/list", "params": {}}
+
+# target -> [(weight, request)]
+WORKLOADS = {
+    "simple": [
+        (5, _call("greet", {"name": "Bench"})),
+        (4, _call("calculate", {"operation": "multiply", "a": 7, "b": 6})),
+        (1, _LIST_TOOLS),
+    ],
+    "tools": [
+        (4, _call("format_text", {"text": "  hello world  ", "operations": ["trim", "title"]})),
+        (2, _call("analyze_text", {"text": "The quick brown fox jumps over 13 lazy dogs. " * 20})),
+        (2, _call("generate_id", {"prefix": "bench", "length": 12})),
+        (1, _call("query_data", {"table": "users", "limit": 2})),
+        (1, _LIST_TOOLS),
+    ],
+    "resources": [
+        (4, _read("config://database")),
+        (3, _read("db://users/active")),
+        (2, _read("api://status")),
+        (1, {"jsonrpc": "2.0", "method": "resources/list", "params": {}}),
+    ],
+    "app": [
+        (4, _read("internal://ui/feedback-form")),
+        (3, _call("submit_feedback", {"category": "bug", "details": "bench"})),
+        (2, _LIST_TOOLS),
+        (1, {"jsonrpc": "2.0", "method": "resources/templates/list", "params": {}}),
+    ],
+}
+
+
+def synthetic_workload(target: str, count: int, seed: int = 0) -> list[dict]:
+    """Draw `count` requests from the target's weighted mix."""
+    if target not in WORKLOADS:
+        raise ValueError(f"No workload for {target}; choose from {sorted(WORKLOADS)}")
+    weights, requests = zip(*WORKLOADS[target])
+    return random.Random(seed).choices(requests, weights=weights, k=count)
+
+
+def save_session(requests: list[dict], path: Path):
+    with open(path, "w") as f:
+        for request in requests:
+            f.write(json.dumps(request) + "\n")
+
+
+def load_session(path: Path) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+# =============================================================================
+# Targets
+# =============================================================================
+
+class InProcessTarget:
+    """Calls an example server's handle_request directly."""
+
+    transport = "inproc"
+
+    def __init__(self, name: str):
+        self._backend = None
+        if name in SESSIONS:
+            filename, factory_name, _ = SESSIONS[name]
+            server = getattr(gateway.load_example(SRC_DIR / filename), factory_name)()
+            self._handle = server.handle_request
+        else:
+            # The backend serializes calls into ToolServer and ResourceServer
+            self._backend = gateway.example_backend(name)
+            self._handle = gateway.BackendServer(self._backend).handle_request
+
+    def send(self, request: dict) -> Optional[dict]:
+        return self._handle(request)
+
+    def close(self):
+        if self._backend is not None:
+            self._backend.close()
+
+
+class StdioTarget:
+    """A pool of `05_mcp_gateway.py --serve <name>` child processes."""
+
+    transport = "stdio"
+
+    def __init__(self, name: str, pool_size: int):
+        command = [sys.executable, str(SRC_DIR / "05_mcp_gateway.py"), "--serve", name]
+        self._idle: queue.Queue = queue.Queue()
+        for _ in range(pool_size):
+            connection = gateway.StdioConnection(command)
+            connection.request("initialize", {"protocolVersion": "2024-11-05", "capabilities": {}})
+            self._idle.put(connection)
+
+    def send(self, request: dict) -> Optional[dict]:
+        connection = self._idle.get()
+        try:
+            return connection.request(request["method"], request.get("params", {}))
+        finally:
+            self._idle.put(connection)
+
+    def close(self):
+        while not self._idle.empty():
+            self._idle.get().close()
+
+
+def make_target(name: str, transport: str, concurrency: int):
+    if transport == "inproc":
+        return InProcessTarget(name)
+    if transport == "stdio":
+        return StdioTarget(name, pool_size=concurrency)
+    raise ValueError(f"Unknown transport: {transport}")
+
+
+# =============================================================================
+# Replay
+# =============================================================================
+
+def _percentile(samples: list[float], p: float) -> float:
+    if not samples:
+        return 0.0
+    return samples[min(len(samples) - 1, int(len(samples) * p / 100))]
+
+
+def _peak_rss_kb(who: int = resource.RUSAGE_SELF) -> int:
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    peak = resource.getrusage(who).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def replay(send: Callable[[dict], Optional[dict]], requests: list[dict],
+           concurrency: int = 1) -> dict:
+    """Send every request, `concurrency` at a time, and summarize latencies."""
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    pending = iter(enumerate(requests, start=1))
+
+    def worker():
+        nonlocal errors
+        local, failed = [], 0
+        while True:
+            with lock:
+                item = next(pending, None)
+            if item is None:
+                break
+            request_id, request = item
+            started = time.perf_counter()
+            response = send({**request, "id": request_id})
+            local.append(time.perf_counter() - started)
+            failed += response is None or "error" in response
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else 0.0,
+    }
+
+
+def traced_allocations(name: str, requests: list[dict]) -> dict:
+    """Peak traced memory while one fresh in-process server handles the requests."""
+    tracemalloc.start()
+    try:
+        target = InProcessTarget(name)
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for request_id, request in enumerate(requests, start=1):
+            target.send({**request, "id": request_id})
+        current, peak = tracemalloc.get_traced_memory()
+        target.close()
+    finally:
+        tracemalloc.stop()
+    return {"retained_kb": (current - baseline) // 1024, "peak_kb": (peak - baseline) // 1024}
+
+
+def run_benchmark(name: str, requests: list[dict], transports: list[str],
+                  concurrencies: list[int], workload: str, warmup: int = 50) -> dict:
+    """
+    Replay `requests` against `name` for every transport/concurrency pair.
+
+    Returns results keyed "<target>/<workload>/<transport>/c<concurrency>".
+    """
+    results = {}
+    # Measured separately: tracing allocations slows every request down
+    memory = traced_allocations(name, requests)
+
+    for transport in transports:
+        for concurrency in concurrencies:
+            target = make_target(name, transport, concurrency)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    replay(target.send, requests[:warmup], concurrency)
+                    stats = replay(target.send, requests, concurrency)
+            finally:
+                target.close()
+            stats["memory"] = {
+                **memory,
+                "rss_peak_kb": _peak_rss_kb(),
+                "children_rss_peak_kb": _peak_rss_kb(resource.RUSAGE_CHILDREN),
+            }
+            results[f"{name}/{workload}/{transport}/c{concurrency}"] = stats
+    return results
+
+
+# =============================================================================
+# Baselines
+# =============================================================================
+
+def save_baseline(results: dict, path: Path):
+    """Write results with enough context to judge a later comparison."""
+    document = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    path.write_text(json.dumps(document, indent=2) + "\n")
+
+
+def compare_baseline(results: dict, path: Path, tolerance: float = 0.10) -> list[str]:
+    """
+    Compare against a saved baseline; returns the keys that regressed.
+
+    A run regresses when its throughput drops, or its p99 latency grows,
+    by more than `tolerance` (10% by default).
+    """
+    baseline = json.loads(path.read_text())["results"]
+    regressions = []
+    print(f"\n{'run':<36}{'rps':>18}{'p99 ms':>22}")
+    for key, stats in results.items():
+        if key not in baseline:
+            print(f"{key:<36}{'(not in baseline)':>40}")
+            continue
+        before = baseline[key]
+        rps_change = stats["rps"] / before["rps"] - 1 if before["rps"] else 0.0
+        p99_change = stats["p99_ms"] / before["p99_ms"] - 1 if before["p99_ms"] else 0.0
+        regressed = rps_change < -tolerance or p99_change > tolerance
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<36}{before['rps']:>9.0f} → {stats['rps']:<6.0f}"
+              f"{before['p99_ms']:>10.3f} → {stats['p99_ms']:<8.3f} {'✗' if regressed else '✓'}")
+    return regressions
+
+
+def print_results(results: dict):
+    print(f"{'run':<36}{'reqs':>7}{'err':>5}{'rps':>10}{'p50 ms':>9}{'p99 ms':>9}{'peak KiB':>10}")
+    for key, stats in results.items():
+        print(f"{key:<36}{stats['requests']:>7}{stats['errors']:>5}{stats['rps']:>10.0f}"
+              f"{stats['p50_ms']:>9.3f}{stats['p99_ms']:>9.3f}{stats['memory']['peak_kb']:>10}")
+
+
+# =============================================================================
+# CLI
+# =============================================================================
+
+def run_demo():
+    """Record one session, then replay recorded and synthetic traffic."""
+
+    print("=" * 70)
+    print("MCP Benchmark Demo")
+    print("=" * 70)
+
+    session = record_session("app")
+    print(f"\n🎙  Recorded {len(session)} requests from the app session: "
+          f"{sorted({r['method'] for r in session})}")
+
+    results = {}
+    results.update(run_benchmark("app", session * 50, ["inproc"], [1, 4], "session"))
+    for name in ("simple", "tools", "resources"):
+        results.update(run_benchmark(name, synthetic_workload(name, 2000), ["inproc", "stdio"], [1, 4],
+                                     "synthetic"))
+
+    print("\n⏱️  Results")
+    print("-" * 70)
+    print_results(results)
+
+    print("\n" + "=" * 70)
+    print("✅ Benchmark demo complete!")
+
+
+def main(argv: list[str]):
+    parser = argparse.ArgumentParser(description="Benchmark the MCP example servers")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record a demo session to JSONL")
+    record.add_argument("target", choices=sorted(SESSIONS))
+    record.add_argument("-o", "--output", type=Path, required=True)
+
+    run = commands.add_parser("run", help="replay a workload and report")
+    run.add_argument("target", choices=sorted(WORKLOADS))
+    run.add_argument("--session", type=Path, help="recorded JSONL session (default: synthetic mix)")
+    run.add_argument("--requests", type=int, default=2000, help="requests per run")
+    run.add_argument("--transport", nargs="+", choices=["inproc", "stdio"], default=["inproc"])
+    run.add_argument("--concurrency", nargs="+", type=int, default=[1])
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--save", type=Path, help="write results as a baseline")
+    run.add_argument("--compare", type=Path, help="compare against a saved baseline")
+    run.add_argument("--tolerance", type=float, default=0.10)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        requests = record_session(args.target)
+        save_session(requests, args.output)
+        print(f"Recorded {len(requests)} requests to {args.output}")
+        return 0
+
+    if args.session:
+        session = load_session(args.session)
+        requests = (session * (args.requests // len(session) + 1))[:args.requests]
+        workload = args.session.stem
+    else:
+        requests = synthetic_workload(args.target, args.requests, args.seed)
+        workload = "synthetic"
+
+    results = run_benchmark(args.target, requests, args.transport, args.concurrency, workload)
+    print_results(results)
+    if args.save:
+        save_baseline(results, args.save)
+        print(f"\nBaseline saved to {args.save}")
+    if args.compare:
+        regressions = compare_baseline(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n✗ {len(regressions)} run(s) regressed beyond {args.tolerance:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main(sys.argv[1:]))
+    run_demo()